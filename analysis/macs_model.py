@@ -11,13 +11,28 @@ V_FFN = 3072
 # Total Linear MACs: 4*L*D^2 + 2*L*D*FFN
 # Total Attn MACs: 2*L^2*D
 
-def calc_vision_macs():
-    proj_macs = 4 * V_L * (V_D**2)
-    attn_macs = 2 * (V_L**2) * V_D
-    mlp_macs = 2 * V_L * V_D * V_FFN
-    layer_macs = proj_macs + attn_macs + mlp_macs
-    total_macs = V_LAYERS * layer_macs
-    return total_macs, (V_LAYERS * attn_macs) / total_macs
+def calc_vision_macs(keep_schedule=None):
+    # keep_schedule: tokens entering each layer after pruning (len V_LAYERS),
+    # see hardware/vision/token_pruning.py pruned_lengths. None = no pruning.
+    lengths = keep_schedule if keep_schedule is not None else [V_L] * V_LAYERS
+    total_macs = 0
+    total_attn = 0
+    for L in lengths:
+        proj_macs = 4 * L * (V_D**2)
+        attn_macs = 2 * (L**2) * V_D
+        mlp_macs = 2 * L * V_D * V_FFN
+        total_macs += proj_macs + attn_macs + mlp_macs
+        total_attn += attn_macs
+    # Top-k pruning itself: L^2 score comparisons + L*D norm per pruned layer
+    prev = V_L
+    for L in lengths:
+        if L < prev:
+            total_macs += prev**2 + prev * V_D
+        prev = L
+    return total_macs, total_attn / total_macs
+
+# Example pruning schedule: keep all tokens for 4 layers, then halve twice
+V_KEEP_SCHEDULE = [V_L] * 4 + [V_L // 2] * 4 + [V_L // 4] * 4
 
 # VLM Backbone Parameters
 T_LAYERS = 16
@@ -113,6 +128,12 @@ print(f"Vision %: {vision/total*100:.1f}%")
 print(f"VLM %:    {vlm/total*100:.1f}%")
 print(f"Action %: {action/total*100:.1f}%")
 
+print("-" * 20)
+vision_pruned, _ = calc_vision_macs(V_KEEP_SCHEDULE)
+print(f"Vision (pruned {V_KEEP_SCHEDULE[0]}->{V_KEEP_SCHEDULE[-1]}): {vision_pruned/1e9:.2f} G-MACs, "
+      f"projected vision speedup {vision/vision_pruned:.2f}x, "
+      f"end-to-end {total/(total - vision + vision_pruned):.2f}x")
+
 print("-" * 20)
 # Ops = 2 * MACs
 print(f"Total FLOPs: {total*2/1e9:.2f} G-FLOPs")
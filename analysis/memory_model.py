@@ -11,6 +11,7 @@ V_FFN = 3072
 def calc_vision_mem():
     # Weights (Read Once per Layer? Or Once per Inference if reuse? 
     # Assumption: Layer-by-Layer execution, weights streamed from HBM per layer.
+    # (hardware/vision/encoder.py vision_encoder: indexed per-layer weight tables.)
     # Weights fit in HBM, not on-chip.
     # W_Linear = (D*D)*4 (Q,K,V,Out) + (D*FFN)*2 (FC1, FC2)
     # Norms/Biases negligible for rough estimate.
@@ -26,6 +27,39 @@ def calc_vision_mem():
     total_bytes = V_LAYERS * (w_bytes_layer + act_bytes_layer)
     return total_bytes, w_params_layer * V_LAYERS * DTYPE_SIZE
 
+# Multi-camera vision (CrossAttentionConfig.NUM_CAMERAS = 3, see multi_camera_analysis.md)
+V_CAMERAS = 3
+V_LIN_L_TILE = 256   # Tokens per linear row block (camera_batch.linear_camera_batched L_tile)
+V_MLP_L_TILE = 256   # Tokens per MLP row block (camera_batch.mlp_camera_batched L_tile)
+
+def calc_vision_mem_batched(num_cameras=V_CAMERAS, batched=True, lin_l_tile=V_LIN_L_TILE,
+                            mlp_l_tile=V_MLP_L_TILE):
+    # batched=False: one single-frame encoder pass per camera, so every layer's
+    #   weights are streamed num_cameras times.
+    # batched=True: hardware/vision/camera_batch.py kernels, each weight tile is
+    #   applied to the row block of all frames before eviction -> weights
+    #   streamed once per block instead of once per camera per block.
+    # Every kernel keeps a token row block on chip and streams the weights over
+    #   it, so weights are re-read once per block in both cases: V_L / lin_l_tile
+    #   for the Q/K/V/O linears, V_L / mlp_l_tile for FC1 / FC2.
+    # Activations, in [L, D] tensors per frame: Q/K/V each read X and write
+    #   their output (6), SDPA reads Q/K/V and writes its output (4), the output
+    #   projection and the MLP each read and write one (4). Blocking the tokens
+    #   is what makes each linear read its input once; with the weight tile
+    #   outermost it would be re-read N / Tn times.
+    # Attention stays per-frame, so MACs are num_cameras x single frame.
+    attn_w_bytes_layer = 4 * V_D**2 * DTYPE_SIZE
+    mlp_w_bytes_layer = 2 * V_D * V_FFN * DTYPE_SIZE
+    act_bytes_layer = 14 * V_L * V_D * DTYPE_SIZE
+    w_reads = 1 if batched else num_cameras
+    lin_blocks = V_L // lin_l_tile
+    mlp_blocks = V_L // mlp_l_tile
+    total_bytes = V_LAYERS * (w_reads * (lin_blocks * attn_w_bytes_layer + mlp_blocks * mlp_w_bytes_layer)
+                              + num_cameras * act_bytes_layer)
+    macs_layer = 4 * V_L * V_D**2 + 2 * V_L**2 * V_D + 2 * V_L * V_D * V_FFN
+    total_macs = V_LAYERS * num_cameras * macs_layer
+    return total_bytes, total_macs / total_bytes
+
 # VLM Backbone Parameters
 T_LAYERS = 16
 T_L = 113
@@ -209,3 +243,10 @@ print(f"-" * 30)
 print(f"Peak Activation (On-Chip): {max(vis_act_peak, vlm_act_peak, act_act_peak)/1e6:.2f} MB")
 print(f"Action Context KV Cache:   {ctx_kv_size/1e3:.2f} KB")
 
+print(f"-" * 30)
+print(f"Multi-Camera Vision Encoder (INT8)")
+for n_cam in range(1, V_CAMERAS + 1):
+    seq_bytes, seq_oi = calc_vision_mem_batched(n_cam, batched=False)
+    bat_bytes, bat_oi = calc_vision_mem_batched(n_cam, batched=True)
+    print(f"  {n_cam} camera(s): per-frame {seq_bytes/1e6:.1f} MB (OI {seq_oi:.0f} MAC/B) | "
+          f"batched {bat_bytes/1e6:.1f} MB (OI {bat_oi:.0f} MAC/B, {bat_oi/seq_oi:.2f}x)")
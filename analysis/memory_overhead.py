@@ -57,22 +57,27 @@ print(f"{'Action Resid':<20} | {f'{a_l}x{a_d}':<15} | {b:<5} | {alloc/1024:.2f}
 total_alloc_mb += alloc/1024
 
 # 4. KV Cache (VLM)
-# 16 Layers * 113 * 320 * 2 (K+V).
+# 16 Layers * 241 * 320 * 2 (K+V).
+# Written by hardware/backbone/prefill.py backbone_prefill (layout: make_kv_descriptors)
+# over the full prefix, CrossAttentionConfig.DEFAULT_Tf = 3 cameras * 64 + 48 text
+# + 1 state = 241 tokens (padded to a multiple of P in the kernel). The 113-token
+# VLM residual above is the single-camera prefix (64 + 48 + 1).
 # This is persistent active state.
 # Is it partitioned? Yes, for attention.
 # But 16 layers... do we store ALL on chip?
 # "Action Context Cache: 54 KB".
 # That was for ONE layer? Or compressed?
 # The user text said "VLM Key/Value states needed for the 10-step diffusion".
-# If we store all layers: 16 * 113 * 320 * 2 = 1.1 MB.
+# If we store all layers: 16 * 241 * 320 * 2 = 2.5 MB.
 # Partitioned by 64? (KV Head dim is 64? No, 80/64).
 # Assuming Partition = 64.
-kv_size = 113 * 320 * 2
+kv_l = 241
+kv_size = kv_l * 320 * 2
 # Per layer
-b, alloc, eff = calc_bram_usage("VLM KV (1 Layer)", 113, 640, num_buffers=1)
+b, alloc, eff = calc_bram_usage("VLM KV (1 Layer)", kv_l, 640, num_buffers=1)
 # Total for 16 layers
 total_kv_alloc = (alloc/1024) * 16
-print(f"{'VLM KV (All)':<20} | {f'16x{113}x640':<15} | {b*16:<5} | {total_kv_alloc:.2f} MB     | {eff:.2f}")
+print(f"{'VLM KV (All)':<20} | {f'16x{kv_l}x640':<15} | {b*16:<5} | {total_kv_alloc:.2f} MB     | {eff:.2f}")
 total_alloc_mb += total_kv_alloc
 
 print("-" * 80)
@@ -0,0 +1,279 @@
+"""
+On-device flow-matching denoising loop for the smolVLA action expert.
+
+Inference integrates the action chunk from noise (t = 1) to t = 0 with
+NS = CrossAttentionConfig.NUM_STEPS Euler steps, dt = -1 / NS:
+
+    v_t = out_proj(expert(time_mlp(in_proj(x_t), emb(t)), prefix K/V))
+    x_t = x_t + dt * v_t
+
+Running this from the host costs NS launches and NS round trips of the
+[L_a, A] = [50, 32] chunk. action_expert_denoise runs the whole loop in one
+kernel: x_t and t stay on chip, and only the final chunk is written.
+
+Per step:
+
+1. action_in_proj
+2. time_mlp.action_time_mlp: sinusoidal embedding of t, action_time_mlp_in
+   with the concat folded into its K-loop, SiLU, action_time_mlp_out
+3. NL expert layers: RMSNorm -> GQA attention -> residual -> RMSNorm ->
+   SwiGLU MLP -> residual. Queries attend to the per-layer prefix K/V cache
+   (ctx_K / ctx_V, computed once per inference from the backbone prefill
+   cache by prefix_kv.prefix_kv_adapter). On self-attention layers
+   (self_attn[ly] = 1) they also attend to the action tokens' own K/V.
+4. Final RMSNorm, action_out_proj, Euler update.
+
+The kernel is float32 (the projections around the expert are float32 in the
+checkpoint, and the Euler accumulation needs the range). Expert weights are
+stacked per layer and indexed by ly, so each step streams them once from HBM.
+RoPE is not applied, as in the other attention kernels.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from action_expert.time_mlp import action_time_mlp, action_time_mlp_np, make_time_freq
+
+RMS_EPS = 1e-5
+
+
+def make_self_attn_flags(NL: int, every_n: int = 2):
+    """self_attn[ly] = 1 on layers that also attend to the action tokens."""
+    return np.array([1 if every_n > 0 and ly % every_n == 0 else 0 for ly in range(NL)], dtype=np.int32)
+
+
+def action_expert_denoise[
+    T: (bfloat16, float32),
+    NS: int16,    # Denoising steps (10)
+    NL: int16,    # Expert layers (16)
+    L_a: int16,   # Action tokens (50)
+    A: int16,     # Action dim (32)
+    D_a: int16,   # Expert width (720)
+    L_v: int16,   # Prefix tokens in the K/V cache
+    H_q: int16,   # Query heads (12)
+    H_kv: int16,  # KV heads (4)
+    D_h: int16,   # Head dim (80)
+    F: int16      # SwiGLU width (2048)
+](
+    noise: "float32[L_a, A]",
+    ctx_K: "T[NL, H_kv, L_v, D_h]",     # Prefix K/V per layer
+    ctx_V: "T[NL, H_kv, L_v, D_h]",
+    self_attn: "int32[NL]",             # make_self_attn_flags
+    time_freq: "float32[D_a // 2]",     # make_time_freq
+    W_in: "T[A, D_a]",                  # All weights [in, out]
+    b_in: "float32[D_a]",
+    W_tin: "T[2 * D_a, D_a]",           # Rows: action half | time half
+    b_tin: "float32[D_a]",
+    W_tout: "T[D_a, D_a]",
+    b_tout: "float32[D_a]",
+    rms_attn: "float32[NL, D_a]",
+    W_q: "T[NL, D_a, H_q * D_h]",
+    W_k: "T[NL, D_a, H_kv * D_h]",
+    W_v: "T[NL, D_a, H_kv * D_h]",
+    W_o: "T[NL, H_q * D_h, D_a]",
+    rms_mlp: "float32[NL, D_a]",
+    W_gate: "T[NL, D_a, F]",
+    W_up: "T[NL, D_a, F]",
+    W_down: "T[NL, F, D_a]",
+    rms_final: "float32[D_a]",
+    W_out: "T[D_a, A]",
+    b_out: "float32[A]",
+    scale: float32,                     # sqrt(D_h)
+    out: "float32[L_a, A]"
+):
+    # On-chip state across steps
+    x_t: "float32[L_a, A]"
+    for i0, a0 in allo.grid(L_a, A, name="load_noise"):
+        x_t[i0, a0] = noise[i0, a0]
+
+    dt: float32 = -1.0 / NS
+    for st in allo.grid(NS, name="denoise_step"):
+        t: float32 = 1.0 + st * dt
+
+        # ===== action_in_proj =====
+        a_emb: "float32[L_a, D_a]"
+        for i1, n1 in allo.grid(L_a, D_a, name="in_proj"):
+            acc1: float32 = b_in[n1]
+            for k1 in allo.reduction(A, name="in_proj_k"):
+                acc1 += x_t[i1, k1] * W_in[k1, n1]
+            a_emb[i1, n1] = acc1
+
+        # ===== Time embedding + action_time_mlp -> residual stream =====
+        h: "float32[L_a, D_a]"
+        action_time_mlp[T, L_a, D_a, "time_mlp"](a_emb, t, time_freq, W_tin, b_tin, W_tout, b_tout, h)
+
+        for ly in allo.grid(NL, name="expert_layer"):
+            # ===== RMSNorm (attention) =====
+            xn: "float32[L_a, D_a]"
+            for i4 in allo.grid(L_a, name="rms1_row"):
+                ss4: float32 = 0.0
+                for j4 in allo.reduction(D_a, name="rms1_sum"):
+                    ss4 += h[i4, j4] * h[i4, j4]
+                inv4: float32 = 1.0 / allo.sqrt(ss4 / D_a + RMS_EPS)
+                for j5 in allo.grid(D_a, name="rms1_out"):
+                    xn[i4, j5] = h[i4, j5] * inv4 * rms_attn[ly, j5]
+
+            # ===== Q / K / V projections =====
+            q: "float32[L_a, H_q * D_h]"
+            for i5, n5 in allo.grid(L_a, H_q * D_h, name="q_proj"):
+                acc5: float32 = 0.0
+                for k5 in allo.reduction(D_a, name="q_proj_k"):
+                    acc5 += xn[i5, k5] * W_q[ly, k5, n5]
+                q[i5, n5] = acc5
+            # Own K/V only on the layers that attend to the action tokens
+            k_a: "float32[L_a, H_kv * D_h]"
+            v_a: "float32[L_a, H_kv * D_h]"
+            if self_attn[ly] != 0:
+                for i6, n6 in allo.grid(L_a, H_kv * D_h, name="kv_proj"):
+                    acc6k: float32 = 0.0
+                    acc6v: float32 = 0.0
+                    for k6 in allo.reduction(D_a, name="kv_proj_k"):
+                        acc6k += xn[i6, k6] * W_k[ly, k6, n6]
+                        acc6v += xn[i6, k6] * W_v[ly, k6, n6]
+                    k_a[i6, n6] = acc6k
+                    v_a[i6, n6] = acc6v
+
+            # ===== GQA attention: prefix cache, then (optionally) own K/V =====
+            attn: "float32[L_a, H_q * D_h]"
+            for i7, hq in allo.grid(L_a, H_q, name="attn_row"):
+                g: int32 = hq // (H_q // H_kv)
+                sc: "float32[L_v + L_a]"
+                m7: float32 = -1.0 / 0.0
+                for j7 in allo.grid(L_v, name="ctx_score"):
+                    acc7: float32 = 0.0
+                    for d7 in allo.reduction(D_h, name="ctx_score_d"):
+                        acc7 += q[i7, hq * D_h + d7] * ctx_K[ly, g, j7, d7]
+                    acc7 = acc7 / scale
+                    if acc7 > m7:
+                        m7 = acc7
+                    sc[j7] = acc7
+                for j8 in allo.grid(L_a, name="self_score"):
+                    acc8: float32 = -1.0 / 0.0
+                    if self_attn[ly] != 0:
+                        acc8 = 0.0
+                        for d8 in allo.reduction(D_h, name="self_score_d"):
+                            acc8 += q[i7, hq * D_h + d8] * k_a[j8, g * D_h + d8]
+                        acc8 = acc8 / scale
+                    if acc8 > m7:
+                        m7 = acc8
+                    sc[L_v + j8] = acc8
+                sum9: float32 = 0.0
+                for j9 in allo.grid(L_v + L_a, name="attn_exp"):
+                    e9: float32 = allo.exp(sc[j9] - m7)
+                    sc[j9] = e9
+                    sum9 += e9
+                for d10 in allo.grid(D_h, name="attn_out"):
+                    acc10: float32 = 0.0
+                    for j10 in allo.reduction(L_v, name="attn_ctx_v"):
+                        acc10 += sc[j10] * ctx_V[ly, g, j10, d10]
+                    if self_attn[ly] != 0:
+                        for j11 in allo.reduction(L_a, name="attn_self_v"):
+                            acc10 += sc[L_v + j11] * v_a[j11, g * D_h + d10]
+                    attn[i7, hq * D_h + d10] = acc10 / sum9
+
+            # ===== o_proj + residual =====
+            for i12, n12 in allo.grid(L_a, D_a, name="o_proj"):
+                acc12: float32 = 0.0
+                for k12 in allo.reduction(H_q * D_h, name="o_proj_k"):
+                    acc12 += attn[i12, k12] * W_o[ly, k12, n12]
+                h[i12, n12] = h[i12, n12] + acc12
+
+            # ===== RMSNorm (MLP) =====
+            for i13 in allo.grid(L_a, name="rms2_row"):
+                ss13: float32 = 0.0
+                for j13 in allo.reduction(D_a, name="rms2_sum"):
+                    ss13 += h[i13, j13] * h[i13, j13]
+                inv13: float32 = 1.0 / allo.sqrt(ss13 / D_a + RMS_EPS)
+                for j14 in allo.grid(D_a, name="rms2_out"):
+                    xn[i13, j14] = h[i13, j14] * inv13 * rms_mlp[ly, j14]
+
+            # ===== SwiGLU MLP + residual =====
+            hid: "float32[L_a, F]"
+            for i15, f15 in allo.grid(L_a, F, name="gate_up"):
+                acc15g: float32 = 0.0
+                acc15u: float32 = 0.0
+                for k15 in allo.reduction(D_a, name="gate_up_k"):
+                    acc15g += xn[i15, k15] * W_gate[ly, k15, f15]
+                    acc15u += xn[i15, k15] * W_up[ly, k15, f15]
+                hid[i15, f15] = acc15g / (1.0 + allo.exp(-acc15g)) * acc15u
+            for i16, n16 in allo.grid(L_a, D_a, name="down"):
+                acc16: float32 = 0.0
+                for k16 in allo.reduction(F, name="down_k"):
+                    acc16 += hid[i16, k16] * W_down[ly, k16, n16]
+                h[i16, n16] = h[i16, n16] + acc16
+
+        # ===== Final RMSNorm, action_out_proj, Euler update =====
+        for i17 in allo.grid(L_a, name="rmsf_row"):
+            ss17: float32 = 0.0
+            for j17 in allo.reduction(D_a, name="rmsf_sum"):
+                ss17 += h[i17, j17] * h[i17, j17]
+            inv17: float32 = 1.0 / allo.sqrt(ss17 / D_a + RMS_EPS)
+            for j18 in allo.grid(D_a, name="rmsf_out"):
+                xn_f: float32 = h[i17, j18] * inv17 * rms_final[j18]
+                h[i17, j18] = xn_f
+        for i19, a19 in allo.grid(L_a, A, name="out_proj"):
+            acc19: float32 = b_out[a19]
+            for k19 in allo.reduction(D_a, name="out_proj_k"):
+                acc19 += h[i19, k19] * W_out[k19, a19]
+            x_t[i19, a19] = x_t[i19, a19] + dt * acc19
+
+    for i20, a20 in allo.grid(L_a, A, name="store_out"):
+        out[i20, a20] = x_t[i20, a20]
+
+
+def _rms_norm_np(x, w):
+    return x / np.sqrt((x * x).mean(axis=-1, keepdims=True) + RMS_EPS) * w
+
+
+def _silu_np(z):
+    return z / (1.0 + np.exp(-z))
+
+
+def action_expert_denoise_np(noise, ctx_K, ctx_V, self_attn, time_freq,
+                             W_in, b_in, W_tin, b_tin, W_tout, b_tout,
+                             rms_attn, W_q, W_k, W_v, W_o, rms_mlp,
+                             W_gate, W_up, W_down, rms_final, W_out, b_out,
+                             scale, num_steps):
+    """Numpy (float64) reference for action_expert_denoise."""
+    NL, H_kv, L_v, D_h = ctx_K.shape
+    H_q = W_q.shape[2] // D_h
+    G = H_q // H_kv
+    L_a = noise.shape[0]
+    f64 = np.float64
+
+    x_t = noise.astype(f64)
+    dt = -1.0 / num_steps
+    for st in range(num_steps):
+        t = 1.0 + st * dt
+        a_emb = x_t @ W_in + b_in
+        h = action_time_mlp_np(a_emb, t, time_freq, W_tin, b_tin, W_tout, b_tout)
+
+        for ly in range(NL):
+            xn = _rms_norm_np(h, rms_attn[ly])
+            q = xn @ W_q[ly]
+            if self_attn[ly]:
+                k_a = xn @ W_k[ly]
+                v_a = xn @ W_v[ly]
+            attn = np.zeros((L_a, H_q * D_h))
+            for hq in range(H_q):
+                g = hq // G
+                qh = q[:, hq * D_h:(hq + 1) * D_h]
+                K = ctx_K[ly, g].astype(f64)
+                V = ctx_V[ly, g].astype(f64)
+                if self_attn[ly]:
+                    K = np.concatenate([K, k_a[:, g * D_h:(g + 1) * D_h]])
+                    V = np.concatenate([V, v_a[:, g * D_h:(g + 1) * D_h]])
+                s = qh @ K.T / scale
+                w = np.exp(s - s.max(axis=-1, keepdims=True))
+                attn[:, hq * D_h:(hq + 1) * D_h] = (w @ V) / w.sum(axis=-1, keepdims=True)
+            h = h + attn @ W_o[ly]
+            xn = _rms_norm_np(h, rms_mlp[ly])
+            h = h + (_silu_np(xn @ W_gate[ly]) * (xn @ W_up[ly])) @ W_down[ly]
+
+        v_t = _rms_norm_np(h, rms_final) @ W_out + b_out
+        x_t = x_t + dt * v_t
+    return x_t
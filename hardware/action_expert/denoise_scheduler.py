@@ -0,0 +1,133 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from action_expert.denoise import (
+    action_expert_denoise,
+    action_expert_denoise_np,
+    make_time_freq,
+    make_self_attn_flags,
+)
+from action_expert.time_mlp_scheduler import customize_action_time_mlp
+from attention.config import CrossAttentionConfig as CAC
+
+
+def make_denoise_inputs(NL: int, L_a: int, A: int, D_a: int, L_v: int,
+                        H_q: int, H_kv: int, D_h: int, F: int, seed: int = 0):
+    """Random noise, prefix K/V cache and expert weights for action_expert_denoise."""
+    rng = np.random.default_rng(seed)
+
+    def w(*shape):
+        return (rng.standard_normal(shape) / np.sqrt(shape[-2] if len(shape) > 1 else 1)).astype(np.float32)
+
+    def g(*shape):
+        return (1.0 + 0.1 * rng.standard_normal(shape)).astype(np.float32)
+
+    noise = rng.standard_normal((L_a, A)).astype(np.float32)
+    ctx_K = rng.standard_normal((NL, H_kv, L_v, D_h)).astype(np.float32)
+    ctx_V = rng.standard_normal((NL, H_kv, L_v, D_h)).astype(np.float32)
+    return (
+        noise, ctx_K, ctx_V,
+        make_self_attn_flags(NL, CAC.SELF_ATTN_EVERY_N_LAYERS),
+        make_time_freq(D_a),
+        w(A, D_a), w(D_a) * 0.1,
+        w(2 * D_a, D_a), w(D_a) * 0.1,
+        w(D_a, D_a), w(D_a) * 0.1,
+        g(NL, D_a),
+        w(NL, D_a, H_q * D_h), w(NL, D_a, H_kv * D_h), w(NL, D_a, H_kv * D_h),
+        w(NL, H_q * D_h, D_a) * 0.5,
+        g(NL, D_a),
+        w(NL, D_a, F), w(NL, D_a, F), w(NL, F, D_a) * 0.5,
+        g(D_a),
+        w(D_a, A), w(A) * 0.1,
+    )
+
+
+def schedule_action_expert_denoise(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    NS: int = CAC.NUM_STEPS,
+    NL: int = CAC.NUM_EXPERT_LAYERS,
+    L_a: int = CAC.LENGTH_OF_ACTION_CHUNK,
+    A: int = CAC.ACTION_DIM,
+    D_a: int = CAC.ACTION_HIDDEN_SIZE,
+    L_v: int = CAC.DEFAULT_Tf,
+    H_q: int = CAC.NUM_Q_HEADS,
+    H_kv: int = CAC.NUM_KV_HEADS,
+    D_h: int = CAC.HEAD_DIM,
+    F: int = CAC.INTERMEDIATE_DIM,
+    mode: str = "csyn"
+):
+    """
+    Full flow-matching loop in one kernel (denoise.action_expert_denoise).
+
+    x_t, the time embedding and the expert activations are on-chip buffers;
+    each weight table and the prefix K/V cache get their own HBM channel.
+    Reduction loops are pipelined and the per-row score buffer is split so
+    the softmax passes can overlap.
+    """
+    s = allo.customize(action_expert_denoise,
+                       instantiate=[A_T, NS, NL, L_a, A, D_a, L_v, H_q, H_kv, D_h, F])
+
+    s_time = customize_action_time_mlp(A_T, L_a, D_a)
+    s.compose(s_time, id="time_mlp")
+
+    s.partition(s.x_t, partition.Complete, dim=2)
+
+    loops = s.get_loops()
+    step = loops["denoise_step"]
+    for name in ("k1", "k19"):                                        # in / out proj
+        s.pipeline(step[name])
+    for name in ("j4", "j5", "j13", "j14", "j17", "j18"):              # RMSNorm
+        s.pipeline(step[name])
+    for name in ("k5", "k6", "k12", "k15", "k16"):                     # expert projections
+        s.pipeline(step[name])
+    for name in ("d7", "d8", "j9", "j10", "j11"):                      # attention
+        s.pipeline(step[name])
+    s.pipeline(loops["load_noise"]["a0"])
+    s.pipeline(loops["store_out"]["a20"])
+
+    dtype_str = "bfloat16" if A_T == bfloat16 else "float32"
+    project_name = f"action_denoise_{NS}s_{NL}l_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    scale = float(np.sqrt(D_h))
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            args = make_denoise_inputs(NL, L_a, A, D_a, L_v, H_q, H_kv, D_h, F)
+            out = np.zeros((L_a, A), dtype=np.float32)
+            s_llvm(*args, scale, out)
+            ref = action_expert_denoise_np(*args, scale, NS)
+            print(f"max |diff| vs numpy: {np.abs(out - ref).max():.3e}")
+            return out, s
+        case "csyn":
+            hbm_mapping = {
+                "ctx_K": 0,
+                "ctx_V": 1,
+                "W_q": 2,
+                "W_k": 3,
+                "W_v": 4,
+                "W_o": 5,
+                "W_gate": 6,
+                "W_up": 7,
+                "W_down": 8,
+                "W_tin": 9,
+            }
+            s.build(
+                target="vitis_hls",
+                mode="csyn",
+                project=project_name,
+                configs={"hbm_mapping": hbm_mapping},
+            )()
+            return s, s
+
+
+if __name__ == "__main__":
+    print("\n=== Action expert, 10 steps x 16 layers, float32 ===")
+    schedule_action_expert_denoise(np.float32, float32, mode="csyn")
+
+    # schedule_action_expert_denoise(np.float32, float32, NS=2, NL=2, L_a=5, A=4, D_a=16,
+    #                                L_v=6, H_q=4, H_kv=2, D_h=4, F=24, mode="llvm")
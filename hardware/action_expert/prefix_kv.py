@@ -0,0 +1,94 @@
+"""
+Expert-side adapter from the backbone prefix K/V cache to ctx_K / ctx_V.
+
+backbone.prefill.backbone_prefill stores each layer's K/V as int8
+[H_b, L, D_hb] blocks of the SmolLM2 attention (H_b = 5 KV heads of 64).
+action_expert_denoise attends with H_kv = 4 KV heads of 80 in float, and in
+smolVLA the expert's cross-attention layers project the backbone K/V with
+their own k_proj / v_proj (320 -> 320). prefix_kv_adapter does that once per
+inference, before the denoising loop:
+
+    ctx_K[ly] = heads(k_scale[ly] * K_b[ly] @ W_ck[ly])
+    ctx_V[ly] = heads(v_scale[ly] * V_b[ly] @ W_cv[ly])
+
+where K_b[ly] is layer ly's cache as [L_v, H_b * D_hb] (read through kv_desc,
+so the cache layout stays the prefill's business) and heads() splits the
+output columns into [H_kv, L_v, D_h]. K and V are requantized with their
+own prefill slots (RQ_K / RQ_V), so each has its own per-layer dequant
+scale. The first L_v cache tokens are read;
+the prefill's PAD_SEGMENT padding sits after them.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backbone.prefill import kv_cache_view
+
+
+def prefix_kv_adapter[
+    T: (int4, int8),            # Cache element type
+    Ty: (bfloat16, float32),    # Expert weight / context type
+    NL: int16,    # Layers (16, one expert layer per backbone layer)
+    L_v: int16,   # Prefix tokens read from the cache (<= prefill L)
+    H_b: int16,   # Backbone KV heads (5)
+    D_hb: int16,  # Backbone head dim (64)
+    H_kv: int16,  # Expert KV heads (4)
+    D_h: int16,   # Expert head dim (80)
+    Tn: int16,    # Output features per weight tile
+    KV: int32     # kv_cache size in elements (make_kv_descriptors)
+](
+    kv_cache: "T[KV]",                        # backbone_prefill output
+    kv_desc: "int32[NL, 4]",                  # make_kv_descriptors
+    k_scale: "float32[NL]",                   # Real value of one K cache LSB per layer
+    v_scale: "float32[NL]",                   # Real value of one V cache LSB per layer
+    W_ck: "Ty[NL, H_b * D_hb, H_kv * D_h]",   # Expert context k_proj [in, out]
+    W_cv: "Ty[NL, H_b * D_hb, H_kv * D_h]",   # Expert context v_proj [in, out]
+    ctx_K: "Ty[NL, H_kv, L_v, D_h]",          # action_expert_denoise inputs
+    ctx_V: "Ty[NL, H_kv, L_v, D_h]"
+):
+    for ly in allo.grid(NL, name="adapt_layer"):
+        # Layer ly's prefix K/V, tokens x (backbone head, dim)
+        k_in: "T[L_v, H_b * D_hb]"
+        v_in: "T[L_v, H_b * D_hb]"
+        for i0, hb, db in allo.grid(L_v, H_b, D_hb, name="cache_read"):
+            off: int32 = hb * kv_desc[ly, 2] + i0 * kv_desc[ly, 3] + db
+            k_in[i0, hb * D_hb + db] = kv_cache[kv_desc[ly, 0] + off]
+            v_in[i0, hb * D_hb + db] = kv_cache[kv_desc[ly, 1] + off]
+
+        # Weight-stationary projection, dequantized after the reduction
+        for nt in allo.grid(H_kv * D_h // Tn, name="adapt_tile"):
+            wk_buf: "Ty[H_b * D_hb, Tn]"
+            wv_buf: "Ty[H_b * D_hb, Tn]"
+            for k0, j0 in allo.grid(H_b * D_hb, Tn, name="adapt_load_w"):
+                wk_buf[k0, j0] = W_ck[ly, k0, nt * Tn + j0]
+                wv_buf[k0, j0] = W_cv[ly, k0, nt * Tn + j0]
+            for i1, j1 in allo.grid(L_v, Tn, name="adapt_row"):
+                n: int32 = nt * Tn + j1
+                acck: float32 = 0.0
+                accv: float32 = 0.0
+                for k1 in allo.reduction(H_b * D_hb, name="adapt_k"):
+                    kq: float32 = k_in[i1, k1]
+                    vq: float32 = v_in[i1, k1]
+                    acck += kq * wk_buf[k1, j1]
+                    accv += vq * wv_buf[k1, j1]
+                ctx_K[ly, n // D_h, i1, n % D_h] = acck * k_scale[ly]
+                ctx_V[ly, n // D_h, i1, n % D_h] = accv * v_scale[ly]
+
+
+def prefix_kv_adapter_np(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, H_b: int, D_hb: int,
+                         L_v: int, D_h: int):
+    """Numpy (float64) reference for prefix_kv_adapter; returns (ctx_K, ctx_V)."""
+    NL = W_ck.shape[0]
+    H_kv = W_ck.shape[2] // D_h
+    ctx_K = np.zeros((NL, H_kv, L_v, D_h))
+    ctx_V = np.zeros((NL, H_kv, L_v, D_h))
+    for ly in range(NL):
+        K, V = kv_cache_view(kv_cache, kv_desc, ly, H_b, L_v, D_hb)
+        for ctx, X, W, x_scale in ((ctx_K, K, W_ck, k_scale), (ctx_V, V, W_cv, v_scale)):
+            x = X.transpose(1, 0, 2).reshape(L_v, H_b * D_hb).astype(np.float64) * x_scale[ly]
+            ctx[ly] = (x @ W[ly].astype(np.float64)).reshape(L_v, H_kv, D_h).transpose(1, 0, 2)
+    return ctx_K, ctx_V
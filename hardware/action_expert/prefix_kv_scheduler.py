@@ -0,0 +1,85 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from action_expert.prefix_kv import prefix_kv_adapter, prefix_kv_adapter_np
+from backbone.prefill import make_kv_descriptors
+from backbone.prefill_scheduler import pad_prefix
+from attention.config import CrossAttentionConfig as CAC
+from attention.config import VLMBackboneConfig as VBC
+
+
+def schedule_prefix_kv_adapter(
+    N_T: np.dtype,
+    C_T: allo.ir.types,
+    A_T: allo.ir.types,
+    NL: int = CAC.NUM_EXPERT_LAYERS,
+    L_v: int = CAC.DEFAULT_Tf,
+    H_b: int = VBC.NUM_KV_HEADS,
+    D_hb: int = VBC.HEAD_DIM,
+    H_kv: int = CAC.NUM_KV_HEADS,
+    D_h: int = CAC.HEAD_DIM,
+    Tn: int = 16,
+    P: int = 4,       # backbone_prefill row parallelism (cache is padded to it)
+    mode: str = "csyn"
+):
+    """
+    Backbone K/V cache -> expert ctx_K / ctx_V (prefix_kv.prefix_kv_adapter).
+
+    Runs once per inference. The W_ck / W_cv tiles are split by column so the
+    Tn outputs of a tile read their weights in parallel, and the reduction is
+    pipelined; kv_cache and the two context tensors get their own HBM channels.
+    """
+    kv_desc, KV = make_kv_descriptors(NL, H_b, pad_prefix(L_v, P), D_hb)
+    s = allo.customize(prefix_kv_adapter, instantiate=[C_T, A_T, NL, L_v, H_b, D_hb, H_kv, D_h, Tn, KV])
+
+    s.partition(s.wk_buf, partition.Complete, dim=2)
+    s.partition(s.wv_buf, partition.Complete, dim=2)
+    loops = s.get_loops()["adapt_layer"]
+    s.pipeline(loops["db"])
+    s.pipeline(loops["j0"])
+    s.pipeline(loops["k1"])
+
+    dtype_str = "bfloat16" if A_T == bfloat16 else "float32"
+    project_name = f"prefix_kv_adapter_{NL}l_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            kv_cache = np.random.randint(-128, 128, KV).astype(N_T)
+            k_scale = np.full(NL, 1.0 / 32, dtype=np.float32)
+            v_scale = np.full(NL, 1.0 / 64, dtype=np.float32)
+            W_ck = (np.random.randn(NL, H_b * D_hb, H_kv * D_h) / np.sqrt(H_b * D_hb)).astype(np.float32)
+            W_cv = (np.random.randn(NL, H_b * D_hb, H_kv * D_h) / np.sqrt(H_b * D_hb)).astype(np.float32)
+            ctx_K = np.zeros((NL, H_kv, L_v, D_h), dtype=np.float32)
+            ctx_V = np.zeros((NL, H_kv, L_v, D_h), dtype=np.float32)
+            s_llvm(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, ctx_K, ctx_V)
+            K_ref, V_ref = prefix_kv_adapter_np(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, H_b, D_hb, L_v, D_h)
+            print(f"max |diff| vs numpy: K {np.abs(ctx_K - K_ref).max():.3e}, V {np.abs(ctx_V - V_ref).max():.3e}")
+            return (ctx_K, ctx_V), s
+        case "csyn":
+            hbm_mapping = {
+                "kv_cache": 0,
+                "W_ck": 1,
+                "W_cv": 2,
+                "ctx_K": 3,
+                "ctx_V": 4,
+            }
+            s.build(
+                target="vitis_hls",
+                mode="csyn",
+                project=project_name,
+                configs={"hbm_mapping": hbm_mapping},
+            )()
+            return s, s
+
+
+if __name__ == "__main__":
+    print(f"\n=== Prefix K/V adapter, {CAC.NUM_EXPERT_LAYERS} layers x {CAC.DEFAULT_Tf} tokens ===")
+    schedule_prefix_kv_adapter(np.int8, int8, float32, mode="csyn")
+
+    # schedule_prefix_kv_adapter(np.int8, int8, float32, NL=2, L_v=10, H_b=2, D_hb=4,
+    #                            H_kv=2, D_h=4, Tn=4, mode="llvm")
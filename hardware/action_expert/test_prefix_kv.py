@@ -0,0 +1,95 @@
+"""
+Test for prefix_kv_adapter and the prefill -> expert hand-off (llvm mode)
+
+The adapter is checked against its float64 reference on a random cache. The
+end-to-end test runs backbone_prefill, feeds its HBM cache through the
+adapter into action_expert_denoise, and compares the final action chunk with
+the numpy chain applied to the same cache.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8, float32
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from action_expert.prefix_kv import prefix_kv_adapter, prefix_kv_adapter_np
+from action_expert.denoise import action_expert_denoise, action_expert_denoise_np
+from action_expert.denoise_scheduler import make_denoise_inputs
+from backbone.prefill import backbone_prefill, make_kv_descriptors
+from backbone.prefill_scheduler import make_prefill_inputs
+from attention.self_attention.attention_masks import segment_ids
+from common_kernels.requant import quant_range
+
+
+@pytest.mark.parametrize("NL, L_v, L, H_b, D_hb, H_kv, D_h, Tn", [
+    (2, 10, 12, 2, 4, 2, 4, 4),
+    (1, 7, 8, 5, 8, 4, 10, 8),     # 5 x 8 backbone heads -> 4 x 10 expert heads
+])
+def test_prefix_kv_adapter_vs_numpy(NL, L_v, L, H_b, D_hb, H_kv, D_h, Tn):
+    rng = np.random.default_rng(0)
+    kv_desc, KV = make_kv_descriptors(NL, H_b, L, D_hb)
+    kv_cache = rng.integers(-128, 128, KV).astype(np.int8)
+    k_scale = rng.uniform(1 / 64, 1 / 16, NL).astype(np.float32)
+    v_scale = rng.uniform(1 / 256, 1 / 128, NL).astype(np.float32)
+    W_ck = rng.standard_normal((NL, H_b * D_hb, H_kv * D_h)).astype(np.float32)
+    W_cv = rng.standard_normal((NL, H_b * D_hb, H_kv * D_h)).astype(np.float32)
+
+    s = allo.customize(prefix_kv_adapter, instantiate=[int8, float32, NL, L_v, H_b, D_hb, H_kv, D_h, Tn, KV])
+    ctx_K = np.zeros((NL, H_kv, L_v, D_h), dtype=np.float32)
+    ctx_V = np.zeros((NL, H_kv, L_v, D_h), dtype=np.float32)
+    s.build()(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, ctx_K, ctx_V)
+
+    K_ref, V_ref = prefix_kv_adapter_np(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, H_b, D_hb, L_v, D_h)
+    np.testing.assert_allclose(ctx_K, K_ref, rtol=1e-4, atol=1e-4)
+    np.testing.assert_allclose(ctx_V, V_ref, rtol=1e-4, atol=1e-4)
+
+
+def test_prefill_cache_drives_expert():
+    """backbone_prefill's kv_cache -> prefix_kv_adapter -> action_expert_denoise."""
+    NL, L_real, L, D, H_q_b, H_b, D_hb, F_b, Tn_b, P = 2, 10, 12, 32, 6, 2, 4, 48, 8, 4
+    NS, L_a, A, D_a, H_q, H_kv, D_h, F = 2, 5, 4, 16, 4, 2, 4, 24
+
+    # Backbone prefill over a padded prefix
+    flags = np.zeros(L_real, dtype=np.int32)
+    flags[-1] = 1
+    seg = segment_ids(flags, pad_to=L)
+    kv_desc, KV = make_kv_descriptors(NL, H_b, L, D_hb)
+    prefill_args = make_prefill_inputs(np.int8, NL, L, D, H_q_b, H_b, D_hb, F_b, seg=seg, seed=6)
+    q_min, q_max = quant_range(8)
+    s_pre = allo.customize(backbone_prefill, instantiate=[int8, NL, L, D, H_q_b, H_b, D_hb, F_b, Tn_b, P, KV])
+    kv_cache = np.zeros(KV, dtype=np.int8)
+    s_pre.build()(*prefill_args, float(np.sqrt(D_hb)), 1.0 / 16, q_min, q_max,
+                  kv_desc, kv_cache, np.zeros((L, D), dtype=np.int32))
+    assert np.any(kv_cache != 0)
+
+    # Expert-side context projections over the real prefix tokens
+    rng = np.random.default_rng(7)
+    k_scale = np.full(NL, 1.0 / 32, dtype=np.float32)
+    v_scale = np.full(NL, 1.0 / 64, dtype=np.float32)
+    W_ck = (rng.standard_normal((NL, H_b * D_hb, H_kv * D_h)) / np.sqrt(H_b * D_hb)).astype(np.float32)
+    W_cv = (rng.standard_normal((NL, H_b * D_hb, H_kv * D_h)) / np.sqrt(H_b * D_hb)).astype(np.float32)
+    s_ad = allo.customize(prefix_kv_adapter, instantiate=[int8, float32, NL, L_real, H_b, D_hb, H_kv, D_h, 4, KV])
+    ctx_K = np.zeros((NL, H_kv, L_real, D_h), dtype=np.float32)
+    ctx_V = np.zeros((NL, H_kv, L_real, D_h), dtype=np.float32)
+    s_ad.build()(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, ctx_K, ctx_V)
+
+    # Denoising loop on the adapted cache
+    args = list(make_denoise_inputs(NL, L_a, A, D_a, L_real, H_q, H_kv, D_h, F, seed=8))
+    args[1], args[2] = ctx_K, ctx_V
+    scale = float(np.sqrt(D_h))
+    s_den = allo.customize(action_expert_denoise,
+                           instantiate=[float32, NS, NL, L_a, A, D_a, L_real, H_q, H_kv, D_h, F])
+    out = np.zeros((L_a, A), dtype=np.float32)
+    s_den.build()(*args, scale, out)
+
+    args[1], args[2] = prefix_kv_adapter_np(kv_cache, kv_desc, k_scale, v_scale, W_ck, W_cv, H_b, D_hb, L_real, D_h)
+    ref = action_expert_denoise_np(*args, scale, NS)
+    np.testing.assert_allclose(out, ref, rtol=1e-3, atol=1e-3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
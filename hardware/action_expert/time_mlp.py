@@ -0,0 +1,91 @@
+"""
+Sinusoidal timestep embedding fused with action_time_mlp_in / _out.
+
+Each denoising step feeds the expert
+
+    SiLU(concat(a_emb, emb(t)) @ W_tin + b_tin) @ W_tout + b_tout
+
+where a_emb = action_in_proj(x_t) is [L_a, D_a] and emb(t) is the
+[D_a] sinusoidal embedding of the timestep, repeated for every token.
+action_time_mlp never builds the [L_a, 2 * D_a] concatenation. Instead it
+splits the K-loop of the first GEMM at D_a:
+
+- rows D_a.. of W_tin only ever see emb(t), so emb(t) @ W_tin[D_a:] + b_tin
+  is computed once per step into t_part[D_a]
+- the per-token reduction covers only rows ..D_a and starts from t_part
+
+emb(t) comes from the frequency table made by make_time_freq
+(2 pi / period, periods 4e-3 .. 4.0 as in smolVLA). The per-step cost is
+then D_a / 2 sin/cos pairs and one D_a x D_a GEMV, rather than L_a of each.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+
+TIME_MIN_PERIOD = 4e-3
+TIME_MAX_PERIOD = 4.0
+
+
+def make_time_freq(D: int, min_period: float = TIME_MIN_PERIOD, max_period: float = TIME_MAX_PERIOD):
+    """2 pi / period for the D // 2 sinusoid frequencies of the time embedding."""
+    fraction = np.linspace(0.0, 1.0, D // 2, dtype=np.float64)
+    period = min_period * (max_period / min_period) ** fraction
+    return (2.0 * np.pi / period).astype(np.float32)
+
+
+def action_time_mlp[
+    T: (bfloat16, float32),
+    L_a: int16,   # Action tokens (50)
+    D_a: int16    # Expert width (720)
+](
+    a_emb: "float32[L_a, D_a]",         # action_in_proj output
+    t: float32,                         # Timestep
+    time_freq: "float32[D_a // 2]",     # make_time_freq
+    W_tin: "T[2 * D_a, D_a]",           # [in, out], rows: action half | time half
+    b_tin: "float32[D_a]",
+    W_tout: "T[D_a, D_a]",
+    b_tout: "float32[D_a]",
+    out: "float32[L_a, D_a]"
+):
+    # ===== Time embedding and its half of action_time_mlp_in, once per step =====
+    t_emb: "float32[D_a]"
+    for f0 in allo.grid(D_a // 2, name="time_emb"):
+        arg: float32 = t * time_freq[f0]
+        t_emb[f0] = allo.sin(arg)
+        t_emb[D_a // 2 + f0] = allo.cos(arg)
+    t_part: "float32[D_a]"
+    for n0 in allo.grid(D_a, name="time_in"):
+        acc0: float32 = b_tin[n0]
+        for k0 in allo.reduction(D_a, name="time_in_k"):
+            acc0 += t_emb[k0] * W_tin[D_a + k0, n0]
+        t_part[n0] = acc0
+
+    # ===== action_time_mlp_in (action half, starts from t_part) + SiLU =====
+    a_hid: "float32[L_a, D_a]"
+    for i2, n2 in allo.grid(L_a, D_a, name="time_mlp_in"):
+        acc2: float32 = t_part[n2]
+        for k2 in allo.reduction(D_a, name="time_mlp_in_k"):
+            acc2 += a_emb[i2, k2] * W_tin[k2, n2]
+        a_hid[i2, n2] = acc2 / (1.0 + allo.exp(-acc2))
+
+    # ===== action_time_mlp_out =====
+    for i3, n3 in allo.grid(L_a, D_a, name="time_mlp_out"):
+        acc3: float32 = b_tout[n3]
+        for k3 in allo.reduction(D_a, name="time_mlp_out_k"):
+            acc3 += a_hid[i3, k3] * W_tout[k3, n3]
+        out[i3, n3] = acc3
+
+
+def time_embedding_np(t, time_freq):
+    """[sin(t * f), cos(t * f)] in float64."""
+    arg = t * time_freq.astype(np.float64)
+    return np.concatenate([np.sin(arg), np.cos(arg)])
+
+
+def action_time_mlp_np(a_emb, t, time_freq, W_tin, b_tin, W_tout, b_tout):
+    """Numpy (float64) reference for action_time_mlp, with the explicit concat."""
+    a_emb = np.asarray(a_emb, dtype=np.float64)
+    t_emb = np.tile(time_embedding_np(t, time_freq), (a_emb.shape[0], 1))
+    z = np.concatenate([a_emb, t_emb], axis=1) @ W_tin + b_tin
+    return (z / (1.0 + np.exp(-z))) @ W_tout + b_tout
@@ -0,0 +1,71 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from action_expert.time_mlp import action_time_mlp, action_time_mlp_np, make_time_freq
+from attention.config import CrossAttentionConfig as CAC
+
+
+def customize_action_time_mlp(
+    A_T: allo.ir.types,
+    L_a: int = CAC.LENGTH_OF_ACTION_CHUNK,
+    D_a: int = CAC.ACTION_HIDDEN_SIZE
+):
+    """
+    Pre-scheduled action_time_mlp (also composed into action_expert_denoise).
+
+    The once-per-step time GEMV and the two per-token GEMMs are pipelined on
+    their reductions; t_emb is split by half so the sin and cos writes of one
+    frequency land in different banks.
+    """
+    s = allo.customize(action_time_mlp, instantiate=[A_T, L_a, D_a])
+    s.partition(s.t_emb, partition.Block, dim=1, factor=2)
+
+    s.pipeline(s.get_loops()["time_emb"]["f0"])
+    s.pipeline(s.get_loops()["time_in"]["k0"])
+    s.pipeline(s.get_loops()["time_mlp_in"]["k2"])
+    s.pipeline(s.get_loops()["time_mlp_out"]["k3"])
+    return s
+
+
+def schedule_action_time_mlp(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    L_a: int = CAC.LENGTH_OF_ACTION_CHUNK,
+    D_a: int = CAC.ACTION_HIDDEN_SIZE,
+    t: float = 1.0,
+    mode: str = "csyn"
+):
+    s = customize_action_time_mlp(A_T, L_a, D_a)
+
+    dtype_str = "bfloat16" if A_T == bfloat16 else "float32"
+    project_name = f"action_time_mlp_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            a_emb = np.random.randn(L_a, D_a).astype(np.float32)
+            time_freq = make_time_freq(D_a)
+            W_tin = (np.random.randn(2 * D_a, D_a) / np.sqrt(2 * D_a)).astype(N_T)
+            b_tin = np.random.randn(D_a).astype(np.float32)
+            W_tout = (np.random.randn(D_a, D_a) / np.sqrt(D_a)).astype(N_T)
+            b_tout = np.random.randn(D_a).astype(np.float32)
+            out = np.zeros((L_a, D_a), dtype=np.float32)
+            s_llvm(a_emb, t, time_freq, W_tin, b_tin, W_tout, b_tout, out)
+            ref = action_time_mlp_np(a_emb, t, time_freq, W_tin, b_tin, W_tout, b_tout)
+            print(f"max |diff| vs numpy: {np.abs(out - ref).max():.3e}")
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    print("\n=== action_time_mlp [50, 720], float32 ===")
+    schedule_action_time_mlp(np.float32, float32, mode="csyn")
+
+    # schedule_action_time_mlp(np.float32, float32, L_a=5, D_a=16, t=0.3, mode="llvm")
@@ -4,6 +4,9 @@
 class CrossAttentionConfig:
     LENGTH_OF_ACTION_CHUNK = 50          # aka chunk_size / n_action_steps = 50
     NUM_STEPS             = 10           # flow-matching solver steps
+    ACTION_DIM            = 32           # action_in_proj / action_out_proj width
+    NUM_EXPERT_LAYERS     = 16
+    SELF_ATTN_EVERY_N_LAYERS = 2         # other expert layers cross-attend to the prefix only
 
 
     EXPERT_WIDTH_MULT     = 0.75         # action expert width vs VLM width
@@ -17,6 +20,7 @@ class CrossAttentionConfig:
     HEAD_DIM              = 80           # so 960=12*80 and 320=4*80
     O_PROJ_IN_DIM         = 960
     O_PROJ_OUT_DIM        = 720
+    INTERMEDIATE_DIM      = 2048         # gate_proj / up_proj width
 
     # text & observation packing (defaults on the hub)
     TOKENIZER_MAX_LENGTH  = 48
@@ -38,3 +42,12 @@ class VLMAttentionConfig:
 
 
 
+class VLMBackboneConfig:
+    # SmolLM2 text backbone (vlm.text_model)
+    NUM_LAYERS            = 16
+    HIDDEN_DIM            = 960
+    NUM_Q_HEADS           = 15
+    NUM_KV_HEADS          = 5            # GQA: 3 Q heads share each KV head
+    HEAD_DIM              = 64           # 960 = 15*64, KV dim = 5*64 = 320
+    INTERMEDIATE_DIM      = 2560         # gate_proj / up_proj width
+    NUM_TOKENS            = CrossAttentionConfig.DEFAULT_Tf  # prefix: images + text + state
@@ -0,0 +1,127 @@
+"""
+Numpy reference attention masks for the SmolVLA token layout.
+
+SmolVLA builds its 2D mask from per-token att flags (make_att_2d_masks):
+
+    seg = cumsum(att_flags)
+    mask[i, j] = seg[j] <= seg[i]
+
+A flag of 0 joins the previous block (bidirectional within it), a flag of 1
+starts a new block that only sees itself and earlier blocks. Flags per token:
+
+    prefix (DEFAULT_Tf):  images 0..., text 0..., state 1
+    suffix (actions):     1, 0, 0, ... (one block over the action chunk)
+
+An all-ones flag vector gives a plain causal mask.
+
+block_mask_descriptor reduces the [L, L] mask to one code per
+(P-row batch, B_c-column tile) for sdpa.sdpa_block_masked.
+"""
+
+import numpy as np
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from attention.config import CrossAttentionConfig as CAC
+
+# Tile codes for block_mask_descriptor
+TILE_SKIP = 0      # every (i, j) in the tile is masked
+TILE_FULL = 1      # every (i, j) in the tile is visible
+TILE_PARTIAL = 2   # mixed, the kernel checks segment ids per element
+
+# Segment id given to padding tokens: never visible to real rows
+PAD_SEGMENT = np.iinfo(np.int16).max
+
+
+def smolvla_att_flags(config=CAC, include_actions: bool = True):
+    """
+    Att flags for images + text + state (DEFAULT_Tf tokens), optionally
+    followed by the action chunk.
+    """
+    num_images = config.VIS_TOKENS_PER_FRAME * config.NUM_CAMERAS * config.N_OBS_STEPS
+    flags = [0] * num_images
+    flags += [0] * config.TOKENIZER_MAX_LENGTH
+    flags += [1] * config.STATE_TOKEN_COUNT
+    if include_actions:
+        flags += [1] + [0] * (config.LENGTH_OF_ACTION_CHUNK - 1)
+    return np.array(flags, dtype=np.int32)
+
+
+def causal_att_flags(L: int):
+    """Att flags for a fully causal sequence of L tokens."""
+    return np.ones(L, dtype=np.int32)
+
+
+def segment_ids(att_flags, pad_to: int = None):
+    """
+    Cumulative segment id per token. If pad_to is given, pad the sequence
+    with PAD_SEGMENT tokens up to that length (masked for every real row).
+    """
+    seg = np.cumsum(att_flags).astype(np.int16)
+    if pad_to is not None and pad_to > len(seg):
+        seg = np.concatenate([seg, np.full(pad_to - len(seg), PAD_SEGMENT, dtype=np.int16)])
+    return seg
+
+
+def make_att_2d_mask(seg):
+    """Boolean [L, L] mask, True where query i may attend to key j."""
+    return seg[None, :] <= seg[:, None]
+
+
+def block_mask_descriptor(mask, P: int, B_c: int):
+    """
+    Tile codes [L // P, L // B_c] (int8) for a boolean [L, L] mask.
+    L must be divisible by both P and B_c.
+    """
+    L = mask.shape[0]
+    assert L % P == 0 and L % B_c == 0, f"L={L} must be divisible by P={P} and B_c={B_c}"
+    tiles = mask.reshape(L // P, P, L // B_c, B_c)
+    visible = tiles.sum(axis=(1, 3))
+    desc = np.full(visible.shape, TILE_PARTIAL, dtype=np.int8)
+    desc[visible == 0] = TILE_SKIP
+    desc[visible == P * B_c] = TILE_FULL
+    return desc
+
+
+def smolvla_block_mask(P: int, B_c: int, config=CAC, include_actions: bool = True):
+    """
+    Segment ids, 2D mask and tile descriptor for the SmolVLA layout, padded
+    to a multiple of lcm(P, B_c).
+
+    Returns (seg, mask, desc, L_pad).
+    """
+    flags = smolvla_att_flags(config, include_actions)
+    step = np.lcm(P, B_c)
+    L_pad = int(-(-len(flags) // step) * step)
+    seg = segment_ids(flags, pad_to=L_pad)
+    mask = make_att_2d_mask(seg)
+    return seg, mask, block_mask_descriptor(mask, P, B_c), L_pad
+
+
+def skipped_fraction(desc):
+    """Fraction of score tiles the masked kernel does not compute."""
+    return float(np.mean(desc == TILE_SKIP))
+
+
+def masked_sdpa_np(Q, K, V, mask, scale):
+    """
+    Float reference: softmax((Q @ K^T) / scale with masked entries at -inf) @ V.
+    Every row must have at least one visible key.
+    """
+    B = (Q.astype(np.float64) @ K.astype(np.float64).T) / scale
+    B = np.where(mask, B, -np.inf)
+    B = B - B.max(axis=-1, keepdims=True)
+    weights = np.exp(B)
+    weights = weights / weights.sum(axis=-1, keepdims=True)
+    return weights @ V.astype(np.float64)
+
+
+if __name__ == "__main__":
+    for P, B_c in [(8, 32), (8, 64)]:
+        seg, mask, desc, L_pad = smolvla_block_mask(P, B_c)
+        print(f"SmolVLA prefix+actions, P={P}, B_c={B_c}: L_pad={L_pad}, "
+              f"skipped tiles {skipped_fraction(desc):.1%}")
+
+    L = 256
+    desc = block_mask_descriptor(make_att_2d_mask(segment_ids(causal_att_flags(L))), 8, 32)
+    print(f"Causal L={L}, P=8, B_c=32: skipped tiles {skipped_fraction(desc):.1%}")
@@ -6,6 +6,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 from matrix_multiplies import mm_transpose, mm1, mm_transpose_return, mm1_return
 from attention.self_attention.softmax import softmax_baseline, softmax_return
+from common_kernels.softmax import softmax_int_lut
 
 
 def numpy_softmax(x, axis=-1):
@@ -296,11 +297,15 @@ def sdpa_streaming_8row[
 
         # ===== Stage 3: Normalize and scale softmax rows =====
         # P is outer, j3 is inner (pipelined)
+        # A weight of exactly 1.0 is 32768, one past int16: saturate to Q15
         softmax_scale: "float32" = 32768.0
         for p3 in allo.grid(P, name="norm_p"):
             for j3 in allo.grid(L, name="norm_j"):
                 norm_val: "float32" = softmax_rows[p3, j3] / sum_exps[p3]
-                softmax_scaled: "int16" = norm_val * softmax_scale
+                q15_val: "float32" = norm_val * softmax_scale
+                if q15_val > 32767.0:
+                    q15_val = 32767.0
+                softmax_scaled: "int16" = q15_val
                 softmax_rows_int[p3, j3] = softmax_scaled
                 
         # ===== Stage 4: Initialize output accumulators =====
@@ -326,6 +331,400 @@ def sdpa_streaming_8row[
                 out[i_out, d2] = out_val
 
 
+def sdpa_streaming_8row_lut[
+    T: (bfloat16, float32, int4, int8),
+    L: int16,
+    D_h: int16,
+    P: int16,  # Row parallelism factor (8)
+    E: int16,  # exp_lut entries
+    R: int16   # recip_lut entries
+](
+    Q: "T[L, D_h]",
+    K: "T[L, D_h]",
+    V: "T[L, D_h]",
+    exp_lut: "int32[E]",
+    recip_lut: "int32[R]",
+    log2e_scale: "int32",   # make_log2e_scale(scale), replaces the float scale
+    out: "T[L, D_h]"
+):
+    """
+    sdpa_streaming_8row with the float exp/divide stages replaced by the
+    integer LUT softmax from common_kernels/softmax.py.
+
+    Scores stay int32 from Q @ K^T through softmax; softmax_int_lut writes the
+    same Q15 int16 rows that stage 3 of sdpa_streaming_8row produces, so the
+    integer softmax @ V and >> 15 rescale are unchanged.
+    """
+    for i_outer in allo.grid(L // P, name="row_outer"):
+        attn_rows: "int32[P, L]"         # P rows of raw integer scores
+        softmax_rows_int: "int16[P, L]"  # Q15 softmax rows
+        acc_out: "int32[P, D_h]"         # Output accumulators for P rows
+
+        # ===== Stage 1: Compute P rows of Q @ K^T =====
+        for p in allo.grid(P, name="mm_p"):
+            i: "int16" = i_outer * P + p
+            for j1 in allo.grid(L, name="mm_j"):
+                acc: "int32" = 0
+                for k1 in allo.grid(D_h, name="mm_k"):
+                    q_val: "int32" = Q[i, k1]
+                    k_val: "int32" = K[j1, k1]
+                    acc += q_val * k_val
+                attn_rows[p, j1] = acc
+
+        # ===== Stage 2: Integer LUT softmax =====
+        softmax_int_lut[P, L, E, R, "softmax_lut"](attn_rows, exp_lut, recip_lut, log2e_scale, softmax_rows_int)
+
+        # ===== Stage 3: Initialize output accumulators =====
+        for p_init in allo.grid(P, name="init_p"):
+            for d_init in allo.grid(D_h, name="init_d"):
+                acc_out[p_init, d_init] = 0
+
+        # ===== Stage 4: Compute output rows with integer arithmetic =====
+        for p4 in allo.grid(P, name="out_p"):
+            for j4 in allo.grid(L, name="out_j"):
+                s_val: "int32" = softmax_rows_int[p4, j4]
+                for d in allo.grid(D_h, name="out_d"):
+                    v_val: "int32" = V[j4, d]
+                    acc_out[p4, d] += s_val * v_val
+
+        # ===== Stage 5: Write outputs - rescale from fixed-point =====
+        for p5 in allo.grid(P, name="write_p"):
+            i_out: "int16" = i_outer * P + p5
+            for d2 in allo.grid(D_h, name="write_d"):
+                rescaled: "int32" = acc_out[p5, d2] >> 15
+                out_val: T = rescaled
+                out[i_out, d2] = out_val
+
+
+def sdpa_streaming_flash[
+    T: (bfloat16, float32, int4, int8),
+    L: int16,
+    D_h: int16,
+    P: int16,   # Row parallelism factor (8)
+    B_c: int16  # K/V tile size (columns of Q @ K^T per tile)
+](
+    Q: "T[L, D_h]",
+    K: "T[L, D_h]",
+    V: "T[L, D_h]",
+    scale: "float32",
+    out: "T[L, D_h]"
+):
+    """
+    Tiled online-softmax (flash-style) SDPA.
+
+    sdpa_streaming_8row keeps full [P, L] score/softmax rows on chip, so its
+    BRAM grows linearly with L. Here K/V are streamed in tiles of B_c rows and
+    each of the P query rows keeps a running max m, a running sum l and a
+    float accumulator acc[D_h]. When a tile raises the row max, the previous
+    sum and accumulator are rescaled by exp(m_old - m_new):
+
+        m_new = max(m_old, max_j s_j)
+        l     = l * exp(m_old - m_new) + sum_j exp(s_j - m_new)
+        acc   = acc * exp(m_old - m_new) + sum_j exp(s_j - m_new) * V[j, :]
+        out   = acc / l
+
+    On-chip storage is O(P * (B_c + D_h) + B_c * D_h), independent of L.
+    For L=2048, D_h=64, P=8, B_c=64 (int8): ~12KB vs ~160KB of row buffers
+    for sdpa_streaming_8row.
+
+    Structure:
+    - Outer loop: L//P row batches
+    - Tile loop: L//B_c K/V tiles, each loaded once and shared by all P rows
+    - Inner loops: scores -> tile max -> rescale -> exp/sum -> P @ V
+    """
+    for i_outer in allo.grid(L // P, name="row_outer"):
+        max_vals: "float32[P]"          # Running max per row
+        sum_exps: "float32[P]"          # Running sum of exp per row
+        acc_out: "float32[P, D_h]"      # Running (unnormalized) output rows
+
+        for p_init in allo.grid(P, name="init_p"):
+            max_vals[p_init] = -1.0 / 0.0
+            sum_exps[p_init] = 0.0
+            for d_init in allo.grid(D_h, name="init_d"):
+                acc_out[p_init, d_init] = 0.0
+
+        for t in allo.grid(L // B_c, name="kv_tile"):
+            # Tile buffers - only B_c rows of K/V live on chip at a time
+            K_tile: "T[B_c, D_h]"
+            V_tile: "T[B_c, D_h]"
+            scores: "float32[P, B_c]"
+            tile_max: "float32[P]"
+            correction: "float32[P]"
+
+            # ===== Stage 1: Load K/V tile =====
+            for jl in allo.grid(B_c, name="load_j"):
+                for dl in allo.grid(D_h, name="load_d"):
+                    K_tile[jl, dl] = K[t * B_c + jl, dl]
+                    V_tile[jl, dl] = V[t * B_c + jl, dl]
+
+            # ===== Stage 2: Scores for P rows against this tile =====
+            for p in allo.grid(P, name="mm_p"):
+                i: "int16" = i_outer * P + p
+                tile_max[p] = max_vals[p]
+                for j1 in allo.grid(B_c, name="mm_j"):
+                    acc: "int32" = 0
+                    for k1 in allo.grid(D_h, name="mm_k"):
+                        q_val: "int32" = Q[i, k1]
+                        k_val: "int32" = K_tile[j1, k1]
+                        acc += q_val * k_val
+                    acc_float: "float32" = acc
+                    acc_float = acc_float / scale
+                    if acc_float > tile_max[p]:
+                        tile_max[p] = acc_float
+                    scores[p, j1] = acc_float
+
+            # ===== Stage 3: Rescale running state to the new max =====
+            for p2 in allo.grid(P, name="rescale_p"):
+                correction[p2] = allo.exp(max_vals[p2] - tile_max[p2])
+                max_vals[p2] = tile_max[p2]
+                sum_exps[p2] = sum_exps[p2] * correction[p2]
+                for d2 in allo.grid(D_h, name="rescale_d"):
+                    acc_out[p2, d2] = acc_out[p2, d2] * correction[p2]
+
+            # ===== Stage 4: Exp and running sum =====
+            # P is innermost so each row's fadd chain is independent
+            for j3 in allo.grid(B_c, name="exp_j"):
+                for p3 in allo.grid(P, name="exp_p"):
+                    exp_val: "float32" = allo.exp(scores[p3, j3] - max_vals[p3])
+                    scores[p3, j3] = exp_val
+                    sum_exps[p3] += exp_val
+
+            # ===== Stage 5: Accumulate exp(scores) @ V_tile =====
+            for p4 in allo.grid(P, name="out_p"):
+                for j4 in allo.grid(B_c, name="out_j"):
+                    s_val: "float32" = scores[p4, j4]
+                    for d4 in allo.grid(D_h, name="out_d"):
+                        v_val: "float32" = V_tile[j4, d4]
+                        acc_out[p4, d4] += s_val * v_val
+
+        # ===== Stage 6: Normalize by the final running sum and write =====
+        for p5 in allo.grid(P, name="write_p"):
+            i_out: "int16" = i_outer * P + p5
+            inv_sum: "float32" = 1.0 / sum_exps[p5]
+            for d5 in allo.grid(D_h, name="write_d"):
+                out_val: T = acc_out[p5, d5] * inv_sum
+                out[i_out, d5] = out_val
+
+
+def sdpa_block_masked[
+    T: (bfloat16, float32, int4, int8),
+    L: int16,
+    D_h: int16,
+    P: int16,   # Row parallelism factor (8)
+    B_c: int16  # K/V tile size
+](
+    Q: "T[L, D_h]",
+    K: "T[L, D_h]",
+    V: "T[L, D_h]",
+    tile_mask: "int8[L // P, L // B_c]",  # 0 = skip, 1 = full, 2 = partial
+    seg: "int16[L]",                      # Segment id per token
+    scale: "float32",
+    out: "T[L, D_h]"
+):
+    """
+    Block-sparse masked SDPA on top of the sdpa_streaming_flash tile loop.
+
+    tile_mask and seg come from attention_masks.py (block_mask_descriptor,
+    segment_ids). Query i may attend to key j iff seg[j] <= seg[i], which
+    covers SmolVLA's prefix/state/action layout and plain causal masks.
+
+    - Skip tiles (0): no K/V load, no Q @ K^T, no exp, no P @ V
+    - Full tiles (1): same work as sdpa_streaming_flash
+    - Partial tiles (2): masked scores are set to -inf before the running max
+
+    Assumes segment ids are non-decreasing (true for cumsum of att flags), so
+    every row sees key 0 and the first tile of each row batch is never skipped.
+    For a causal mask about half of the tiles are skipped.
+    """
+    for i_outer in allo.grid(L // P, name="row_outer"):
+        max_vals: "float32[P]"          # Running max per row
+        sum_exps: "float32[P]"          # Running sum of exp per row
+        acc_out: "float32[P, D_h]"      # Running (unnormalized) output rows
+
+        for p_init in allo.grid(P, name="init_p"):
+            max_vals[p_init] = -1.0 / 0.0
+            sum_exps[p_init] = 0.0
+            for d_init in allo.grid(D_h, name="init_d"):
+                acc_out[p_init, d_init] = 0.0
+
+        for t in allo.grid(L // B_c, name="kv_tile"):
+            tile_code: "int8" = tile_mask[i_outer, t]
+            if tile_code != 0:
+                K_tile: "T[B_c, D_h]"
+                V_tile: "T[B_c, D_h]"
+                scores: "float32[P, B_c]"
+                tile_max: "float32[P]"
+                correction: "float32[P]"
+
+                # ===== Stage 1: Load K/V tile =====
+                for jl in allo.grid(B_c, name="load_j"):
+                    for dl in allo.grid(D_h, name="load_d"):
+                        K_tile[jl, dl] = K[t * B_c + jl, dl]
+                        V_tile[jl, dl] = V[t * B_c + jl, dl]
+
+                # ===== Stage 2: Scores, masked elements set to -inf =====
+                for p in allo.grid(P, name="mm_p"):
+                    i: "int16" = i_outer * P + p
+                    seg_i: "int16" = seg[i]
+                    tile_max[p] = max_vals[p]
+                    for j1 in allo.grid(B_c, name="mm_j"):
+                        acc: "int32" = 0
+                        for k1 in allo.grid(D_h, name="mm_k"):
+                            q_val: "int32" = Q[i, k1]
+                            k_val: "int32" = K_tile[j1, k1]
+                            acc += q_val * k_val
+                        acc_float: "float32" = acc
+                        acc_float = acc_float / scale
+                        if tile_code == 2 and seg[t * B_c + j1] > seg_i:
+                            acc_float = -1.0 / 0.0
+                        if acc_float > tile_max[p]:
+                            tile_max[p] = acc_float
+                        scores[p, j1] = acc_float
+
+                # ===== Stage 3: Rescale running state to the new max =====
+                for p2 in allo.grid(P, name="rescale_p"):
+                    correction[p2] = allo.exp(max_vals[p2] - tile_max[p2])
+                    max_vals[p2] = tile_max[p2]
+                    sum_exps[p2] = sum_exps[p2] * correction[p2]
+                    for d2 in allo.grid(D_h, name="rescale_d"):
+                        acc_out[p2, d2] = acc_out[p2, d2] * correction[p2]
+
+                # ===== Stage 4: Exp and running sum (exp(-inf) = 0) =====
+                for j3 in allo.grid(B_c, name="exp_j"):
+                    for p3 in allo.grid(P, name="exp_p"):
+                        exp_val: "float32" = allo.exp(scores[p3, j3] - max_vals[p3])
+                        scores[p3, j3] = exp_val
+                        sum_exps[p3] += exp_val
+
+                # ===== Stage 5: Accumulate exp(scores) @ V_tile =====
+                for p4 in allo.grid(P, name="out_p"):
+                    for j4 in allo.grid(B_c, name="out_j"):
+                        s_val: "float32" = scores[p4, j4]
+                        for d4 in allo.grid(D_h, name="out_d"):
+                            v_val: "float32" = V_tile[j4, d4]
+                            acc_out[p4, d4] += s_val * v_val
+
+        # ===== Stage 6: Normalize by the final running sum and write =====
+        for p5 in allo.grid(P, name="write_p"):
+            i_out: "int16" = i_outer * P + p5
+            inv_sum: "float32" = 1.0 / sum_exps[p5]
+            for d5 in allo.grid(D_h, name="write_d"):
+                out_val: T = acc_out[p5, d5] * inv_sum
+                out[i_out, d5] = out_val
+
+
+def sdpa_gqa[
+    T: (bfloat16, float32, int4, int8),
+    L_q: int16,    # Number of query tokens
+    L_kv: int16,   # Number of key/value tokens
+    D_h: int16,    # Head dimension
+    H_q: int16,    # Number of query heads (NUM_Q_HEADS)
+    H_kv: int16,   # Number of key/value heads (NUM_KV_HEADS)
+    P: int16       # Row parallelism factor
+](
+    Q: "T[H_q, L_q, D_h]",
+    K: "T[H_kv, L_kv, D_h]",
+    V: "T[H_kv, L_kv, D_h]",
+    scale: "float32",
+    out: "T[H_q, L_q, D_h]"
+):
+    """
+    Grouped-query attention with P-row streaming softmax.
+
+    Query head h attends with KV head h // G, where G = H_q // H_kv
+    (same grouping as HuggingFace repeat_kv). Each KV head is loaded into a
+    local K/V buffer once and every K/V row read is applied to all G query
+    heads of its group, so K/V traffic and buffering drop by G compared to
+    running sdpa_streaming_8row once per query head.
+
+    Backbone (SmolLM2):  H_q=15, H_kv=5, D_h=64 -> G=3
+    Action expert:       H_q=12, H_kv=4, D_h=80 -> G=3
+
+    Structure:
+    - kv_head: H_kv iterations, load K/V of this head once
+    - row_outer: L_q//P batches of P rows, for all G query heads together
+    - Inner loops: same stages as sdpa_streaming_8row with rows = (G, P)
+    """
+    for g in allo.grid(H_kv, name="kv_head"):
+        # ===== Stage 0: Load this KV head once for the whole query group =====
+        K_local: "T[L_kv, D_h]"
+        V_local: "T[L_kv, D_h]"
+        for jl in allo.grid(L_kv, name="load_j"):
+            for dl in allo.grid(D_h, name="load_d"):
+                K_local[jl, dl] = K[g, jl, dl]
+                V_local[jl, dl] = V[g, jl, dl]
+
+        for i_outer in allo.grid(L_q // P, name="row_outer"):
+            # Row buffers for the G query heads x P rows of this batch
+            attn_rows: "float32[H_q // H_kv, P, L_kv]"
+            softmax_rows_int: "int16[H_q // H_kv, P, L_kv]"
+            max_vals: "float32[H_q // H_kv, P]"
+            sum_exps: "float32[H_q // H_kv, P]"
+            acc_out: "int32[H_q // H_kv, P, D_h]"
+
+            for q_init in allo.grid(H_q // H_kv, name="init_q"):
+                for p_init in allo.grid(P, name="init_p"):
+                    max_vals[q_init, p_init] = -1.0 / 0.0
+                    sum_exps[q_init, p_init] = 0.0
+                    for d_init in allo.grid(D_h, name="init_d"):
+                        acc_out[q_init, p_init, d_init] = 0
+
+            # ===== Stage 1: Q @ K^T - each K row is shared by G*P query rows =====
+            for j1 in allo.grid(L_kv, name="mm_j"):
+                for q1 in allo.grid(H_q // H_kv, name="mm_q"):
+                    for p1 in allo.grid(P, name="mm_p"):
+                        h: "int16" = g * (H_q // H_kv) + q1
+                        i: "int16" = i_outer * P + p1
+                        acc: "int32" = 0
+                        for k1 in allo.grid(D_h, name="mm_k"):
+                            q_val: "int32" = Q[h, i, k1]
+                            k_val: "int32" = K_local[j1, k1]
+                            acc += q_val * k_val
+                        acc_float: "float32" = acc
+                        acc_float = acc_float / scale
+                        if acc_float > max_vals[q1, p1]:
+                            max_vals[q1, p1] = acc_float
+                        attn_rows[q1, p1, j1] = acc_float
+
+            # ===== Stage 2: Exp and sum =====
+            for j2 in allo.grid(L_kv, name="exp_j"):
+                for q2 in allo.grid(H_q // H_kv, name="exp_q"):
+                    for p2 in allo.grid(P, name="exp_p"):
+                        exp_val: "float32" = allo.exp(attn_rows[q2, p2, j2] - max_vals[q2, p2])
+                        attn_rows[q2, p2, j2] = exp_val
+                        sum_exps[q2, p2] += exp_val
+
+            # ===== Stage 3: Normalize and scale softmax rows =====
+            # A weight of exactly 1.0 is 32768, one past int16: saturate to Q15
+            softmax_scale: "float32" = 32768.0
+            for q3 in allo.grid(H_q // H_kv, name="norm_q"):
+                for p3 in allo.grid(P, name="norm_p"):
+                    for j3 in allo.grid(L_kv, name="norm_j"):
+                        norm_val: "float32" = attn_rows[q3, p3, j3] / sum_exps[q3, p3]
+                        q15_val: "float32" = norm_val * softmax_scale
+                        if q15_val > 32767.0:
+                            q15_val = 32767.0
+                        softmax_scaled: "int16" = q15_val
+                        softmax_rows_int[q3, p3, j3] = softmax_scaled
+
+            # ===== Stage 4: softmax @ V - each V row is shared by G*P rows =====
+            for j4 in allo.grid(L_kv, name="out_j"):
+                for q4 in allo.grid(H_q // H_kv, name="out_q"):
+                    for p4 in allo.grid(P, name="out_p"):
+                        s_val: "int32" = softmax_rows_int[q4, p4, j4]
+                        for d in allo.grid(D_h, name="out_d"):
+                            v_val: "int32" = V_local[j4, d]
+                            acc_out[q4, p4, d] += s_val * v_val
+
+            # ===== Stage 5: Write outputs - rescale from fixed-point =====
+            for q5 in allo.grid(H_q // H_kv, name="write_q"):
+                for p5 in allo.grid(P, name="write_p"):
+                    h_out: "int16" = g * (H_q // H_kv) + q5
+                    i_out: "int16" = i_outer * P + p5
+                    for d2 in allo.grid(D_h, name="write_d"):
+                        rescaled: "int32" = acc_out[q5, p5, d2] >> 15
+                        out_val: T = rescaled
+                        out[h_out, i_out, d2] = out_val
 
 
 def self_attention[
@@ -398,6 +797,169 @@ def self_attention[
 
 
 
+def self_attention_fused_epilogue[
+    T: (int4, int8),
+    L: int16,    # Number of tokens
+    D: int16,    # Embedding length
+    H: int16,    # Number of heads
+    D_h: int16,  # Head embedding length
+    P: int16     # Row parallelism factor
+](
+    X:     "T[L, D]",
+    W_q:   "T[H, D_h, D]",
+    W_k:   "T[H, D_h, D]",
+    W_v:   "T[H, D_h, D]",
+    W_o:   "T[H, D_h, D]",
+    gamma: "T[D]",
+    beta:  "T[D]",
+    scale: "float32",
+    out:   "T[L, D]"
+):
+    """
+    Multi-head self-attention with a fused W_o + residual + LayerNorm epilogue.
+
+    self_attention / self_attention_and_mlp stop at the SDPA output, so a full
+    encoder layer writes [L, D] to memory and reads it back for W_o and for
+    LayerNorm. Here the attention output stays on chip until LayerNorm.
+
+    Heads are streamed: only the current head's K/V [L, D_h] is on chip, and
+    Q is projected per P-row block, so the QKV working set is 1/H of the full
+    [H, L, D_h] tensors:
+
+    - Per head: project K_h / V_h, then for each P-row block project Q,
+      run P-row streaming SDPA (same stages as sdpa_streaming_8row, Q15
+      weights clamped to 32767) and add acc_out >> 15 @ W_o[h] into o_acc
+    - After the last head: o_acc + X (residual), then LayerNorm per row
+
+    o_acc [L, D] is the only full-size buffer; it holds the W_o sum over heads
+    that LayerNorm needs, and is never written to memory.
+
+    The scores, softmax @ V and W_o sums are int64, as in the reference: at
+    D = 768 with int8 operands each of them exceeds the int32 range.
+
+    LayerNorm follows self_attention.layer_norm (biased variance, eps 1e-8,
+    float gamma/beta affine, truncation to T). Row sums are accumulated in
+    float32 because the projected values overflow an int32 sum of squares.
+    """
+    o_acc: "int64[L, D]" = 0   # W_o accumulator over heads, stays on chip
+
+    for h in allo.grid(H, name="head_loop"):
+        # ===== K/V projection for this head =====
+        K_h: "int32[L, D_h]"
+        V_h: "int32[L, D_h]"
+        for i_kv in allo.grid(L, name="kv_i"):
+            for k_kv in allo.reduction(D, name="kv_k"):
+                x_kv: "int32" = X[i_kv, k_kv]
+                for j_kv in allo.grid(D_h, name="kv_j"):
+                    K_h[i_kv, j_kv] = (0 if k_kv == 0 else K_h[i_kv, j_kv]) + x_kv * W_k[h, j_kv, k_kv]
+                    V_h[i_kv, j_kv] = (0 if k_kv == 0 else V_h[i_kv, j_kv]) + x_kv * W_v[h, j_kv, k_kv]
+
+        for i_outer in allo.grid(L // P, name="row_outer"):
+            attn_rows: "float32[P, L]"
+            max_vals: "float32[P]"
+            sum_exps: "float32[P]"
+            softmax_rows_int: "int16[P, L]"
+            acc_out: "int64[P, D_h]"
+
+            # ===== Q projection for this block =====
+            Q_blk: "int32[P, D_h]"
+            for p_q in allo.grid(P, name="q_p"):
+                for k_q in allo.reduction(D, name="q_k"):
+                    x_q: "int32" = X[i_outer * P + p_q, k_q]
+                    for j_q in allo.grid(D_h, name="q_j"):
+                        Q_blk[p_q, j_q] = (0 if k_q == 0 else Q_blk[p_q, j_q]) + x_q * W_q[h, j_q, k_q]
+
+            # ===== Stage 1: Scores =====
+            for p in allo.grid(P, name="mm_p"):
+                max_vals[p] = -1.0 / 0.0
+                for j1 in allo.grid(L, name="mm_j"):
+                    acc: "int64" = 0
+                    for k1 in allo.reduction(D_h, name="mm_k"):
+                        q_val: "int64" = Q_blk[p, k1]
+                        acc += q_val * K_h[j1, k1]
+                    acc_float: "float32" = acc
+                    acc_float = acc_float / scale
+                    if acc_float > max_vals[p]:
+                        max_vals[p] = acc_float
+                    attn_rows[p, j1] = acc_float
+
+            # ===== Stage 2: Exp and sum =====
+            for p_init in allo.grid(P, name="init_sum"):
+                sum_exps[p_init] = 0.0
+            for j2 in allo.grid(L, name="exp_j"):
+                for p2 in allo.grid(P, name="exp_p"):
+                    exp_val: "float32" = allo.exp(attn_rows[p2, j2] - max_vals[p2])
+                    attn_rows[p2, j2] = exp_val
+                    sum_exps[p2] += exp_val
+
+            # ===== Stage 3: Normalize to Q15 =====
+            for p3 in allo.grid(P, name="norm_p"):
+                for j3 in allo.grid(L, name="norm_j"):
+                    norm_val: "float32" = attn_rows[p3, j3] / sum_exps[p3]
+                    q15_val: "float32" = norm_val * 32768.0
+                    if q15_val > 32767.0:
+                        q15_val = 32767.0
+                    softmax_scaled: "int16" = q15_val
+                    softmax_rows_int[p3, j3] = softmax_scaled
+
+            # ===== Stage 4: softmax @ V =====
+            for p4 in allo.grid(P, name="out_p"):
+                for d_init in allo.grid(D_h, name="out_init"):
+                    acc_out[p4, d_init] = 0
+                for j4 in allo.grid(L, name="out_j"):
+                    s_val: "int64" = softmax_rows_int[p4, j4]
+                    for d4 in allo.grid(D_h, name="out_d"):
+                        acc_out[p4, d4] += s_val * V_h[j4, d4]
+
+            # ===== Stage 5: Output projection, accumulated over heads =====
+            for k5 in allo.reduction(D_h, name="oproj_k"):
+                for n5 in allo.grid(D, name="oproj_n"):
+                    weight: "int32" = W_o[h, k5, n5]
+                    for p5 in allo.grid(P, name="oproj_p"):
+                        attn_val: "int64" = acc_out[p5, k5] >> 15
+                        o_acc[i_outer * P + p5, n5] += attn_val * weight
+
+    # ===== Stage 6: Residual and LayerNorm =====
+    for i_row in allo.grid(L, name="ln_row"):
+        total: "float32" = 0.0
+        total_sq: "float32" = 0.0
+        for n6 in allo.grid(D, name="ln_sum"):
+            res_val: "int64" = o_acc[i_row, n6] + X[i_row, n6]
+            o_acc[i_row, n6] = res_val
+            res_float: "float32" = res_val
+            total += res_float
+            total_sq += res_float * res_float
+        mean: "float32" = total / D
+        variance: "float32" = (total_sq / D) - (mean * mean)
+        inv_std: "float32" = 1.0 / allo.sqrt(variance + 1e-8)
+        for n7 in allo.grid(D, name="ln_out"):
+            ln_val: "float32" = (o_acc[i_row, n7] - mean) * inv_std
+            shifted: "float32" = ln_val * gamma[n7] + beta[n7]
+            out_val: T = shifted
+            out[i_row, n7] = out_val
+
+
+def self_attention_fused_epilogue_np(X, W_q, W_k, W_v, W_o, gamma, beta, scale):
+    """Numpy reference for self_attention_fused_epilogue (same integer steps)."""
+    X64 = X.astype(np.int64)
+    H = W_q.shape[0]
+    o_acc = np.zeros(X.shape, dtype=np.int64)
+    for h in range(H):
+        Q = X64 @ W_q[h].astype(np.int64).T
+        K = X64 @ W_k[h].astype(np.int64).T
+        V = X64 @ W_v[h].astype(np.int64).T
+        scores = (Q @ K.T).astype(np.float64) / scale
+        weights = numpy_softmax(scores, axis=-1)
+        weights_q15 = np.minimum(np.trunc(weights * 32768.0), 32767).astype(np.int64)
+        attn = (weights_q15 @ V) >> 15
+        o_acc += attn @ W_o[h].astype(np.int64)
+    res = (o_acc + X64).astype(np.float64)
+    mean = res.mean(axis=-1, keepdims=True)
+    var = (res * res).mean(axis=-1, keepdims=True) - mean * mean
+    norm = (res - mean) / np.sqrt(var + 1e-8)
+    return np.trunc(norm * gamma + beta)
+
+
 def self_attention_and_mlp[
     T: (bfloat16, float32, int4, int8),
     L: int16,
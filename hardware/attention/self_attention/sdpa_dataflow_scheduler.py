@@ -8,6 +8,9 @@ from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 from attention.config import VLMAttentionConfig as VAC
+from attention.config import CrossAttentionConfig as CAC
+from attention.self_attention.attention_masks import smolvla_block_mask, skipped_fraction
+from common_kernels.softmax import softmax_int_lut, make_exp_lut, make_recip_lut, make_log2e_scale
 
 # Test configuration
 L = 1024  # Sequence length
@@ -395,6 +398,9 @@ def schedule_sdpa_streaming_4row_parallel(
     N_T: np.dtype,
     A_T: allo.ir.types,
     P: int = 8,  # Row parallelism factor (8 to hide fadd latency ~7)
+    softmax_impl: str = "float",  # "float" (allo.exp / fdiv) or "lut" (integer LUT)
+    E: int = 256,  # exp_lut entries for softmax_impl="lut"
+    R: int = 256,  # recip_lut entries for softmax_impl="lut"
     mode: str = "csyn"
 ):
     """
@@ -411,8 +417,24 @@ def schedule_sdpa_streaming_4row_parallel(
     - Inner loops (j1, j2, j3, j4): pipelined, same as sdpa_streaming
     
     This matches the structure of sdpa_streaming but processes P rows per batch.
+
+    softmax_impl="lut" builds sdpa_streaming_8row_lut instead, with stages 2-3
+    replaced by common_kernels.softmax.softmax_int_lut (no float units).
     """
-    s = allo.customize(sdpa.sdpa_streaming_8row, instantiate=[A_T, L, D_h, P])
+    match softmax_impl:
+        case "float":
+            s = allo.customize(sdpa.sdpa_streaming_8row, instantiate=[A_T, L, D_h, P])
+        case "lut":
+            s = allo.customize(sdpa.sdpa_streaming_8row_lut, instantiate=[A_T, L, D_h, P, E, R])
+            s_lut = allo.customize(softmax_int_lut, instantiate=[P, L, E, R])
+            lut_loops = s_lut.get_loops()["lut_row"]
+            s_lut.pipeline(lut_loops["j0"])
+            s_lut.pipeline(lut_loops["j1"])
+            s_lut.unroll(lut_loops["b"])
+            s_lut.pipeline(lut_loops["j2"])
+            s.compose(s_lut, id="softmax_lut")
+        case _:
+            raise ValueError(f"Unknown softmax_impl: {softmax_impl}")
     
     loops = s.get_loops()
     outer_loop = loops["row_outer"]    
@@ -425,15 +447,17 @@ def schedule_sdpa_streaming_4row_parallel(
 
     s.pipeline(outer_loop["j1"])  # Pipeline inner tiled loop
     s.partition(s.acc_out, partition.Complete, dim=1)  
-    s.partition(s.max_vals, partition.Complete, dim=1)
     
-    # ===== Stage 2: Exp and sum =====
-    # Each row has its own sum_exp accumulator, so no cross-row dependency
-    s.pipeline(outer_loop["p2"])
-    
-    # ===== Stage 3: Normalize =====
-    # Pipeline j3 (inner loop over L elements)
-    s.pipeline(outer_loop["j3"])
+    if softmax_impl == "float":
+        s.partition(s.max_vals, partition.Complete, dim=1)
+
+        # ===== Stage 2: Exp and sum =====
+        # Each row has its own sum_exp accumulator, so no cross-row dependency
+        s.pipeline(outer_loop["p2"])
+
+        # ===== Stage 3: Normalize =====
+        # Pipeline j3 (inner loop over L elements)
+        s.pipeline(outer_loop["j3"])
     
     # ===== Stage 4: Output matmul =====
     # Pipeline j4 (inner loop over L softmax positions)
@@ -443,7 +467,7 @@ def schedule_sdpa_streaming_4row_parallel(
     # Pipeline d2 (inner loop over D_h)
     s.pipeline(outer_loop["d2"])
     dtype_str = "int4" if A_T == int4 else "int8"
-    project_name = f"sdpa_streaming_{P}row_parallel_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    project_name = f"sdpa_streaming_{P}row_parallel_{softmax_impl}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
     match mode:
         case "llvm":
             out = np.zeros((L, D_h), dtype=N_T)
@@ -451,6 +475,83 @@ def schedule_sdpa_streaming_4row_parallel(
             Q_quant = np.random.randint(-8, 8, (L, D_h)).astype(N_T)
             K_quant = np.random.randint(-8, 8, (L, D_h)).astype(N_T)
             V_quant = np.random.randint(-8, 8, (L, D_h)).astype(N_T)
+            if softmax_impl == "lut":
+                s_llvm(Q_quant, K_quant, V_quant, make_exp_lut(E), make_recip_lut(R),
+                       make_log2e_scale(scale), out)
+            else:
+                s_llvm(Q_quant, K_quant, V_quant, scale, out)
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+def schedule_sdpa_streaming_flash(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    P: int = 8,        # Row parallelism factor (8 to hide fadd latency ~7)
+    B_c: int = 64,     # K/V tile size
+    seq_len: int = L,  # Sequence length, e.g. 2048 for self_attention_hbm
+    mode: str = "csyn"
+):
+    """
+    Tiled online-softmax (flash-style) SDPA.
+
+    Same P-row batching as schedule_sdpa_streaming_4row_parallel, but K/V are
+    consumed in tiles of B_c rows with a running max/sum per row, so on-chip
+    buffers are sized by (P, B_c, D_h) only and seq_len can grow freely.
+
+    Loop structure:
+    - row_outer: seq_len//P row batches (dataflow)
+    - kv_tile: seq_len//B_c tiles, each tile loaded once for all P rows
+    - Inner loops (j1, j3, j4): pipelined
+    """
+    s = allo.customize(sdpa.sdpa_streaming_flash, instantiate=[A_T, seq_len, D_h, P, B_c])
+
+    loops = s.get_loops()
+    outer_loop = loops["row_outer"]
+    s.dataflow(outer_loop["i_outer"])  # Dataflow over outer row batches
+
+    loops = s.get_loops()
+    outer_loop = loops["row_outer"]
+
+    # ===== Stage 1: Tile load =====
+    s.pipeline(outer_loop["jl"])
+    s.partition(s.K_tile, partition.Complete, dim=2)
+    s.partition(s.V_tile, partition.Complete, dim=2)
+
+    # ===== Stage 2: Scores =====
+    s.pipeline(outer_loop["j1"])
+    s.partition(s.tile_max, partition.Complete, dim=1)
+
+    # ===== Stage 3: Rescale =====
+    s.pipeline(outer_loop["p2"])
+    s.partition(s.acc_out, partition.Complete, dim=2)
+    s.partition(s.max_vals, partition.Complete, dim=1)
+    s.partition(s.sum_exps, partition.Complete, dim=1)
+    s.partition(s.correction, partition.Complete, dim=1)
+
+    # ===== Stage 4: Exp and sum =====
+    # Each row has its own sum_exp accumulator, so no cross-row dependency
+    s.pipeline(outer_loop["p3"])
+    s.partition(s.scores, partition.Complete, dim=1)
+
+    # ===== Stage 5: exp(scores) @ V_tile =====
+    s.pipeline(outer_loop["j4"])
+
+    # ===== Stage 6: Write outputs =====
+    s.pipeline(outer_loop["d5"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"sdpa_streaming_flash_{P}row_{B_c}tile_L{seq_len}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            out = np.zeros((seq_len, D_h), dtype=N_T)
+            s_llvm = s.build(project=project_name)
+            Q_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
+            K_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
+            V_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
             s_llvm(Q_quant, K_quant, V_quant, scale, out)
             return out, s
         case "csyn":
@@ -459,6 +560,206 @@ def schedule_sdpa_streaming_4row_parallel(
             return s, s
 
 
+def schedule_sdpa_gqa(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    config=CAC,        # Any config exposing NUM_Q_HEADS / NUM_KV_HEADS / HEAD_DIM
+    L_q: int = CAC.LENGTH_OF_ACTION_CHUNK,
+    L_kv: int = CAC.LENGTH_OF_ACTION_CHUNK,
+    P: int = 5,        # Row parallelism factor (must divide L_q)
+    mode: str = "csyn"
+):
+    """
+    Grouped-query attention (sdpa.sdpa_gqa).
+
+    Head counts come from attention/config.py:
+    - CrossAttentionConfig (action expert): 12 Q heads, 4 KV heads, D_h=80
+    - VLMBackboneConfig (SmolLM2): 15 Q heads, 5 KV heads, D_h=64
+
+    Each KV head is loaded once and shared by its G = H_q // H_kv query
+    heads, so the G*P row accumulators in each stage are independent and
+    the inner j loops can reach II=1.
+    """
+    H_q = config.NUM_Q_HEADS
+    H_kv = config.NUM_KV_HEADS
+    D_head = config.HEAD_DIM
+    s = allo.customize(sdpa.sdpa_gqa, instantiate=[A_T, L_q, L_kv, D_head, H_q, H_kv, P])
+
+    loops = s.get_loops()
+    head_loop = loops["kv_head"]
+
+    # ===== Stage 0: KV head load =====
+    s.pipeline(head_loop["jl"])
+    s.partition(s.K_local, partition.Complete, dim=2)
+    s.partition(s.V_local, partition.Complete, dim=2)
+
+    # ===== Stage 1: Q @ K^T =====
+    # One K row feeds G*P independent dot products
+    s.pipeline(head_loop["p1"])
+    s.partition(s.max_vals, partition.Complete, dim=0)
+
+    # ===== Stage 2: Exp and sum =====
+    s.pipeline(head_loop["p2"])
+    s.partition(s.sum_exps, partition.Complete, dim=0)
+
+    # ===== Stage 3: Normalize =====
+    s.pipeline(head_loop["j3"])
+
+    # ===== Stage 4: softmax @ V =====
+    s.pipeline(head_loop["p4"])
+    s.partition(s.acc_out, partition.Complete, dim=3)
+
+    # ===== Stage 5: Write outputs =====
+    s.pipeline(head_loop["d2"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"sdpa_gqa_{H_q}q_{H_kv}kv_{L_q}x{L_kv}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    gqa_scale = float(np.sqrt(D_head))
+    match mode:
+        case "llvm":
+            out = np.zeros((H_q, L_q, D_head), dtype=N_T)
+            s_llvm = s.build(project=project_name)
+            Q_quant = np.random.randint(-8, 8, (H_q, L_q, D_head)).astype(N_T)
+            K_quant = np.random.randint(-8, 8, (H_kv, L_kv, D_head)).astype(N_T)
+            V_quant = np.random.randint(-8, 8, (H_kv, L_kv, D_head)).astype(N_T)
+            s_llvm(Q_quant, K_quant, V_quant, gqa_scale, out)
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+def schedule_sdpa_block_masked(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    P: int = 8,         # Row parallelism factor
+    B_c: int = 32,      # K/V tile size (also the mask tile width)
+    include_actions: bool = True,
+    mode: str = "csyn"
+):
+    """
+    Block-sparse masked SDPA (sdpa.sdpa_block_masked) for the SmolVLA layout.
+
+    Sequence length is DEFAULT_Tf (+ action chunk), padded to a multiple of
+    lcm(P, B_c) by attention_masks.smolvla_block_mask. The schedule is the same
+    as schedule_sdpa_streaming_flash; skipped tiles cost one tile_mask read.
+    """
+    seg, mask, tile_mask, seq_len = smolvla_block_mask(P, B_c, CAC, include_actions)
+    print(f"L_pad={seq_len}, skipped tiles {skipped_fraction(tile_mask):.1%}")
+
+    s = allo.customize(sdpa.sdpa_block_masked, instantiate=[A_T, seq_len, D_h, P, B_c])
+
+    loops = s.get_loops()
+    outer_loop = loops["row_outer"]
+
+    # ===== Stage 1: Tile load =====
+    s.pipeline(outer_loop["jl"])
+    s.partition(s.K_tile, partition.Complete, dim=2)
+    s.partition(s.V_tile, partition.Complete, dim=2)
+
+    # ===== Stage 2: Masked scores =====
+    s.pipeline(outer_loop["j1"])
+    s.partition(s.tile_max, partition.Complete, dim=1)
+
+    # ===== Stage 3: Rescale =====
+    s.pipeline(outer_loop["p2"])
+    s.partition(s.acc_out, partition.Complete, dim=2)
+    s.partition(s.max_vals, partition.Complete, dim=1)
+    s.partition(s.sum_exps, partition.Complete, dim=1)
+    s.partition(s.correction, partition.Complete, dim=1)
+
+    # ===== Stage 4: Exp and sum =====
+    s.pipeline(outer_loop["p3"])
+    s.partition(s.scores, partition.Complete, dim=1)
+
+    # ===== Stage 5: exp(scores) @ V_tile =====
+    s.pipeline(outer_loop["j4"])
+
+    # ===== Stage 6: Write outputs =====
+    s.pipeline(outer_loop["d5"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"sdpa_block_masked_{P}row_{B_c}tile_L{seq_len}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            out = np.zeros((seq_len, D_h), dtype=N_T)
+            s_llvm = s.build(project=project_name)
+            Q_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
+            K_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
+            V_quant = np.random.randint(-8, 8, (seq_len, D_h)).astype(N_T)
+            s_llvm(Q_quant, K_quant, V_quant, tile_mask, seg, scale, out)
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+def schedule_self_attention_fused_epilogue(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    P: int = 8,                        # Row parallelism factor
+    seq_len: int = VAC.NUM_TOKENS,
+    D: int = VAC.HIDDEN_DIM,
+    H: int = VAC.NUM_HEADS,
+    mode: str = "csyn"
+):
+    """
+    Multi-head self-attention with fused W_o + residual + LayerNorm epilogue
+    (sdpa.self_attention_fused_epilogue).
+
+    Heads are streamed through head_loop, so K_h / V_h are [L, D_h] and Q
+    is projected per row block. o_acc[L, D] is partitioned cyclically by P so
+    the W_o update for all P rows of a (k, n) weight happens in one cycle,
+    and the LayerNorm loops run on it before a single write per row.
+    """
+    D_head = D // H
+    s = allo.customize(sdpa.self_attention_fused_epilogue,
+                       instantiate=[A_T, seq_len, D, H, D_head, P])
+
+    loops = s.get_loops()
+    head_loop = loops["head_loop"]
+
+    # ===== Per-head K/V and per-block Q projections =====
+    s.pipeline(head_loop["j_kv"])
+    s.pipeline(head_loop["j_q"])
+
+    # ===== Stages 1-4: SDPA per head =====
+    s.pipeline(head_loop["j1"])
+    s.pipeline(head_loop["p2"])
+    s.pipeline(head_loop["j3"])
+    s.pipeline(head_loop["j4"])
+    s.partition(s.max_vals, partition.Complete, dim=1)
+    s.partition(s.sum_exps, partition.Complete, dim=1)
+
+    # ===== Stage 5: W_o accumulated on chip =====
+    s.pipeline(head_loop["n5"])
+    s.partition(s.o_acc, partition.Cyclic, dim=1, factor=P)
+    s.partition(s.acc_out, partition.Complete, dim=1)
+
+    # ===== Stage 6: Residual + LayerNorm =====
+    s.pipeline(loops["ln_row"]["n6"])
+    s.pipeline(loops["ln_row"]["n7"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"self_attention_fused_epilogue_{P}row_L{seq_len}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            out = np.zeros((seq_len, D), dtype=N_T)
+            s_llvm = s.build(project=project_name)
+            X_quant = np.random.randint(-4, 4, (seq_len, D)).astype(N_T)
+            W_q, W_k, W_v, W_o = [np.random.randint(-4, 4, (H, D_head, D)).astype(N_T) for _ in range(4)]
+            gamma = np.random.randint(1, 8, (D,)).astype(N_T)
+            beta = np.random.randint(-8, 8, (D,)).astype(N_T)
+            s_llvm(X_quant, W_q, W_k, W_v, W_o, gamma, beta, float(np.sqrt(D_head)), out)
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
 def schedule_self_attention_4row_parallel(
     N_T: np.dtype,
     A_T: allo.ir.types,
@@ -663,6 +964,22 @@ if __name__ == "__main__":
     # 4-row parallel version - achieves II=1 on accumulator loops
     # print("\n=== Testing 4-Row Parallel SDPA int8 ===")
     #schedule_sdpa_streaming_4row_parallel(np.int8, int8, P=8, mode="csyn")
+
+    # Integer LUT softmax instead of float exp/div
+    # print("\n=== Testing 8-Row Parallel SDPA int8 with LUT softmax ===")
+    # schedule_sdpa_streaming_4row_parallel(np.int8, int8, P=8, softmax_impl="lut", mode="csyn")
+
+    # Tiled online-softmax version - on-chip buffers independent of L
+    # print("\n=== Testing Flash SDPA int8 (L=2048, B_c=64) ===")
+    # schedule_sdpa_streaming_flash(np.int8, int8, P=8, B_c=64, seq_len=2048, mode="csyn")
+
+    # Grouped-query attention (action expert: 12 Q / 4 KV heads)
+    # print("\n=== Testing GQA SDPA int8 ===")
+    # schedule_sdpa_gqa(np.int8, int8, config=CAC, P=5, mode="csyn")
+
+    # Block-sparse masked SDPA over the SmolVLA prefix + action layout
+    # print("\n=== Testing Block-Masked SDPA int8 ===")
+    # schedule_sdpa_block_masked(np.int8, int8, P=8, B_c=32, mode="csyn")
     
     # Uncomment to test int4
     # print("\n=== Testing Quantized SDPA int4 Baseline ===")
@@ -671,6 +988,10 @@ if __name__ == "__main__":
     # print("\n=== Testing Quantized SDPA int4 Tiled (16x) ===")
     # schedule_sdpa_streaming_quantized_tiled(np.int8, int4, tile_factor=16, mode="csyn")
     
+    # Self-attention with fused W_o + residual + LayerNorm epilogue
+    # print("\n=== Testing Self-Attention Fused Epilogue int8 ===")
+    # schedule_self_attention_fused_epilogue(np.int8, int8, P=8, mode="csyn")
+
     # 4-row parallel version for self-attention
     # print("\n=== Testing 4-Row Parallel Self-Attention int8 ===")
     # schedule_self_attention_4row_parallel(np.int8, int8, P=8, mode="csyn")
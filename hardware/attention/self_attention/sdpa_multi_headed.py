@@ -176,7 +176,50 @@ def multi_headed_sdpa_v5[
         for l, d in allo.grid(L, D_h):
             out[i, l, d] = out_head[l, d]
 
-        
+
+# Option 6: N_CU replicated compute units, heads dispatched round-robin
+def multi_headed_sdpa_replicated[
+    T: (bfloat16, float32, int4, int8),
+    L: int16,
+    NUM_HEADS: int16,
+    D_h: int16,
+    P: int16,     # Row parallelism inside each unit (sdpa_streaming_8row)
+    N_CU: int16   # Number of head compute units (must divide NUM_HEADS)
+](
+    Q: "T[NUM_HEADS, L, D_h]",
+    K: "T[NUM_HEADS, L, D_h]",
+    V: "T[NUM_HEADS, L, D_h]",
+    scale: "float32",
+    out: "T[NUM_HEADS, L, D_h]"
+):
+    """
+    Head-parallel SDPA with N_CU replicated sdpa_streaming_8row engines.
+
+    Head h runs on unit h % N_CU in round h // N_CU. With Q/K/V/out cyclically
+    partitioned by N_CU along the head dimension, unit cu only ever touches
+    bank cu, so the unrolled cu loop has no shared-memory conflicts and the
+    latency is ~NUM_HEADS / N_CU times a single head.
+    """
+    for r in allo.grid(NUM_HEADS // N_CU, name="head_round"):
+        # Unrolled by the scheduler: one engine per cu, each with its own buffers
+        for cu in allo.grid(N_CU, name="compute_unit"):
+            h: "int16" = r * N_CU + cu
+            Q_head: "T[L, D_h]"
+            K_head: "T[L, D_h]"
+            V_head: "T[L, D_h]"
+            out_head: "T[L, D_h]"
+
+            for l_in, d_in in allo.grid(L, D_h, name="load_head"):
+                Q_head[l_in, d_in] = Q[h, l_in, d_in]
+                K_head[l_in, d_in] = K[h, l_in, d_in]
+                V_head[l_in, d_in] = V[h, l_in, d_in]
+
+            sdpa.sdpa_streaming_8row[T, L, D_h, P, "engine"](Q_head, K_head, V_head, scale, out_head)
+
+            for l_out, d_out in allo.grid(L, D_h, name="store_head"):
+                out[h, l_out, d_out] = out_head[l_out, d_out]
+
+
 if __name__ == "__main__":
     print("made it through the imports")
     # Test the restructured version with explicit copy loops (v3)
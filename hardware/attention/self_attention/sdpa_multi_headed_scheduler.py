@@ -118,9 +118,73 @@ def schedule_sdpa_mh_dataflow(
         case "csyn":
             s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
             s_csyn()
+
+
+def _schedule_sdpa_engine(A_T, L: int, D_h: int, P: int):
+    """Pipelined sdpa_streaming_8row, the engine replicated by each compute unit."""
+    s_eng = allo.customize(sdpa.sdpa_streaming_8row, instantiate=[A_T, L, D_h, P])
+    outer_loop = s_eng.get_loops()["row_outer"]
+    s_eng.pipeline(outer_loop["j1"])
+    s_eng.pipeline(outer_loop["p2"])
+    s_eng.pipeline(outer_loop["j3"])
+    s_eng.pipeline(outer_loop["j4"])
+    s_eng.pipeline(outer_loop["d2"])
+    s_eng.partition(s_eng.acc_out, partition.Complete, dim=1)
+    s_eng.partition(s_eng.max_vals, partition.Complete, dim=1)
+    return s_eng
+
+
+def schedule_sdpa_mh_replicated(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    mode: str = "llvm",
+    n_cu: int = 4,    # Number of head compute units (divides NUM_HEADS)
+    P: int = 8,       # Row parallelism inside each unit
+):
+    """
+    n_cu replicated sdpa_streaming_8row engines, heads dispatched round-robin
+    (sdpa_mh.multi_headed_sdpa_replicated).
+
+    Q/K/V/out are cyclically partitioned by n_cu along the head dimension so
+    head h lives in bank h % n_cu, the bank of the unit that processes it.
+    Each unit runs the pipelined engine from _schedule_sdpa_engine.
+    """
+    NUM_HEADS = VAC.NUM_HEADS
+    scale = float(np.sqrt(D_h))
+    s = allo.customize(sdpa_mh.multi_headed_sdpa_replicated,
+                       instantiate=[A_T, L, NUM_HEADS, D_h, P, n_cu])
+
+    s.compose(_schedule_sdpa_engine(A_T, L, D_h, P), id="engine")
+
+    s.partition(s.Q, partition.Cyclic, dim=1, factor=n_cu)
+    s.partition(s.K, partition.Cyclic, dim=1, factor=n_cu)
+    s.partition(s.V, partition.Cyclic, dim=1, factor=n_cu)
+    s.partition(s.out, partition.Cyclic, dim=1, factor=n_cu)
+
+    loops = s.get_loops("multi_headed_sdpa_replicated")["head_round"]
+    s.pipeline(loops["d_in"])
+    s.pipeline(loops["d_out"])
+    # Replicate the engine: one unrolled cu iteration per compute unit
+    s.unroll(loops["cu"])
+
+    project_name = f"sdpa_mh_replicated_{n_cu}cu_{mode}_{A_T}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            Q_quant = np.random.randint(-8, 8, (NUM_HEADS, L, D_h)).astype(N_T)
+            K_quant = np.random.randint(-8, 8, (NUM_HEADS, L, D_h)).astype(N_T)
+            V_quant = np.random.randint(-8, 8, (NUM_HEADS, L, D_h)).astype(N_T)
+            O_quant = np.zeros((NUM_HEADS, L, D_h), dtype=N_T)
+            s_llvm(Q_quant, K_quant, V_quant, scale, O_quant)
+            return O_quant, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+
+
 if __name__ == "__main__":
     # schedule_sdpa_mh_baseline(np.float32, float32, mode="csyn")
     # schedule_sdpa_mh_unroll(np.float32, float32, mode="csyn", unroll_factor=12)
     schedule_sdpa_mh_dataflow(np.float32, float32, mode="csyn")
-
-
+    # for n_cu in [1, 2, 4, 12]:
+    #     schedule_sdpa_mh_replicated(np.int8, int8, mode="csyn", n_cu=n_cu)
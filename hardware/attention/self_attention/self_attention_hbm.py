@@ -58,32 +58,35 @@ def attention_row_from_hbm[
     T: (bfloat16, float32, int4, int8),
     L: int16,
     H: int16,
+    H_kv: int16,  # KV heads (H // H_kv query heads share one; H_kv = H for MHA)
     D_h: int16,
 ](
     Q_row:   "int32[H, D_h]",       # Q for current row, all heads (from compute_q_row)
-    K_hbm:   "int32[H, L, D_h]",    # Full K matrix from HBM
-    V_hbm:   "int32[H, L, D_h]",    # Full V matrix from HBM
+    K_hbm:   "int32[H_kv, L, D_h]", # Full K matrix from HBM
+    V_hbm:   "int32[H_kv, L, D_h]", # Full V matrix from HBM
     scale:   "float32",
     out_row: "int32[H, D_h]"        # Output: attention result for this row, all heads
 ):
     """
     Compute attention for a single output row, reading K/V from HBM.
     
-    For each head:
-      attn_scores[j] = Q_row[h] @ K[h, j, :] for j in [0, L)
+    For each query head h, with KV head g = h // (H // H_kv):
+      attn_scores[j] = Q_row[h] @ K[g, j, :] for j in [0, L)
       attn_weights = softmax(attn_scores / scale)
-      out_row[h] = attn_weights @ V[h]
+      out_row[h] = attn_weights @ V[g]
     """
     for h in allo.grid(H, name="head_loop"):
+        g: int16 = h // (H // H_kv)
+
         # Compute attention scores: Q_row @ K^T
         attn_scores: "int32[L]"
         max_val: int32 = -2147483648
         
-        for j in allo.grid(L, name="score_col_loop"):
+        for j1 in allo.grid(L, name="score_col_loop"):
             acc: int32 = 0
-            for k in allo.reduction(D_h, name="score_reduction"):
-                acc += Q_row[h, k] * K_hbm[h, j, k]
-            attn_scores[j] = acc
+            for d1 in allo.reduction(D_h, name="score_reduction"):
+                acc += Q_row[h, d1] * K_hbm[g, j1, d1]
+            attn_scores[j1] = acc
             if acc > max_val:
                 max_val = acc
         
@@ -91,20 +94,20 @@ def attention_row_from_hbm[
         sum_exp: float32 = 0.0
         attn_weights: "float32[L]"
         
-        for j in allo.grid(L, name="exp_loop"):
-            exp_val: float32 = allo.exp((attn_scores[j] - max_val) / scale)
-            attn_weights[j] = exp_val
+        for j2 in allo.grid(L, name="exp_loop"):
+            exp_val: float32 = allo.exp((attn_scores[j2] - max_val) / scale)
+            attn_weights[j2] = exp_val
             sum_exp += exp_val
         
-        for j in allo.grid(L, name="norm_loop"):
-            attn_weights[j] = attn_weights[j] / sum_exp
+        for j3 in allo.grid(L, name="norm_loop"):
+            attn_weights[j3] = attn_weights[j3] / sum_exp
         
         # Weighted sum with V: attn_weights @ V
-        for d in allo.grid(D_h, name="output_col_loop"):
+        for d2 in allo.grid(D_h, name="output_col_loop"):
             acc_out: float32 = 0.0
-            for j in allo.reduction(L, name="output_reduction"):
-                acc_out += attn_weights[j] * V_hbm[h, j, d]
-            out_row[h, d] = acc_out
+            for j4 in allo.reduction(L, name="output_reduction"):
+                acc_out += attn_weights[j4] * V_hbm[g, j4, d2]
+            out_row[h, d2] = acc_out
 
 
 def self_attention_hbm[
@@ -197,6 +200,145 @@ def self_attention_hbm[
             out[i_out, d_out] = acc_proj
 
 
+def compute_kv_to_hbm_packed[
+    T: (int4, int8),
+    L: int16,   # Number of Tokens
+    H: int16,   # Number of Heads
+    D: int16,   # Embedding Length (even)
+    D_h: int16, # Head Embedding Length
+](
+    X:          "T[L, D]",
+    W_k_packed: "int8[H, D_h, D // 2]",  # common_kernels.packing.pack_int4(W_k)
+    W_v_packed: "int8[H, D_h, D // 2]",  # common_kernels.packing.pack_int4(W_v)
+    K_out:      "int32[H, L, D_h]",      # Output to HBM
+    V_out:      "int32[H, L, D_h]"       # Output to HBM
+):
+    """
+    compute_kv_to_hbm with packed int4 weights (two nibbles per byte).
+
+    Each weight byte read from HBM is unpacked on chip into w[2k] (low nibble)
+    and w[2k+1] (high nibble), sign-extended with (nibble ^ 8) - 8, so weight
+    traffic is half of the int8-stored int4 layout for the same MACs.
+    """
+    for i in allo.grid(L, name="row_loop"):
+        for k2 in allo.reduction(D // 2, name="reduction_loop"):
+            X_lo: int32 = X[i, 2 * k2]
+            X_hi: int32 = X[i, 2 * k2 + 1]
+            for j in allo.grid(D_h, name="col_loop"):
+                for h in allo.grid(H, name="head_loop"):
+                    k_byte: int32 = W_k_packed[h, j, k2]
+                    v_byte: int32 = W_v_packed[h, j, k2]
+                    wk_lo: int32 = ((k_byte & 15) ^ 8) - 8
+                    wk_hi: int32 = (((k_byte >> 4) & 15) ^ 8) - 8
+                    wv_lo: int32 = ((v_byte & 15) ^ 8) - 8
+                    wv_hi: int32 = (((v_byte >> 4) & 15) ^ 8) - 8
+                    K_out[h, i, j] = (0 if k2 == 0 else K_out[h, i, j]) + X_lo * wk_lo + X_hi * wk_hi
+                    V_out[h, i, j] = (0 if k2 == 0 else V_out[h, i, j]) + X_lo * wv_lo + X_hi * wv_hi
+
+
+def self_attention_hbm_packed[
+    T: (int4, int8),
+    L: int16,
+    H: int16,
+    D: int16,   # Embedding Length (even)
+    D_h: int16,
+](
+    X:          "T[L, D]",
+    W_q_packed: "int8[H, D_h, D // 2]",
+    W_k_packed: "int8[H, D_h, D // 2]",
+    W_v_packed: "int8[H, D_h, D // 2]",
+    W_o_packed: "int8[H, D_h, D // 2]",  # Packed along the output dimension D
+    scale:      "float32",
+    K_hbm:      "int32[H, L, D_h]",  # Intermediate storage in HBM
+    V_hbm:      "int32[H, L, D_h]",  # Intermediate storage in HBM
+    out:        "T[L, D]"
+):
+    """
+    self_attention_hbm with all four weight matrices in the packed int4 format.
+
+    Same phases as self_attention_hbm. Q/K/V weights are packed along the
+    reduction dimension D; W_o is packed along its output dimension D, so each
+    byte produces the partial sums for output columns 2n and 2n+1.
+    """
+    # Phase 1: Compute all K and V, store in HBM
+    for i in allo.grid(L, name="kv_row_loop"):
+        for k2 in allo.reduction(D // 2, name="kv_reduction"):
+            X_lo: int32 = X[i, 2 * k2]
+            X_hi: int32 = X[i, 2 * k2 + 1]
+            for j in allo.grid(D_h, name="kv_col_loop"):
+                for h in allo.grid(H, name="kv_head_loop"):
+                    k_byte: int32 = W_k_packed[h, j, k2]
+                    v_byte: int32 = W_v_packed[h, j, k2]
+                    wk_lo: int32 = ((k_byte & 15) ^ 8) - 8
+                    wk_hi: int32 = (((k_byte >> 4) & 15) ^ 8) - 8
+                    wv_lo: int32 = ((v_byte & 15) ^ 8) - 8
+                    wv_hi: int32 = (((v_byte >> 4) & 15) ^ 8) - 8
+                    K_hbm[h, i, j] = (0 if k2 == 0 else K_hbm[h, i, j]) + X_lo * wk_lo + X_hi * wk_hi
+                    V_hbm[h, i, j] = (0 if k2 == 0 else V_hbm[h, i, j]) + X_lo * wv_lo + X_hi * wv_hi
+
+    # Phase 2: Compute attention row by row
+    for i_out in allo.grid(L, name="attn_row_loop"):
+        # Compute Q for current row
+        Q_row: "int32[H, D_h]"
+        for k2 in allo.reduction(D // 2, name="q_reduction"):
+            X_lo: int32 = X[i_out, 2 * k2]
+            X_hi: int32 = X[i_out, 2 * k2 + 1]
+            for j in allo.grid(D_h, name="q_col_loop"):
+                for h in allo.grid(H, name="q_head_loop"):
+                    q_byte: int32 = W_q_packed[h, j, k2]
+                    wq_lo: int32 = ((q_byte & 15) ^ 8) - 8
+                    wq_hi: int32 = (((q_byte >> 4) & 15) ^ 8) - 8
+                    Q_row[h, j] = (0 if k2 == 0 else Q_row[h, j]) + X_lo * wq_lo + X_hi * wq_hi
+
+        # Compute attention for each head
+        attn_out: "int32[H, D_h]"
+        for h in allo.grid(H, name="attn_head_loop"):
+            # Compute attention scores
+            attn_scores: "int32[L]"
+            max_val: int32 = -2147483648
+
+            for j in allo.grid(L, name="score_loop"):
+                acc: int32 = 0
+                for d in allo.reduction(D_h, name="score_reduction"):
+                    acc += Q_row[h, d] * K_hbm[h, j, d]
+                attn_scores[j] = acc
+                if acc > max_val:
+                    max_val = acc
+
+            # Softmax
+            sum_exp: float32 = 0.0
+            attn_weights: "float32[L]"
+            for j in allo.grid(L, name="softmax_exp_loop"):
+                exp_val: float32 = allo.exp((attn_scores[j] - max_val) / scale)
+                attn_weights[j] = exp_val
+                sum_exp += exp_val
+
+            for j in allo.grid(L, name="softmax_norm_loop"):
+                attn_weights[j] = attn_weights[j] / sum_exp
+
+            # Weighted sum with V
+            for d in allo.grid(D_h, name="output_loop"):
+                acc_out: float32 = 0.0
+                for j in allo.reduction(L, name="v_reduction"):
+                    acc_out += attn_weights[j] * V_hbm[h, j, d]
+                attn_out[h, d] = acc_out * 32768.0  # Scale back to int range
+
+        # Output projection: two output columns per packed W_o byte
+        for n2 in allo.grid(D // 2, name="output_proj_outer"):
+            acc_lo: int32 = 0
+            acc_hi: int32 = 0
+            for h in allo.grid(H, name="output_proj_h"):
+                for d_h in allo.reduction(D_h, name="output_proj_inner"):
+                    o_byte: int32 = W_o_packed[h, d_h, n2]
+                    wo_lo: int32 = ((o_byte & 15) ^ 8) - 8
+                    wo_hi: int32 = (((o_byte >> 4) & 15) ^ 8) - 8
+                    attn_val: int32 = attn_out[h, d_h] >> 15
+                    acc_lo += attn_val * wo_lo
+                    acc_hi += attn_val * wo_hi
+            out[i_out, 2 * n2] = acc_lo
+            out[i_out, 2 * n2 + 1] = acc_hi
+
+
 # Test/build configuration
 if __name__ == "__main__":
     L = 2048
@@ -224,3 +366,12 @@ if __name__ == "__main__":
         configs={"hbm_mapping": hbm_mapping},
         wrap_io=io,
     )()
+
+    # Packed int4 weights: half the weight bytes of the int8-stored layout
+    # s_packed = allo.customize(compute_kv_to_hbm_packed, instantiate=[int8, L, H, D, D_h])
+    # s_packed.build(
+    #     target="vitis_hls",
+    #     mode="csyn",
+    #     project="compute_kv_hbm_packed_int4.prj",
+    #     configs={"hbm_mapping": {"X": 0, "W_k_packed": 1, "W_v_packed": 2, "K_out": 3, "V_out": 4}},
+    # )()
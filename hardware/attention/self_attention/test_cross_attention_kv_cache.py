@@ -0,0 +1,68 @@
+"""
+Test for the cached cross-attention flow (llvm mode)
+
+compute_kv_to_hbm over the context tokens is checked exactly against an
+integer einsum, and cross_attention_step against cross_attention_step_np over several steps that
+reuse the same K/V cache. The step kernel keeps its softmax in float32, so a
+truncated attention output can land 1 off the float64 reference, which moves
+an output by at most max|W_o| per flipped value.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "submodules" / "allo"))
+from attention.self_attention.self_attention_hbm import compute_kv_to_hbm
+from attention.self_attention.cross_attention_kv_cache import (
+    cross_attention_step,
+    cross_attention_step_np,
+)
+
+
+@pytest.mark.parametrize("L_a, D_a, L_v, D_ctx, H_q, H_kv, D_h, D_out", [
+    (8, 32, 24, 16, 4, 2, 8, 32),
+    (5, 24, 17, 32, 6, 2, 16, 24),    # odd token counts, G=3 as in smolVLA
+])
+def test_cached_cross_attention_vs_numpy(L_a, D_a, L_v, D_ctx, H_q, H_kv, D_h, D_out):
+    np.random.seed(3)
+    X = np.random.randint(-4, 4, (L_v, D_ctx)).astype(np.int8)
+    W_k = np.random.randint(-4, 4, (H_kv, D_h, D_ctx)).astype(np.int8)
+    W_v = np.random.randint(-4, 4, (H_kv, D_h, D_ctx)).astype(np.int8)
+    W_q = np.random.randint(-4, 4, (H_q, D_h, D_a)).astype(np.int8)
+    W_o = np.random.randint(-4, 4, (H_q, D_h, D_out)).astype(np.int8)
+    scale = float(np.sqrt(D_h)) * 64.0
+
+    s_kv = allo.customize(compute_kv_to_hbm, instantiate=[int8, L_v, H_kv, D_ctx, D_h])
+    project_mod = s_kv.build()
+    K_cache = np.zeros((H_kv, L_v, D_h), dtype=np.int32)
+    V_cache = np.zeros((H_kv, L_v, D_h), dtype=np.int32)
+    project_mod(X, W_k, W_v, K_cache, V_cache)
+
+    np.testing.assert_array_equal(K_cache, np.einsum("ik,hjk->hij", X.astype(np.int64), W_k.astype(np.int64)))
+    np.testing.assert_array_equal(V_cache, np.einsum("ik,hjk->hij", X.astype(np.int64), W_v.astype(np.int64)))
+
+    s_step = allo.customize(cross_attention_step,
+                            instantiate=[int8, L_a, D_a, L_v, H_q, H_kv, D_h, D_out])
+    step_mod = s_step.build()
+    K_ref, V_ref = K_cache.copy(), V_cache.copy()
+    for step in range(3):
+        A = np.random.randint(-4, 4, (L_a, D_a)).astype(np.int8)
+        out = np.zeros((L_a, D_out), dtype=np.int32)
+        step_mod(A, W_q, W_o, K_cache, V_cache, scale, out)
+
+        ref = cross_attention_step_np(A, W_q, W_o, K_ref, V_ref, scale)
+        diff = np.abs(out.astype(np.int64) - ref)
+        assert diff.max() <= 4 * H_q, f"step {step}: cross-attention mismatch (max diff {diff.max()})"
+
+    # The steps only read the cache
+    np.testing.assert_array_equal(K_cache, K_ref)
+    np.testing.assert_array_equal(V_cache, V_ref)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
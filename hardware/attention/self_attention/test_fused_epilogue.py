@@ -0,0 +1,78 @@
+"""
+Test for self_attention_fused_epilogue - SDPA + W_o + residual + LayerNorm (llvm mode)
+
+The kernel computes LayerNorm in float32 and the reference in float64, and
+both truncate to int8, so outputs may differ by 1 LSB; the float32 softmax
+can also flip a Q15 weight by 1, which is covered by a 2 LSB tolerance.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "submodules" / "allo"))
+from attention.self_attention.sdpa import (
+    self_attention_fused_epilogue,
+    self_attention_fused_epilogue_np,
+)
+
+
+@pytest.mark.parametrize("L, D, H, P", [
+    (16, 32, 2, 4),
+    (32, 64, 4, 8),
+])
+def test_fused_epilogue_vs_numpy(L, D, H, P):
+    D_h = D // H
+    scale = float(np.sqrt(D_h))
+
+    np.random.seed(7)
+    X = np.random.randint(-4, 4, (L, D)).astype(np.int8)
+    W_q, W_k, W_v, W_o = [np.random.randint(-4, 4, (H, D_h, D)).astype(np.int8) for _ in range(4)]
+    gamma = np.random.randint(1, 8, (D,)).astype(np.int8)
+    beta = np.random.randint(-8, 8, (D,)).astype(np.int8)
+
+    expected = self_attention_fused_epilogue_np(X, W_q, W_k, W_v, W_o, gamma, beta, scale)
+
+    s = allo.customize(self_attention_fused_epilogue, instantiate=[int8, L, D, H, D_h, P])
+    mod = s.build()
+    out = np.zeros((L, D), dtype=np.int8)
+    mod(X, W_q, W_k, W_v, W_o, gamma, beta, scale, out)
+
+    diff = np.abs(out.astype(np.float64) - expected)
+    print(f"L={L}, D={D}, H={H}, P={P}: max diff {diff.max():.3f}")
+    assert diff.max() <= 2.0, f"fused epilogue mismatch (max diff {diff.max():.3f})"
+
+
+def test_fused_epilogue_wide_accumulators():
+    """Full-scale int8 operands: the W_o sum over heads exceeds int32."""
+    L, D, H, P = 8, 64, 2, 4
+    D_h = D // H
+    scale = float(np.sqrt(D_h))
+
+    # Equal scores give a uniform softmax, so attention returns V (~1e6) and
+    # the ramp in W_o spreads o_acc over +-8.5e9 across the row
+    X = np.full((L, D), 127, dtype=np.int8)
+    W_q = np.full((H, D_h, D), 2, dtype=np.int8)
+    W_k = W_q.copy()
+    W_v = np.full((H, D_h, D), 127, dtype=np.int8)
+    ramp = (np.arange(D) * 255 // (D - 1) - 128).astype(np.int8)
+    W_o = np.broadcast_to(ramp, (H, D_h, D)).astype(np.int8)
+    gamma = np.full((D,), 64, dtype=np.int8)
+    beta = np.zeros((D,), dtype=np.int8)
+
+    expected = self_attention_fused_epilogue_np(X, W_q, W_k, W_v, W_o, gamma, beta, scale)
+
+    s = allo.customize(self_attention_fused_epilogue, instantiate=[int8, L, D, H, D_h, P])
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(X, W_q, W_k, W_v, W_o, gamma, beta, scale, out)
+
+    diff = np.abs(out.astype(np.float64) - expected)
+    assert diff.max() <= 2.0, f"fused epilogue mismatch at full scale (max diff {diff.max():.3f})"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,82 @@
+"""
+Tests for the packed int4 weight format
+
+- pack_int4 / unpack_int4 round trip over the full int4 range
+- compute_kv_to_hbm_packed and self_attention_hbm_packed (llvm mode) must
+  match the unpacked kernels bit for bit
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "submodules" / "allo"))
+from common_kernels.packing import pack_int4, unpack_int4
+from attention.self_attention.self_attention_hbm import (
+    compute_kv_to_hbm,
+    compute_kv_to_hbm_packed,
+    self_attention_hbm,
+    self_attention_hbm_packed,
+)
+
+
+def test_pack_unpack_round_trip():
+    w = np.random.randint(-8, 8, (3, 5, 64)).astype(np.int8)
+    packed = pack_int4(w)
+    assert packed.shape == (3, 5, 32) and packed.dtype == np.int8
+    np.testing.assert_array_equal(unpack_int4(packed), w)
+
+
+def test_pack_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        pack_int4(np.array([0, 8], dtype=np.int8))
+
+
+@pytest.mark.parametrize("L, H, D, D_h", [(8, 2, 16, 8), (16, 4, 32, 8)])
+def test_compute_kv_packed_matches_unpacked(L, H, D, D_h):
+    np.random.seed(11)
+    X = np.random.randint(-8, 8, (L, D)).astype(np.int8)
+    W_k = np.random.randint(-8, 8, (H, D_h, D)).astype(np.int8)
+    W_v = np.random.randint(-8, 8, (H, D_h, D)).astype(np.int8)
+
+    ref_mod = allo.customize(compute_kv_to_hbm, instantiate=[int8, L, H, D, D_h]).build()
+    K_ref = np.zeros((H, L, D_h), dtype=np.int32)
+    V_ref = np.zeros((H, L, D_h), dtype=np.int32)
+    ref_mod(X, W_k, W_v, K_ref, V_ref)
+
+    mod = allo.customize(compute_kv_to_hbm_packed, instantiate=[int8, L, H, D, D_h]).build()
+    K_out = np.zeros((H, L, D_h), dtype=np.int32)
+    V_out = np.zeros((H, L, D_h), dtype=np.int32)
+    mod(X, pack_int4(W_k), pack_int4(W_v), K_out, V_out)
+
+    np.testing.assert_array_equal(K_out, K_ref)
+    np.testing.assert_array_equal(V_out, V_ref)
+
+
+def test_self_attention_hbm_packed_matches_unpacked():
+    L, H, D, D_h = 8, 2, 16, 8
+    np.random.seed(12)
+    X = np.random.randint(-4, 4, (L, D)).astype(np.int8)
+    W_q, W_k, W_v = [np.random.randint(-8, 8, (H, D_h, D)).astype(np.int8) for _ in range(3)]
+    W_o = np.random.randint(-8, 8, (H, D_h, D)).astype(np.int8)
+    scale = 8.0
+
+    ref_mod = allo.customize(self_attention_hbm, instantiate=[int8, L, H, D, D_h]).build()
+    out_ref = np.zeros((L, D), dtype=np.int8)
+    ref_mod(X, W_q, W_k, W_v, W_o, scale,
+            np.zeros((H, L, D_h), dtype=np.int32), np.zeros((H, L, D_h), dtype=np.int32), out_ref)
+
+    mod = allo.customize(self_attention_hbm_packed, instantiate=[int8, L, H, D, D_h]).build()
+    out = np.zeros((L, D), dtype=np.int8)
+    mod(X, pack_int4(W_q), pack_int4(W_k), pack_int4(W_v), pack_int4(W_o), scale,
+        np.zeros((H, L, D_h), dtype=np.int32), np.zeros((H, L, D_h), dtype=np.int32), out)
+
+    np.testing.assert_array_equal(out, out_ref)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
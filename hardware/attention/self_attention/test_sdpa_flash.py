@@ -0,0 +1,49 @@
+"""
+Test for sdpa_streaming_flash - tiled online-softmax SDPA (llvm mode)
+
+Compares the Allo kernel against the floating-point numpy reference sdpa_np.
+The kernel truncates its float output to int8, so results may differ from
+the reference by at most 1 LSB.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "submodules" / "allo"))
+from attention.self_attention.sdpa import sdpa_np, sdpa_streaming_flash
+
+
+@pytest.mark.parametrize("L, D_h, P, B_c", [
+    (64, 32, 8, 16),
+    (128, 64, 8, 32),
+    (256, 64, 8, 64),
+])
+def test_sdpa_flash_vs_numpy(L, D_h, P, B_c):
+    """Tiled online softmax must match the full-row softmax reference."""
+    scale = float(np.sqrt(D_h))
+
+    np.random.seed(42)
+    Q = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+    K = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+    V = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+
+    expected = sdpa_np(Q.astype(np.float64), K.astype(np.float64),
+                       V.astype(np.float64), d_h=scale * scale)
+
+    s = allo.customize(sdpa_streaming_flash, instantiate=[int8, L, D_h, P, B_c])
+    mod = s.build()
+    out = np.zeros((L, D_h), dtype=np.int8)
+    mod(Q, K, V, scale, out)
+
+    diff = np.abs(out.astype(np.float64) - expected)
+    print(f"L={L}, D_h={D_h}, P={P}, B_c={B_c}: max diff {diff.max():.3f}")
+    assert diff.max() <= 1.0, f"flash SDPA mismatch (max diff {diff.max():.3f})"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,73 @@
+"""
+Tests for the integer LUT softmax (llvm mode)
+
+- softmax_int_lut must match its numpy model softmax_int_lut_np bit for bit
+- sdpa_streaming_8row_lut must stay within 2 LSB of the float reference sdpa_np
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3] / "submodules" / "allo"))
+from attention.self_attention.sdpa import sdpa_np, sdpa_streaming_8row_lut
+from common_kernels.softmax import (
+    softmax_int_lut,
+    softmax_int_lut_np,
+    softmax_int_lut_error,
+    make_exp_lut,
+    make_recip_lut,
+    make_log2e_scale,
+)
+
+
+@pytest.mark.parametrize("E, R", [(64, 64), (256, 256)])
+def test_softmax_int_lut_bit_exact(E, R):
+    """Hardware kernel and numpy model agree exactly."""
+    rows, D, D_h = 8, 128, 64
+    np.random.seed(0)
+    A = np.random.randint(-2**16, 2**16, (rows, D)).astype(np.int32)
+    exp_lut, recip_lut = make_exp_lut(E), make_recip_lut(R)
+    log2e_scale = make_log2e_scale(np.sqrt(D_h))
+
+    s = allo.customize(softmax_int_lut, instantiate=[rows, D, E, R])
+    mod = s.build()
+    out = np.zeros((rows, D), dtype=np.int16)
+    mod(A, exp_lut, recip_lut, log2e_scale, out)
+
+    np.testing.assert_array_equal(out, softmax_int_lut_np(A, exp_lut, recip_lut, log2e_scale))
+    err = softmax_int_lut_error(A, np.sqrt(D_h), E, R)
+    print(f"E={E}, R={R}: max abs error vs np_softmax {err:.2e}")
+    assert err < 2.0 / min(E, R)
+
+
+@pytest.mark.parametrize("L, D_h, P", [(64, 32, 8), (128, 64, 8)])
+def test_sdpa_lut_vs_numpy(L, D_h, P):
+    """LUT softmax SDPA stays close to the float reference."""
+    E, R = 256, 256
+    scale = float(np.sqrt(D_h))
+
+    np.random.seed(42)
+    Q = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+    K = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+    V = np.random.randint(-8, 8, (L, D_h)).astype(np.int8)
+
+    expected = sdpa_np(Q.astype(np.float64), K.astype(np.float64),
+                       V.astype(np.float64), d_h=scale * scale)
+
+    s = allo.customize(sdpa_streaming_8row_lut, instantiate=[int8, L, D_h, P, E, R])
+    mod = s.build()
+    out = np.zeros((L, D_h), dtype=np.int8)
+    mod(Q, K, V, make_exp_lut(E), make_recip_lut(R), make_log2e_scale(scale), out)
+
+    diff = np.abs(out.astype(np.float64) - expected)
+    print(f"L={L}, D_h={D_h}, P={P}: max diff {diff.max():.3f}")
+    assert diff.max() <= 2.0, f"LUT SDPA mismatch (max diff {diff.max():.3f})"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
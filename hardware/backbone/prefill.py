@@ -0,0 +1,342 @@
+"""
+SmolLM2 backbone prefill that writes a per-layer K/V cache to HBM.
+
+The action expert's cross-attention consumes the backbone's K/V for the
+DEFAULT_Tf-token prefix (images + text + state). The prefix only changes with
+the observation, so backbone_prefill runs the NL text layers over it once and
+stores every layer's K and V. Later steps read the stored values, and
+nothing recomputes the prefix.
+
+Per layer (pre-norm, as in SmolLM2):
+
+    h  = x + requant(GQA(RMSNorm1(x)) @ W_o)
+    x' = h + requant((SiLU(gate) * up)(RMSNorm2(h)) @ W_down)
+
+- The residual stream stays int32 in one on-chip buffer res[L, D]. o_proj
+  and down_proj read and write the same element, so both add in place.
+  Weights are stacked per layer and streamed once per layer as
+  weight-stationary [K, Tn] tiles.
+- RMSNorm is common_kernels.rmsnorm, called on res with the layer's
+  gamma_q row; gamma_q / eps_q are folded on the host (fold_rmsnorm_params).
+- Attention is GQA (H_q // H_kv query heads per KV head), masked by segment
+  ids: query i sees key j iff seg[j] <= seg[i]
+  (attention.self_attention.attention_masks). L may be padded to a multiple
+  of P with PAD_SEGMENT tokens.
+- Projections use per-layer, per-tensor requant (requant_value with
+  rq_mult / rq_shift, RQ_* slots). K and V have their own slots, so the
+  cache holds them at different scales (prefix_kv_adapter's k_scale /
+  v_scale). gate is read as real values through act_scale, and SiLU(gate) * up
+  keeps the LSB of up.
+- RoPE is not applied, as in action_expert.denoise, so the cache holds
+  unrotated K.
+
+K/V cache layout: kv_cache is one flat T region. kv_desc[ly] =
+(k_base, v_base, head_stride, token_stride) from make_kv_descriptors, and
+element (h, i, d) of layer ly's K is at
+
+    kv_cache[k_base + h * head_stride + i * token_stride + d]
+
+The default layout gives each layer [H_kv, L, D_h] blocks of the backbone's
+own K/V (H_kv = 5, D_h = 64, int8). The action expert attends with 4 KV heads
+of 80 in float, so it does not bind this cache directly:
+action_expert.prefix_kv.prefix_kv_adapter reads it through kv_desc,
+dequantizes it and applies the expert's per-layer context K/V projections to
+produce ctx_K / ctx_V. A consumer can index the cache by layer without
+knowing how the other layers are laid out.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common_kernels.requant import requant_value, requant_np
+from common_kernels.rmsnorm import rmsnorm, rmsnorm_np
+
+# rq_mult / rq_shift slots
+RQ_Q = 0
+RQ_K = 1
+RQ_V = 2
+RQ_O = 3
+RQ_GATE = 4
+RQ_UP = 5
+RQ_DOWN = 6
+RQ_SLOTS = 7
+
+# kv_desc columns
+KV_K_BASE = 0
+KV_V_BASE = 1
+KV_HEAD_STRIDE = 2
+KV_TOKEN_STRIDE = 3
+
+
+def make_kv_descriptors(NL: int, H_kv: int, L: int, D_h: int):
+    """
+    kv_desc int32[NL, 4] for layer-major [K | V] blocks of [H_kv, L, D_h],
+    and the total cache size in elements.
+    """
+    block = H_kv * L * D_h
+    desc = np.zeros((NL, 4), dtype=np.int32)
+    for ly in range(NL):
+        desc[ly] = (2 * ly * block, (2 * ly + 1) * block, L * D_h, D_h)
+    return desc, 2 * NL * block
+
+
+def kv_cache_view(kv_cache, kv_desc, ly: int, H_kv: int, L: int, D_h: int):
+    """(K, V) of layer ly as [H_kv, L, D_h] arrays, following kv_desc."""
+    k_base, v_base, head_stride, token_stride = (int(v) for v in kv_desc[ly])
+    h = np.arange(H_kv)[:, None, None] * head_stride
+    i = np.arange(L)[None, :, None] * token_stride
+    d = np.arange(D_h)[None, None, :]
+    return kv_cache[k_base + h + i + d], kv_cache[v_base + h + i + d]
+
+
+def backbone_prefill[
+    T: (int4, int8),
+    NL: int16,    # Text layers (16)
+    L: int16,     # Prefix tokens, padded to a multiple of P
+    D: int16,     # Hidden size (960)
+    H_q: int16,   # Query heads (15)
+    H_kv: int16,  # KV heads (5)
+    D_h: int16,   # Head dim (64)
+    F: int16,     # SwiGLU width (2560)
+    Tn: int16,    # Output features per weight tile
+    P: int16,     # Attention row parallelism
+    KV: int32     # kv_cache size in elements (make_kv_descriptors)
+](
+    X: "T[L, D]",
+    seg: "int16[L]",                 # attention_masks.segment_ids
+    W_q: "T[NL, D, H_q * D_h]",      # All weights [in, out]
+    W_k: "T[NL, D, H_kv * D_h]",
+    W_v: "T[NL, D, H_kv * D_h]",
+    W_o: "T[NL, H_q * D_h, D]",
+    W_gate: "T[NL, D, F]",
+    W_up: "T[NL, D, F]",
+    W_down: "T[NL, F, D]",
+    rms1_q: "float32[NL, D]",        # fold_rmsnorm_params gamma_q
+    rms2_q: "float32[NL, D]",
+    eps_q: float32,
+    rq_mult: "int32[NL, 7]",         # per-layer requant, RQ_* slots
+    rq_shift: "int32[NL, 7]",
+    scale: float32,                  # sqrt(D_h)
+    act_scale: float32,              # real value of one gate LSB
+    q_min: int32,
+    q_max: int32,
+    kv_desc: "int32[NL, 4]",         # make_kv_descriptors
+    kv_cache: "T[KV]",               # Output to HBM, read by the expert
+    out: "int32[L, D]"               # Final residual stream
+):
+    # Resident activations
+    res: "int32[L, D]"
+    x_ln: "T[L, D]"
+    q: "T[L, H_q * D_h]"
+    k_loc: "T[L, H_kv * D_h]"
+    v_loc: "T[L, H_kv * D_h]"
+    attn: "T[L, H_q * D_h]"
+    hid: "T[L, F]"
+
+    for i0, d0 in allo.grid(L, D, name="load_x"):
+        res[i0, d0] = X[i0, d0]
+
+    for ly in allo.grid(NL, name="layer"):
+        # ===== RMSNorm1: res -> x_ln =====
+        gamma1: "float32[D]"
+        for j1 in allo.grid(D, name="rms1_gamma"):
+            gamma1[j1] = rms1_q[ly, j1]
+        rmsnorm[T, L, D, "rms1"](res, gamma1, eps_q, q_min, q_max, x_ln)
+
+        # ===== Q projection =====
+        for nt0 in allo.grid(H_q * D_h // Tn, name="q_tile"):
+            w0_buf: "T[D, Tn]"
+            for k0, j0 in allo.grid(D, Tn, name="q_load_w"):
+                w0_buf[k0, j0] = W_q[ly, k0, nt0 * Tn + j0]
+            for i2, j3 in allo.grid(L, Tn, name="q_row"):
+                n0: int32 = nt0 * Tn + j3
+                acc0: int32 = 0
+                for k1 in allo.reduction(D, name="q_k"):
+                    xa0: int32 = x_ln[i2, k1]
+                    wa0: int32 = w0_buf[k1, j3]
+                    acc0 += xa0 * wa0
+                yq0: int32 = requant_value(acc0, rq_mult[ly, 0], rq_shift[ly, 0], 0, q_min, q_max)
+                q[i2, n0] = yq0
+
+        # ===== K / V projection, written on chip and to the HBM cache =====
+        for nt1 in allo.grid(H_kv * D_h // Tn, name="kv_tile"):
+            wk_buf: "T[D, Tn]"
+            wv_buf: "T[D, Tn]"
+            for k2, j4 in allo.grid(D, Tn, name="kv_load_w"):
+                wk_buf[k2, j4] = W_k[ly, k2, nt1 * Tn + j4]
+                wv_buf[k2, j4] = W_v[ly, k2, nt1 * Tn + j4]
+            for i3, j5 in allo.grid(L, Tn, name="kv_row"):
+                n1: int32 = nt1 * Tn + j5
+                acck: int32 = 0
+                accv: int32 = 0
+                for k3 in allo.reduction(D, name="kv_k"):
+                    xa1: int32 = x_ln[i3, k3]
+                    wk1: int32 = wk_buf[k3, j5]
+                    wv1: int32 = wv_buf[k3, j5]
+                    acck += xa1 * wk1
+                    accv += xa1 * wv1
+                yk: int32 = requant_value(acck, rq_mult[ly, 1], rq_shift[ly, 1], 0, q_min, q_max)
+                yv: int32 = requant_value(accv, rq_mult[ly, 2], rq_shift[ly, 2], 0, q_min, q_max)
+                k_loc[i3, n1] = yk
+                v_loc[i3, n1] = yv
+                off: int32 = (n1 // D_h) * kv_desc[ly, 2] + i3 * kv_desc[ly, 3] + n1 % D_h
+                kv_cache[kv_desc[ly, 0] + off] = yk
+                kv_cache[kv_desc[ly, 1] + off] = yv
+
+        # ===== Masked GQA attention, P query rows at a time =====
+        for h, io in allo.grid(H_q, L // P, name="head_rows"):
+            g: int32 = h // (H_q // H_kv)
+            scores: "float32[P, L]"
+            row_max: "float32[P]"
+            row_sum: "float32[P]"
+            probs: "int16[P, L]"
+            for p0 in allo.grid(P, name="score_p"):
+                iq: int32 = io * P + p0
+                row_max[p0] = -1.0 / 0.0
+                for j6 in allo.grid(L, name="score_j"):
+                    sf: float32 = -1.0 / 0.0
+                    if seg[j6] <= seg[iq]:
+                        sacc: int32 = 0
+                        for k4 in allo.reduction(D_h, name="score_k"):
+                            qv: int32 = q[iq, h * D_h + k4]
+                            kv: int32 = k_loc[j6, g * D_h + k4]
+                            sacc += qv * kv
+                        sf = sacc
+                        sf = sf / scale
+                    if sf > row_max[p0]:
+                        row_max[p0] = sf
+                    scores[p0, j6] = sf
+            for p1 in allo.grid(P, name="exp_init"):
+                row_sum[p1] = 0.0
+            for j7, p2 in allo.grid(L, P, name="exp_jp"):
+                ev: float32 = allo.exp(scores[p2, j7] - row_max[p2])
+                scores[p2, j7] = ev
+                row_sum[p2] += ev
+            for p3, j8 in allo.grid(P, L, name="norm_pj"):
+                q15: float32 = scores[p3, j8] / row_sum[p3] * 32768.0
+                if q15 > 32767.0:
+                    q15 = 32767.0
+                probs[p3, j8] = q15
+            for p4, d1 in allo.grid(P, D_h, name="pv_pd"):
+                pacc: int32 = 0
+                for j9 in allo.reduction(L, name="pv_j"):
+                    pw: int32 = probs[p4, j9]
+                    vv: int32 = v_loc[j9, g * D_h + d1]
+                    pacc += pw * vv
+                attn[io * P + p4, h * D_h + d1] = pacc >> 15
+
+        # ===== o_proj + residual: res += o =====
+        for nt2 in allo.grid(D // Tn, name="o_tile"):
+            wo_buf: "T[H_q * D_h, Tn]"
+            for k5, j10 in allo.grid(H_q * D_h, Tn, name="o_load_w"):
+                wo_buf[k5, j10] = W_o[ly, k5, nt2 * Tn + j10]
+            for i4, j11 in allo.grid(L, Tn, name="o_row"):
+                n2: int32 = nt2 * Tn + j11
+                acc2: int32 = 0
+                for k6 in allo.reduction(H_q * D_h, name="o_k"):
+                    xa2: int32 = attn[i4, k6]
+                    wa2: int32 = wo_buf[k6, j11]
+                    acc2 += xa2 * wa2
+                yq2: int32 = requant_value(acc2, rq_mult[ly, 3], rq_shift[ly, 3], 0, q_min, q_max)
+                res[i4, n2] = res[i4, n2] + yq2
+
+        # ===== RMSNorm2: res -> x_ln =====
+        gamma2: "float32[D]"
+        for j12 in allo.grid(D, name="rms2_gamma"):
+            gamma2[j12] = rms2_q[ly, j12]
+        rmsnorm[T, L, D, "rms2"](res, gamma2, eps_q, q_min, q_max, x_ln)
+
+        # ===== gate / up + SiLU(gate) * up =====
+        for nt3 in allo.grid(F // Tn, name="gate_up_tile"):
+            wg_buf: "T[D, Tn]"
+            wu_buf: "T[D, Tn]"
+            for k7, j14 in allo.grid(D, Tn, name="gate_up_load_w"):
+                wg_buf[k7, j14] = W_gate[ly, k7, nt3 * Tn + j14]
+                wu_buf[k7, j14] = W_up[ly, k7, nt3 * Tn + j14]
+            for i6, j15 in allo.grid(L, Tn, name="gate_up_row"):
+                n3: int32 = nt3 * Tn + j15
+                accg: int32 = 0
+                accu: int32 = 0
+                for k8 in allo.reduction(D, name="gate_up_k"):
+                    xa3: int32 = x_ln[i6, k8]
+                    wg3: int32 = wg_buf[k8, j15]
+                    wu3: int32 = wu_buf[k8, j15]
+                    accg += xa3 * wg3
+                    accu += xa3 * wu3
+                yg: int32 = requant_value(accg, rq_mult[ly, 4], rq_shift[ly, 4], 0, q_min, q_max)
+                yu: int32 = requant_value(accu, rq_mult[ly, 5], rq_shift[ly, 5], 0, q_min, q_max)
+                gf: float32 = yg
+                gf = gf * act_scale
+                uf: float32 = yu
+                hv: float32 = gf / (1.0 + allo.exp(-gf)) * uf
+                if hv > q_max:
+                    hv = q_max
+                if hv < q_min:
+                    hv = q_min
+                hid[i6, n3] = hv
+
+        # ===== down_proj + residual: res += down =====
+        for nt4 in allo.grid(D // Tn, name="down_tile"):
+            wd_buf: "T[F, Tn]"
+            for k9, j16 in allo.grid(F, Tn, name="down_load_w"):
+                wd_buf[k9, j16] = W_down[ly, k9, nt4 * Tn + j16]
+            for i7, j17 in allo.grid(L, Tn, name="down_row"):
+                n4: int32 = nt4 * Tn + j17
+                acc4: int32 = 0
+                for k10 in allo.reduction(F, name="down_k"):
+                    xa4: int32 = hid[i7, k10]
+                    wa4: int32 = wd_buf[k10, j17]
+                    acc4 += xa4 * wa4
+                yq4: int32 = requant_value(acc4, rq_mult[ly, 6], rq_shift[ly, 6], 0, q_min, q_max)
+                res[i7, n4] = res[i7, n4] + yq4
+
+    for i8, d2 in allo.grid(L, D, name="store_out"):
+        out[i8, d2] = res[i8, d2]
+
+
+def backbone_prefill_np(X, seg, W_q, W_k, W_v, W_o, W_gate, W_up, W_down,
+                        rms1_q, rms2_q, eps_q, rq_mult, rq_shift,
+                        H_q, H_kv, scale, act_scale, q_min=-128, q_max=127):
+    """
+    Numpy reference for backbone_prefill.
+    Returns (K, V) as [NL, H_kv, L, D_h] and the final residual stream.
+    """
+    NL = W_q.shape[0]
+    L = X.shape[0]
+    D_h = W_q.shape[2] // H_q
+    G = H_q // H_kv
+    mask = seg[None, :] <= seg[:, None]
+    K_all = np.zeros((NL, H_kv, L, D_h), dtype=np.int64)
+    V_all = np.zeros((NL, H_kv, L, D_h), dtype=np.int64)
+    x = X.astype(np.int64)
+    for ly in range(NL):
+        def rq(acc, slot):
+            return requant_np(acc, rq_mult[ly, slot], rq_shift[ly, slot], 0, q_min, q_max)
+
+        x_ln = rmsnorm_np(x, rms1_q[ly], eps_q, q_min, q_max).astype(np.int64)
+        q = rq(x_ln @ W_q[ly].astype(np.int64), RQ_Q)
+        k = rq(x_ln @ W_k[ly].astype(np.int64), RQ_K)
+        v = rq(x_ln @ W_v[ly].astype(np.int64), RQ_V)
+        K_all[ly] = k.reshape(L, H_kv, D_h).transpose(1, 0, 2)
+        V_all[ly] = v.reshape(L, H_kv, D_h).transpose(1, 0, 2)
+
+        attn = np.zeros((L, H_q * D_h), dtype=np.int64)
+        for h in range(H_q):
+            g = h // G
+            s = (q[:, h * D_h:(h + 1) * D_h] @ K_all[ly, g].T).astype(np.float32) / np.float32(scale)
+            s = np.where(mask, s, -np.inf)
+            e = np.exp(s - s.max(axis=-1, keepdims=True))
+            p = np.minimum(e / e.sum(axis=-1, keepdims=True) * np.float32(32768.0), 32767.0)
+            attn[:, h * D_h:(h + 1) * D_h] = (np.trunc(p).astype(np.int64) @ V_all[ly, g]) >> 15
+        x = x + rq(attn @ W_o[ly].astype(np.int64), RQ_O)
+
+        x_ln = rmsnorm_np(x, rms2_q[ly], eps_q, q_min, q_max).astype(np.int64)
+        gate = rq(x_ln @ W_gate[ly].astype(np.int64), RQ_GATE).astype(np.float32) * np.float32(act_scale)
+        up = rq(x_ln @ W_up[ly].astype(np.int64), RQ_UP).astype(np.float32)
+        hid = np.trunc(np.clip(gate / (np.float32(1.0) + np.exp(-gate)) * up, q_min, q_max)).astype(np.int64)
+        x = x + rq(hid @ W_down[ly].astype(np.int64), RQ_DOWN)
+    return K_all, V_all, x
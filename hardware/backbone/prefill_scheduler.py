@@ -0,0 +1,159 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backbone.prefill import (
+    backbone_prefill,
+    backbone_prefill_np,
+    make_kv_descriptors,
+    kv_cache_view,
+    RQ_SLOTS,
+)
+from common_kernels.requant import make_requant_params, quant_range
+from common_kernels.rmsnorm import rmsnorm, fold_rmsnorm_params
+from attention.self_attention.attention_masks import smolvla_att_flags, segment_ids
+from attention.config import VLMBackboneConfig as VBC
+
+
+def pad_prefix(L: int, P: int):
+    """Prefix length rounded up to a multiple of the attention row parallelism."""
+    return -(-L // P) * P
+
+
+def make_prefill_inputs(N_T: np.dtype, NL: int, L: int, D: int, H_q: int, H_kv: int,
+                        D_h: int, F: int, seg=None, seed: int = 0):
+    """Random prefix, weight tables, folded RMSNorm params and requant params for backbone_prefill."""
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-8, 8, (L, D)).astype(N_T)
+    if seg is None:
+        seg = segment_ids(np.ones(L, dtype=np.int32))   # causal
+    W_q = rng.integers(-8, 8, (NL, D, H_q * D_h)).astype(N_T)
+    W_k = rng.integers(-8, 8, (NL, D, H_kv * D_h)).astype(N_T)
+    W_v = rng.integers(-8, 8, (NL, D, H_kv * D_h)).astype(N_T)
+    W_o = rng.integers(-8, 8, (NL, H_q * D_h, D)).astype(N_T)
+    W_gate = rng.integers(-8, 8, (NL, D, F)).astype(N_T)
+    W_up = rng.integers(-8, 8, (NL, D, F)).astype(N_T)
+    W_down = rng.integers(-8, 8, (NL, F, D)).astype(N_T)
+    # Residual LSB s_in = 1/16, RMSNorm output LSB 1/32
+    rms1_q = np.stack([fold_rmsnorm_params(rng.uniform(0.5, 1.5, D), 1 / 16, 1 / 32)[0] for _ in range(NL)])
+    rms2_q = np.stack([fold_rmsnorm_params(rng.uniform(0.5, 1.5, D), 1 / 16, 1 / 32)[0] for _ in range(NL)])
+    eps_q = fold_rmsnorm_params(np.ones(1), 1 / 16, 1 / 32)[1]
+    # Scales keep each projection inside the int8 range for these inputs;
+    # V gets a finer LSB than K so the two cache scales differ
+    rq_mult = np.zeros((NL, RQ_SLOTS), dtype=np.int32)
+    rq_shift = np.zeros((NL, RQ_SLOTS), dtype=np.int32)
+    for ly in range(NL):
+        rq_mult[ly], rq_shift[ly] = make_requant_params([
+            1.0 / (4 * np.sqrt(D)), 1.0 / (4 * np.sqrt(D)), 1.0 / (8 * np.sqrt(D)),
+            1.0 / (6 * np.sqrt(H_q * D_h)),
+            1.0 / (4 * np.sqrt(D)), 1.0 / (4 * np.sqrt(D)), 1.0 / (6 * np.sqrt(F)),
+        ])
+    return (X, seg, W_q, W_k, W_v, W_o, W_gate, W_up, W_down,
+            rms1_q, rms2_q, eps_q, rq_mult, rq_shift)
+
+
+def _schedule_rmsnorm(A_T, L: int, D: int):
+    """common_kernels.rmsnorm with both row passes pipelined, composed as "rms1" / "rms2"."""
+    s_rms = allo.customize(rmsnorm, instantiate=[A_T, L, D])
+    loops = s_rms.get_loops()["rms_row"]
+    s_rms.pipeline(loops["j0"])
+    s_rms.pipeline(loops["j1"])
+    return s_rms
+
+
+def schedule_backbone_prefill(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    NL: int = VBC.NUM_LAYERS,
+    L: int = VBC.NUM_TOKENS,
+    D: int = VBC.HIDDEN_DIM,
+    H_q: int = VBC.NUM_Q_HEADS,
+    H_kv: int = VBC.NUM_KV_HEADS,
+    D_h: int = VBC.HEAD_DIM,
+    F: int = VBC.INTERMEDIATE_DIM,
+    Tn: int = 16,
+    P: int = 4,
+    mode: str = "csyn"
+):
+    """
+    Prefix prefill over all NL backbone layers (prefill.backbone_prefill).
+
+    L is padded to a multiple of P; the padding tokens get PAD_SEGMENT so no
+    real token attends to them. kv_cache has its own HBM channel and is
+    the buffer action_expert.prefix_kv.prefix_kv_adapter reads to build the
+    expert's ctx_K / ctx_V.
+    """
+    L_pad = pad_prefix(L, P)
+    kv_desc, KV = make_kv_descriptors(NL, H_kv, L_pad, D_h)
+    s = allo.customize(backbone_prefill, instantiate=[A_T, NL, L_pad, D, H_q, H_kv, D_h, F, Tn, P, KV])
+
+    for buf in (s.w0_buf, s.wk_buf, s.wv_buf, s.wo_buf, s.wg_buf, s.wu_buf, s.wd_buf):
+        s.partition(buf, partition.Complete, dim=2)
+    s.partition(s.row_max, partition.Complete, dim=1)
+    s.partition(s.row_sum, partition.Complete, dim=1)
+    for rms in ("rms1", "rms2"):
+        s.compose(_schedule_rmsnorm(A_T, L_pad, D), id=rms)
+
+    loops = s.get_loops("backbone_prefill")
+    layer = loops["layer"]
+    for name in ("j0", "j4", "j10", "j14", "j16"):      # weight tile loads
+        s.pipeline(layer[name])
+    for name in ("j1", "j12"):                          # RMSNorm gamma rows
+        s.pipeline(layer[name])
+    for name in ("k1", "k3", "k6", "k8", "k10"):        # projections
+        s.pipeline(layer[name])
+    for name in ("k4", "p2", "j8", "j9"):               # attention
+        s.pipeline(layer[name])
+    s.pipeline(loops["load_x"]["d0"])
+    s.pipeline(loops["store_out"]["d2"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"backbone_prefill_{NL}l_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    q_min, q_max = quant_range(4 if A_T == int4 else 8)
+    scale, act_scale = float(np.sqrt(D_h)), 1.0 / 16
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            seg = segment_ids(smolvla_att_flags(include_actions=False)[:L], pad_to=L_pad)
+            args = make_prefill_inputs(N_T, NL, L_pad, D, H_q, H_kv, D_h, F, seg=seg)
+            kv_cache = np.zeros(KV, dtype=N_T)
+            out = np.zeros((L_pad, D), dtype=np.int32)
+            s_llvm(*args, scale, act_scale, q_min, q_max, kv_desc, kv_cache, out)
+            K_ref, V_ref, _ = backbone_prefill_np(*args, H_q, H_kv, scale, act_scale, q_min, q_max)
+            for ly in range(NL):
+                K, V = kv_cache_view(kv_cache, kv_desc, ly, H_kv, L_pad, D_h)
+                print(f"layer {ly}: K max |diff| {np.abs(K - K_ref[ly]).max()}, "
+                      f"V max |diff| {np.abs(V - V_ref[ly]).max()}")
+            return kv_cache, s
+        case "csyn":
+            hbm_mapping = {
+                "X": 0,
+                "W_q": 1,
+                "W_k": 2,
+                "W_v": 3,
+                "W_o": 4,
+                "W_gate": 5,
+                "W_up": 6,
+                "W_down": 7,
+                "kv_cache": 8,
+                "out": 9,
+            }
+            s.build(
+                target="vitis_hls",
+                mode="csyn",
+                project=project_name,
+                configs={"hbm_mapping": hbm_mapping},
+            )()
+            return s, s
+
+
+if __name__ == "__main__":
+    print(f"\n=== SmolLM2 prefill, {VBC.NUM_LAYERS} layers x {VBC.NUM_TOKENS} tokens, int8 ===")
+    schedule_backbone_prefill(np.int8, int8, mode="csyn")
+
+    # schedule_backbone_prefill(np.int8, int8, NL=2, L=16, D=64, H_q=6, H_kv=2, D_h=8, F=96,
+    #                           Tn=8, P=4, mode="llvm")
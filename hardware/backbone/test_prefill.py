@@ -0,0 +1,115 @@
+"""
+Test for backbone_prefill - SmolLM2 prefix prefill with HBM K/V cache (llvm mode)
+
+The cache is read back through kv_desc / kv_cache_view and compared with the
+reference K/V per layer, and the final residual stream with the reference's.
+RMSNorm and softmax run in float32 in both, with different summation order,
+so later layers may differ by a few LSB.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from backbone.prefill import backbone_prefill, backbone_prefill_np, make_kv_descriptors, kv_cache_view, RQ_K, RQ_V
+from backbone.prefill_scheduler import make_prefill_inputs
+from attention.self_attention.attention_masks import segment_ids
+from common_kernels.requant import make_requant_params, quant_range
+
+
+def _prefix_seg(L_real, L):
+    """Bidirectional block + one state token, padded to L."""
+    flags = np.zeros(L_real, dtype=np.int32)
+    flags[-1] = 1
+    return segment_ids(flags, pad_to=L)
+
+
+@pytest.mark.parametrize("NL, L, L_real, D, H_q, H_kv, D_h, F, Tn, P", [
+    (1, 8, 8, 32, 4, 2, 8, 48, 8, 4),
+    (2, 12, 10, 32, 6, 2, 4, 48, 8, 4),
+])
+def test_prefill_kv_cache_vs_numpy(NL, L, L_real, D, H_q, H_kv, D_h, F, Tn, P):
+    kv_desc, KV = make_kv_descriptors(NL, H_kv, L, D_h)
+    args = make_prefill_inputs(np.int8, NL, L, D, H_q, H_kv, D_h, F, seg=_prefix_seg(L_real, L), seed=1)
+    q_min, q_max = quant_range(8)
+    scale, act_scale = float(np.sqrt(D_h)), 1.0 / 16
+
+    s = allo.customize(backbone_prefill, instantiate=[int8, NL, L, D, H_q, H_kv, D_h, F, Tn, P, KV])
+    kv_cache = np.zeros(KV, dtype=np.int8)
+    out = np.zeros((L, D), dtype=np.int32)
+    s.build()(*args, scale, act_scale, q_min, q_max, kv_desc, kv_cache, out)
+
+    K_ref, V_ref, out_ref = backbone_prefill_np(*args, H_q, H_kv, scale, act_scale, q_min, q_max)
+    for ly in range(NL):
+        K, V = kv_cache_view(kv_cache, kv_desc, ly, H_kv, L, D_h)
+        for got, ref in ((K, K_ref[ly]), (V, V_ref[ly])):
+            diff = np.abs(got[:, :L_real].astype(np.int64) - ref[:, :L_real])
+            assert diff.mean() <= 0.25, f"layer {ly}: mean diff {diff.mean():.3f}"
+            assert diff.max() <= 4, f"layer {ly}: max diff {diff.max()}"
+
+    # Residual stream after NL layers: each layer adds two requantized outputs
+    diff = np.abs(out[:L_real].astype(np.int64) - out_ref[:L_real])
+    assert diff.mean() <= 0.25 * NL, f"out: mean diff {diff.mean():.3f}"
+    assert diff.max() <= 4 * NL, f"out: max diff {diff.max()}"
+
+
+def test_prefill_kv_separate_scales():
+    """K and V are requantized with their own RQ_K / RQ_V slots."""
+    NL, L, D, H_q, H_kv, D_h, F, Tn, P = 1, 8, 32, 4, 2, 8, 48, 8, 4
+    kv_desc, KV = make_kv_descriptors(NL, H_kv, L, D_h)
+    args = list(make_prefill_inputs(np.int8, NL, L, D, H_q, H_kv, D_h, F, seed=3))
+    args[4] = args[3].copy()                     # W_v = W_k
+    rq_mult, rq_shift = args[12].copy(), args[13].copy()
+    base = 1.0 / (4 * np.sqrt(D))
+    mult_kv, shift_kv = make_requant_params([base, base / 4])
+    rq_mult[0, [RQ_K, RQ_V]] = mult_kv
+    rq_shift[0, [RQ_K, RQ_V]] = shift_kv
+    args[12], args[13] = rq_mult, rq_shift
+    q_min, q_max = quant_range(8)
+    scale, act_scale = float(np.sqrt(D_h)), 1.0 / 16
+
+    s = allo.customize(backbone_prefill, instantiate=[int8, NL, L, D, H_q, H_kv, D_h, F, Tn, P, KV])
+    kv_cache = np.zeros(KV, dtype=np.int8)
+    s.build()(*args, scale, act_scale, q_min, q_max, kv_desc, kv_cache, np.zeros((L, D), dtype=np.int32))
+
+    # Same weights, V at a quarter of K's scale
+    K_ref, V_ref, _ = backbone_prefill_np(*args, H_q, H_kv, scale, act_scale, q_min, q_max)
+    K, V = kv_cache_view(kv_cache, kv_desc, 0, H_kv, L, D_h)
+    assert np.abs(K.astype(np.int64) - K_ref[0]).max() <= 1
+    assert np.abs(V.astype(np.int64) - V_ref[0]).max() <= 1
+    assert np.abs(K).max() > 2 * np.abs(V).max()
+
+
+def test_kv_descriptors_layout():
+    """Layer-major [K | V] blocks of [H_kv, L, D_h], no overlap."""
+    NL, H_kv, L, D_h = 3, 2, 5, 4
+    kv_desc, KV = make_kv_descriptors(NL, H_kv, L, D_h)
+    assert KV == 2 * NL * H_kv * L * D_h
+    cache = np.arange(KV)
+    seen = []
+    for ly in range(NL):
+        K, V = kv_cache_view(cache, kv_desc, ly, H_kv, L, D_h)
+        np.testing.assert_array_equal(K.ravel(), np.arange(H_kv * L * D_h) + kv_desc[ly, 0])
+        seen += [K.ravel(), V.ravel()]
+    np.testing.assert_array_equal(np.sort(np.concatenate(seen)), cache)
+
+
+def test_padding_does_not_change_real_tokens():
+    """PAD_SEGMENT tokens are invisible to real rows, so their K/V match the unpadded run."""
+    NL, L_real, L, D, H_q, H_kv, D_h, F = 2, 10, 12, 32, 6, 2, 4, 48
+    args = list(make_prefill_inputs(np.int8, NL, L, D, H_q, H_kv, D_h, F, seg=_prefix_seg(L_real, L), seed=2))
+    K_pad, V_pad, _ = backbone_prefill_np(*args, H_q, H_kv, 2.0, 1.0 / 16)
+    args[0] = args[0][:L_real]
+    args[1] = _prefix_seg(L_real, L_real)
+    K, V, _ = backbone_prefill_np(*args, H_q, H_kv, 2.0, 1.0 / 16)
+    np.testing.assert_array_equal(K_pad[:, :, :L_real], K)
+    np.testing.assert_array_equal(V_pad[:, :, :L_real], V)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
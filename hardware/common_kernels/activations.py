@@ -0,0 +1,154 @@
+"""
+Table-driven piecewise-linear (PWL) GELU / SiLU / tanh on int32 input.
+
+The input range [x_lo, x_lo + S * 2^seg_shift) (in input LSBs) is split into
+S equal segments. Entry 0 of the table is the left tail, entry S + 1 the
+right tail (each function's asymptote), and entries 1..S interpolate between
+exact values at the segment ends:
+
+    seg = clamp(((x - x_lo) >> seg_shift) + 1, 0, S + 1)
+    y   = ((slope[seg] * x) >> PWL_SLOPE_Q) + icept[seg]
+
+Input and output are integers with real scales s_in / s_out, folded into the
+table by make_pwl_table. Evaluation is one compare, one shift, one table read
+and one multiply-add, so it replaces the float cube + tanh of gelu_approx in
+the hot loop. pwl_error / pwl_tradeoff report accuracy versus S.
+"""
+
+import allo
+from allo.ir.types import int16, int32, int64, float32
+import numpy as np
+import math
+
+PWL_SLOPE_Q = 16   # fractional bits of slope
+
+
+def _gelu(x):
+    return 0.5 * x * (1.0 + np.tanh(0.7978845608028654 * (x + 0.044715 * x ** 3)))
+
+
+def _silu(x):
+    return x / (1.0 + np.exp(-x))
+
+
+# name -> (function, left tail (slope, icept), right tail (slope, icept)), real units
+PWL_FUNCTIONS = {
+    "gelu": (_gelu, (0.0, 0.0), (1.0, 0.0)),
+    "silu": (_silu, (0.0, 0.0), (1.0, 0.0)),
+    "tanh": (np.tanh, (0.0, -1.0), (0.0, 1.0)),
+}
+
+# Real-valued range interpolated by default; outside it the tails are within
+# ~1e-3 of the function
+PWL_DEFAULT_RANGE = {
+    "gelu": (-4.0, 4.0),
+    "silu": (-8.0, 8.0),
+    "tanh": (-4.0, 4.0),
+}
+
+
+def make_pwl_table(name: str, S: int = 64, x_lo: float = None, x_hi: float = None,
+                   s_in: float = 1.0, s_out: float = 1.0):
+    """
+    Build (slope int32[S + 2], icept int32[S + 2], x_lo_q, seg_shift).
+
+    x_lo / x_hi are real values (default PWL_DEFAULT_RANGE[name]). The segment
+    width is rounded up to a power of two input LSBs, so the covered range can
+    extend past x_hi.
+    """
+    if name not in PWL_FUNCTIONS:
+        raise ValueError(f"Unknown PWL function: {name} (expected one of {list(PWL_FUNCTIONS)})")
+    fn, (l_slope, l_icept), (r_slope, r_icept) = PWL_FUNCTIONS[name]
+    d_lo, d_hi = PWL_DEFAULT_RANGE[name]
+    x_lo = d_lo if x_lo is None else x_lo
+    x_hi = d_hi if x_hi is None else x_hi
+
+    x_lo_q = math.floor(x_lo / s_in)
+    span = math.ceil((x_hi - x_lo) / s_in)
+    seg_shift = max(0, math.ceil(math.log2(max(1, math.ceil(span / S)))))
+    seg_w = 1 << seg_shift
+
+    slope = np.zeros(S + 2, dtype=np.float64)   # output LSBs per input LSB
+    icept = np.zeros(S + 2, dtype=np.float64)   # output LSBs
+    slope[0], icept[0] = l_slope * s_in / s_out, l_icept / s_out
+    slope[S + 1], icept[S + 1] = r_slope * s_in / s_out, r_icept / s_out
+    a = x_lo_q + seg_w * np.arange(S)
+    b = a + seg_w
+    ya = fn(a * s_in) / s_out
+    yb = fn(b * s_in) / s_out
+    slope[1:S + 1] = (yb - ya) / seg_w
+    icept[1:S + 1] = ya - slope[1:S + 1] * a
+
+    slope_q = np.round(slope * (1 << PWL_SLOPE_Q)).astype(np.int32)
+    icept_q = np.round(icept).astype(np.int32)
+    return slope_q, icept_q, int(x_lo_q), int(seg_shift)
+
+
+def pwl_activation[
+    L: int16,
+    D: int16,
+    S: int16    # Interpolated segments (table has S + 2 entries)
+](
+    x: "int32[L, D]",
+    slope: "int32[S + 2]",
+    icept: "int32[S + 2]",
+    x_lo: int32,
+    seg_shift: int32,
+    out: "int32[L, D]"
+):
+    for i, j in allo.grid(L, D, name="pwl"):
+        xv: int32 = x[i, j]
+        seg: int32 = 0
+        if xv >= x_lo:
+            seg = ((xv - x_lo) >> seg_shift) + 1
+            if seg > S + 1:
+                seg = S + 1
+        slope_w: int64 = slope[seg]
+        prod: int64 = slope_w * xv
+        out[i, j] = (prod >> 16) + icept[seg]
+
+
+def pwl_np(x, slope, icept, x_lo, seg_shift):
+    """Bit-accurate numpy twin of pwl_activation."""
+    x = np.asarray(x).astype(np.int64)
+    S = len(slope) - 2
+    seg = np.where(x >= x_lo, np.minimum(((x - x_lo) >> seg_shift) + 1, S + 1), 0)
+    y = ((slope.astype(np.int64)[seg] * x) >> PWL_SLOPE_Q) + icept.astype(np.int64)[seg]
+    return y.astype(np.int32)
+
+
+def pwl_error(name: str, S: int = 64, x_lo: float = None, x_hi: float = None,
+              s_in: float = 1.0 / 256, s_out: float = 1.0 / 256):
+    """
+    Max and mean absolute error (real units) of the S-segment table against
+    the float function, swept over every input LSB in twice the table range.
+    """
+    slope, icept, x_lo_q, seg_shift = make_pwl_table(name, S, x_lo, x_hi, s_in, s_out)
+    width = S << seg_shift
+    x = np.arange(x_lo_q - width // 2, x_lo_q + width + width // 2, dtype=np.int64)
+    y = pwl_np(x, slope, icept, x_lo_q, seg_shift) * s_out
+    ref = PWL_FUNCTIONS[name][0](x * s_in)
+    err = np.abs(y - ref)
+    return float(err.max()), float(err.mean())
+
+
+def pwl_tradeoff(names=("gelu", "silu", "tanh"), segments=(8, 16, 32, 64, 128),
+                 s_in: float = 1.0 / 256, s_out: float = 1.0 / 256):
+    """Print max / mean error per (function, S)."""
+    print(f"{'fn':>6} {'S':>5} {'max err':>10} {'mean err':>10}")
+    for name in names:
+        for S in segments:
+            max_err, mean_err = pwl_error(name, S, s_in=s_in, s_out=s_out)
+            print(f"{name:>6} {S:>5} {max_err:>10.2e} {mean_err:>10.2e}")
+
+
+if __name__ == "__main__":
+    pwl_tradeoff()
+
+    L, D, S = 8, 64, 32
+    slope, icept, x_lo, seg_shift = make_pwl_table("gelu", S, s_in=1.0 / 256, s_out=1.0 / 256)
+    x = np.random.randint(-2048, 2048, (L, D)).astype(np.int32)
+    out = np.zeros((L, D), dtype=np.int32)
+    s = allo.customize(pwl_activation, instantiate=[L, D, S])
+    s.build()(x, slope, icept, x_lo, seg_shift, out)
+    print(f"bit-exact vs pwl_np: {np.array_equal(out, pwl_np(x, slope, icept, x_lo, seg_shift))}")
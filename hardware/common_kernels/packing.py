@@ -0,0 +1,51 @@
+"""Host-side helpers for the packed int4 weight format.
+
+Two signed 4-bit weights share one byte along the last (reduction) axis:
+
+    byte[..., k] = (w[..., 2k] & 0xF) | (w[..., 2k + 1] << 4)
+
+so a 512-bit HBM beat carries 128 weights instead of 64. Kernels read the
+byte as int8 and sign-extend each nibble with ((nibble ^ 8) - 8).
+"""
+
+import numpy as np
+
+INT4_MIN = -8
+INT4_MAX = 7
+INT4_PER_BYTE = 2
+INT4_PER_BEAT = 512 // 4   # weights per 512-bit HBM beat
+
+
+def pack_int4(w):
+    """Pack int4 values (stored in any int array) along the last axis.
+
+    The last axis must be even. Returns int8 with the last axis halved.
+    """
+    w = np.asarray(w)
+    if w.shape[-1] % INT4_PER_BYTE != 0:
+        raise ValueError(f"last axis must be even to pack int4, got {w.shape[-1]}")
+    if w.min(initial=0) < INT4_MIN or w.max(initial=0) > INT4_MAX:
+        raise ValueError(f"values out of int4 range [{INT4_MIN}, {INT4_MAX}]")
+    w = w.astype(np.int16)
+    lo = w[..., 0::2] & 0xF
+    hi = (w[..., 1::2] & 0xF) << 4
+    return (lo | hi).astype(np.uint8).view(np.int8)
+
+
+def unpack_int4(packed):
+    """Inverse of pack_int4. Returns int8 with the last axis doubled."""
+    b = np.asarray(packed).view(np.uint8).astype(np.int16)
+    lo = ((b & 0xF) ^ 8) - 8
+    hi = (((b >> 4) & 0xF) ^ 8) - 8
+    out = np.empty(b.shape[:-1] + (b.shape[-1] * INT4_PER_BYTE,), dtype=np.int8)
+    out[..., 0::2] = lo
+    out[..., 1::2] = hi
+    return out
+
+
+def packed_bytes(num_weights: int):
+    """HBM bytes for num_weights int4 weights in the packed format."""
+    return -(-num_weights // INT4_PER_BYTE)
+
+
+__all__ = ["pack_int4", "unpack_int4", "packed_bytes", "INT4_PER_BEAT"]
@@ -0,0 +1,123 @@
+"""
+Per-channel requantization: int32 accumulator -> int8 / int4.
+
+For output channel n with real scale s_n = s_acc * s_w[n] / s_out:
+
+    s_n = mult[n] * 2^-31 * 2^-shift[n],   mult in [2^30, 2^31)
+    y   = clamp(round(acc * s_n) + zero_point, q_min, q_max)
+
+round() is half away from zero on the int64 product, so the kernel needs no
+floating point. make_requant_params turns float scales into (mult, shift),
+quant_range gives (q_min, q_max) for 8- or 4-bit outputs, and requant_np is
+the bit-exact reference.
+
+requant_value is the epilogue for one accumulator. Kernels that fuse the
+requant into their store call it per element (matrix_multiplies.mm_tiled /
+mm_transpose_tiled and mlp.mlp_swiglu with RQ = 1, the vision / backbone
+kernels); requantize applies it to a whole int32 tensor. Kernels with an
+optional epilogue still take the requant arguments when RQ = 0;
+no_requant_args fills them.
+"""
+
+import allo
+from allo.ir.types import int4, int8, int16, int32, int64
+import numpy as np
+import math
+
+REQUANT_Q = 31   # fractional bits of mult
+
+
+def quant_range(bits: int = 8):
+    """(q_min, q_max) of a signed `bits`-bit integer."""
+    return -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+
+def make_requant_params(scales):
+    """Per-channel float scales -> (mult int32[N], shift int32[N])."""
+    scales = np.atleast_1d(np.asarray(scales, dtype=np.float64))
+    mult = np.zeros(scales.shape, dtype=np.int64)
+    shift = np.zeros(scales.shape, dtype=np.int64)
+    for n, s in enumerate(scales):
+        if s <= 0:
+            raise ValueError(f"requant scale must be positive, got {s} at channel {n}")
+        m, e = math.frexp(s)                 # s = m * 2^e, m in [0.5, 1)
+        q = int(round(m * (1 << REQUANT_Q)))
+        if q == 1 << REQUANT_Q:
+            q //= 2
+            e += 1
+        if not -30 <= -e <= 31:
+            raise ValueError(f"requant scale {s} out of range at channel {n}")
+        mult[n], shift[n] = q, -e
+    return mult.astype(np.int32), shift.astype(np.int32)
+
+
+def no_requant_args(N: int):
+    """Unused (mult, shift, zero_point, q_min, q_max) for an RQ = 0 kernel with N channels."""
+    return np.zeros(N, dtype=np.int32), np.zeros(N, dtype=np.int32), 0, 0, 0
+
+
+def requant_value(
+    acc: int32,
+    mult: int32,
+    shift: int32,
+    zero_point: int32,
+    q_min: int32,
+    q_max: int32
+) -> int32:
+    """clamp(round(acc * mult * 2^-(31 + shift)) + zero_point, q_min, q_max)."""
+    total: int32 = 31 + shift   # REQUANT_Q + shift
+    rnd: int64 = 1
+    rnd = rnd << (total - 1)
+    acc_w: int64 = acc
+    mult_w: int64 = mult
+    prod: int64 = acc_w * mult_w
+    y: int64 = 0
+    if prod >= 0:
+        y = (prod + rnd) >> total
+    else:
+        y = -((rnd - prod) >> total)
+    y += zero_point
+    if y > q_max:
+        y = q_max
+    if y < q_min:
+        y = q_min
+    res: int32 = y
+    return res
+
+
+def requantize[
+    T: (int4, int8),
+    L: int16,   # Rows
+    N: int16    # Output channels
+](
+    acc: "int32[L, N]",
+    mult: "int32[N]",
+    shift: "int32[N]",
+    zero_point: int32,
+    q_min: int32,
+    q_max: int32,
+    out: "T[L, N]"
+):
+    for i, n in allo.grid(L, N, name="requant"):
+        out[i, n] = requant_value(acc[i, n], mult[n], shift[n], zero_point, q_min, q_max)
+
+
+def requant_np(acc, mult, shift, zero_point: int = 0, q_min: int = -128, q_max: int = 127):
+    """Bit-exact numpy reference of requantize (channels on the last axis)."""
+    prod = np.asarray(acc).astype(np.int64) * mult.astype(np.int64)
+    total = REQUANT_Q + shift.astype(np.int64)
+    rnd = np.left_shift(np.int64(1), total - 1)
+    y = np.where(prod >= 0, (prod + rnd) >> total, -((rnd - prod) >> total))
+    return np.clip(y + zero_point, q_min, q_max)
+
+
+if __name__ == "__main__":
+    L, N = 16, 64
+    acc = np.random.randint(-(1 << 20), 1 << 20, (L, N)).astype(np.int32)
+    mult, shift = make_requant_params(np.random.uniform(1e-5, 1e-3, N))
+    q_min, q_max = quant_range(8)
+    out = np.zeros((L, N), dtype=np.int8)
+    s = allo.customize(requantize, instantiate=[int8, L, N])
+    s.build()(acc, mult, shift, 0, q_min, q_max, out)
+    ref = requant_np(acc, mult, shift, 0, q_min, q_max)
+    print(f"bit-exact vs requant_np: {np.array_equal(out, ref)}")
@@ -0,0 +1,131 @@
+"""
+RMSNorm for the SmolLM2 backbone and the action expert
+(input_layernorm / post_attention_layernorm, 64 norm layers per inference).
+
+    y = x / sqrt(mean(x^2) + eps) * gamma
+
+Inputs are int32 accumulators with scale s_in; outputs are int8 with scale
+s_out. Both scales are folded on the host (fold_rmsnorm_params):
+
+    gamma_q = gamma / s_out,  eps_q = eps / s_in^2
+
+so the kernel needs one sum-of-squares reduction and one reciprocal sqrt per
+row, and a single multiply per element. There is no mean pass as in
+layer_norm.
+
+rmsnorm              - standalone, int32[L, D] -> T[L, D] saturated to
+                       [q_min, q_max] (int8, or int4 for the backbone prefill)
+gemm_rmsnorm_epilogue - A @ W (+ residual) with the sum of squares taken as
+                       each output column finishes, so normalisation reuses
+                       the on-chip row instead of re-reading the tensor
+"""
+
+import allo
+from allo.ir.types import int4, int8, int16, int32, int64, float32
+import numpy as np
+
+
+def fold_rmsnorm_params(gamma, s_in: float, s_out: float, eps: float = 1e-5):
+    """Fold the in/out quant scales into (gamma_q float32[D], eps_q float)."""
+    gamma_q = (np.asarray(gamma, dtype=np.float64) / s_out).astype(np.float32)
+    return gamma_q, float(eps / (s_in * s_in))
+
+
+def rmsnorm[
+    T: (int4, int8),
+    L: int16,   # Number of rows (tokens)
+    D: int16    # Row length (hidden dim)
+](
+    x: "int32[L, D]",
+    gamma_q: "float32[D]",   # gamma / s_out
+    eps_q: float32,          # eps / s_in^2
+    q_min: int32,            # Output range (requant.quant_range)
+    q_max: int32,
+    out: "T[L, D]"
+):
+    for i in allo.grid(L, name="rms_row"):
+        sum_sq: int64 = 0
+        for j0 in allo.reduction(D, name="rms_sumsq"):
+            v: int64 = x[i, j0]
+            sum_sq += v * v
+        ms: float32 = sum_sq
+        inv_rms: float32 = 1.0 / allo.sqrt(ms / D + eps_q)
+
+        for j1 in allo.grid(D, name="rms_scale"):
+            xv: float32 = x[i, j1]
+            y: float32 = xv * inv_rms * gamma_q[j1]
+            y_r: float32 = y + 0.5 if y >= 0.0 else y - 0.5
+            if y_r > q_max:
+                y_r = q_max
+            if y_r < q_min:
+                y_r = q_min
+            out[i, j1] = y_r
+
+
+def gemm_rmsnorm_epilogue[
+    T: (int4, int8),
+    L: int16,   # Number of rows (tokens)
+    K: int16,   # GEMM reduction length
+    D: int16    # GEMM output / norm width
+](
+    A: "T[L, K]",
+    W: "T[K, D]",
+    residual: "int32[L, D]",     # Residual stream in (same scale as A @ W)
+    gamma_q: "float32[D]",
+    eps_q: float32,
+    res_out: "int32[L, D]",      # Residual stream out (A @ W + residual)
+    out: "int8[L, D]"            # RMSNorm(res_out), requantized
+):
+    """
+    Pre-norm block boundary: res_out = A @ W + residual, out = RMSNorm(res_out).
+
+    Each output column is added to the sum of squares as soon as its dot
+    product finishes, so the row never leaves the on-chip row buffer before
+    it is normalised.
+    """
+    for i in allo.grid(L, name="epi_row"):
+        row: "int32[D]"
+        sum_sq: int64 = 0
+        for n in allo.grid(D, name="epi_gemm"):
+            acc: int32 = residual[i, n]
+            for k in allo.reduction(K, name="epi_reduce"):
+                a_v: int32 = A[i, k]
+                w_v: int32 = W[k, n]
+                acc += a_v * w_v
+            row[n] = acc
+            res_out[i, n] = acc
+            acc_w: int64 = acc
+            sum_sq += acc_w * acc_w
+        ms: float32 = sum_sq
+        inv_rms: float32 = 1.0 / allo.sqrt(ms / D + eps_q)
+
+        for n1 in allo.grid(D, name="epi_scale"):
+            xv: float32 = row[n1]
+            y: float32 = xv * inv_rms * gamma_q[n1]
+            y_r: float32 = y + 0.5 if y >= 0.0 else y - 0.5
+            if y_r > 127.0:
+                y_r = 127.0
+            if y_r < -128.0:
+                y_r = -128.0
+            out[i, n1] = y_r
+
+
+def rmsnorm_np(x, gamma_q, eps_q, q_min: int = -128, q_max: int = 127):
+    """Numpy model of rmsnorm (float32 scale, round half away, saturate to [q_min, q_max])."""
+    x = np.asarray(x)
+    sum_sq = (x.astype(np.int64) ** 2).sum(axis=-1, keepdims=True)
+    inv_rms = np.float32(1.0) / np.sqrt(sum_sq.astype(np.float32) / np.float32(x.shape[-1]) + np.float32(eps_q))
+    y = x.astype(np.float32) * inv_rms * gamma_q.astype(np.float32)
+    y = np.where(y >= 0, y + np.float32(0.5), y - np.float32(0.5))
+    return np.clip(np.trunc(y), q_min, q_max).astype(np.int8)
+
+
+if __name__ == "__main__":
+    L, D = 16, 960
+    x = np.random.randint(-20000, 20000, (L, D)).astype(np.int32)
+    gamma_q, eps_q = fold_rmsnorm_params(np.random.rand(D) + 0.5, s_in=1e-3, s_out=0.05)
+    out = np.zeros((L, D), dtype=np.int8)
+    s = allo.customize(rmsnorm, instantiate=[int8, L, D])
+    s.build()(x, gamma_q, eps_q, -128, 127, out)
+    ref = rmsnorm_np(x, gamma_q, eps_q)
+    print(f"max |diff| vs numpy: {np.abs(out.astype(np.int32) - ref).max()}")
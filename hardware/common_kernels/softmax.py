@@ -1,5 +1,5 @@
 import allo
-from allo.ir.types import index, int4, int8, int16, int32, float32, bfloat16
+from allo.ir.types import index, int4, int8, int16, int32, int64, float32, bfloat16
 import numpy as np, math
 
 def np_softmax(x, axis=-1):
@@ -30,12 +30,124 @@ def softmax_baseline[
         for j3 in allo.grid(D):
             A[i0, j3] = A[i0, j3] / sum_exp_A
 
+
+# ----------------------------------------------------------------------------
+# Integer-only LUT softmax
+#
+# exp(x) is evaluated as 2^(-z) with z = (max - s) * log2(e) / scale held in
+# fixed point with log2(E) fractional bits:
+#     2^(-z) = exp_lut[z % E] >> (z // E),   exp_lut[r] = 2^15 * 2^(-r / E)
+# The row sum stays in int32 and 1/sum comes from a reciprocal table indexed
+# by the log2(R) bits below the leading one of the sum:
+#     sum = 2^n * (1 + m / R),  p = (e * recip_lut[m]) >> n
+# Output is Q15 (x32768) int16, the same format the float SDPA stages produce.
+# ----------------------------------------------------------------------------
+
+LUT_Q = 15          # exp_lut / recip_lut fixed-point bits
+LOG2E_FRAC = 16     # fractional bits of log2e_scale
+
+
+def make_exp_lut(E: int = 256):
+    """exp_lut[r] = round(2^15 * 2^(-r / E)), E a power of two."""
+    r = np.arange(E, dtype=np.float64)
+    return np.round((1 << LUT_Q) * np.exp2(-r / E)).astype(np.int32)
+
+
+def make_recip_lut(R: int = 256):
+    """recip_lut[m] = round(2^15 / (1 + (m + 0.5) / R)), R a power of two."""
+    m = np.arange(R, dtype=np.float64)
+    return np.round((1 << LUT_Q) / (1.0 + (m + 0.5) / R)).astype(np.int32)
+
+
+def make_log2e_scale(scale: float):
+    """log2(e) / scale in Q16, scale being the score divisor (sqrt(d_h))."""
+    return int(round(math.log2(math.e) / scale * (1 << LOG2E_FRAC)))
+
+
+def softmax_int_lut[
+    L: int16,   # Number of rows
+    D: int16,   # Row length
+    E: int16,   # exp_lut entries (power of two)
+    R: int16    # recip_lut entries (power of two)
+](
+    A: "int32[L, D]",           # Raw integer scores (unscaled)
+    exp_lut: "int32[E]",        # make_exp_lut(E)
+    recip_lut: "int32[R]",      # make_recip_lut(R)
+    log2e_scale: "int32",       # make_log2e_scale(scale)
+    out: "int16[L, D]"          # softmax(A / scale) * 32768
+):
+    for i in allo.grid(L, name="lut_row"):
+        max_val: int32 = A[i, 0]
+        for j0 in allo.grid(D, name="lut_max"):
+            if A[i, j0] > max_val:
+                max_val = A[i, j0]
+
+        # exp in the log2 domain, integer running sum
+        exp_row: "int32[D]"
+        sum_exp: int32 = 0
+        for j1 in allo.grid(D, name="lut_exp"):
+            diff: int64 = max_val - A[i, j1]
+            z: int64 = (diff * log2e_scale * E) >> 16
+            e_val: int32 = 0
+            if z < 16 * E:
+                q: int32 = z // E
+                r: int32 = z % E
+                e_val = exp_lut[r] >> q
+            exp_row[j1] = e_val
+            sum_exp += e_val
+
+        # Leading one of the sum (sum >= exp_lut[0], so n >= 15)
+        n: int32 = 0
+        for b in allo.grid(32, name="lut_lead"):
+            if (sum_exp >> b) != 0:
+                n = b
+        sum_wide: int64 = sum_exp
+        m: int32 = ((sum_wide * R) >> n) - R
+        recip: int64 = recip_lut[m]
+
+        for j2 in allo.grid(D, name="lut_norm"):
+            p: int64 = (exp_row[j2] * recip) >> n
+            if p > 32767:
+                p = 32767
+            out[i, j2] = p
+
+
+def softmax_int_lut_np(A, exp_lut, recip_lut, log2e_scale):
+    """Bit-accurate numpy model of softmax_int_lut. Returns int16 Q15 rows."""
+    E, R = len(exp_lut), len(recip_lut)
+    A = A.astype(np.int64)
+    diff = A.max(axis=-1, keepdims=True) - A
+    z = (diff * log2e_scale * E) >> LOG2E_FRAC
+    in_range = z < 16 * E
+    z = np.where(in_range, z, 0)
+    e = np.where(in_range, exp_lut[z % E].astype(np.int64) >> (z // E), 0)
+    total = e.sum(axis=-1, keepdims=True)
+    n = np.floor(np.log2(total)).astype(np.int64)
+    m = ((total * R) >> n) - R
+    p = (e * recip_lut[m].astype(np.int64)) >> n
+    return np.minimum(p, 32767).astype(np.int16)
+
+
+def softmax_int_lut_error(A, scale, E: int = 256, R: int = 256):
+    """Max absolute error of softmax_int_lut_np vs np_softmax(A / scale)."""
+    p = softmax_int_lut_np(A, make_exp_lut(E), make_recip_lut(R), make_log2e_scale(scale))
+    ref = np_softmax(A.astype(np.float64) / scale, axis=-1)
+    return float(np.max(np.abs(p / 32768.0 - ref)))
+
+
 if __name__ == "__main__":
     A = np.random.rand(10, 10).astype(np.float32)
     A2 = A.copy()
     out_A = np.zeros_like(A)
-    s = allo.customize(softmax, instantiate=[float32, 10, 10])
+    s = allo.customize(softmax_baseline, instantiate=[float32, 10, 10])
     # s.build(target="vitis_hls", mode="llvm", project="softmax.prj")
     s.build()(A)
 
-    print(np.allclose(A, np_softmax(A2, axis=1)))
\ No newline at end of file
+    print(np.allclose(A, np_softmax(A2, axis=1)))
+
+    # Integer LUT softmax error on int8 Q @ K^T scores (D_h = 64)
+    Q = np.random.randint(-128, 128, (64, 64)).astype(np.int32)
+    K = np.random.randint(-128, 128, (256, 64)).astype(np.int32)
+    for E, R in [(64, 64), (256, 256)]:
+        err = softmax_int_lut_error(Q @ K.T, math.sqrt(64), E, R)
+        print(f"softmax_int_lut E={E}, R={R}: max abs error {err:.2e}")
\ No newline at end of file
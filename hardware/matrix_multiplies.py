@@ -1,5 +1,6 @@
 import allo
-from allo.ir.types import int8, int16, float32, bfloat16, int32
+from allo.ir.types import int4, int8, int16, float32, bfloat16, int32, int64
+from common_kernels.requant import requant_value
 
 
 def mm1[
@@ -79,3 +80,113 @@ def mm_transpose_return[
         for k0 in allo.reduction(Q):
             out_AB[i0, j0] += A[i0, k0] * B[j0, k0]
     return out_AB
+
+
+def mm_tiled[
+    TyIn: (int4, int8, float32, bfloat16),
+    TyAcc: (int32, float32),
+    TyOut: (int4, int8, int32, float32),
+    M: int16,
+    K: int16,
+    N: int16,
+    Tm: int16,   # Output rows per tile
+    Tk: int16,   # Burst length of the strip loads
+    Tn: int16,   # Output columns per tile
+    RQ: int16    # 1: requant epilogue in store_c, 0: store the accumulator
+](
+    A: "TyIn[M, K]",
+    B: "TyIn[K, N]",
+    mult: "int32[N]",      # Per-column requant (RQ = 1), from
+    shift: "int32[N]",     # common_kernels.requant.make_requant_params
+    zero_point: int32,
+    q_min: int32,
+    q_max: int32,
+    C: "TyOut[M, N]"
+):
+    """
+    Tiled matrix multiplication.
+    Computes C = A @ B in (Tm x Tn) output tiles. Each tile is four stages:
+    load the A row strip and B column strip (in Tk-long bursts), run the
+    full-K MAC into c_tile, store c_tile. c_tile is written only by
+    tile_mac, so the stages can overlap across output tiles. Tile sizes
+    must divide M, K, N. Schedule with
+    matrix_multiplies_scheduler.customize_mm_tiled.
+
+    With RQ = 1 store_c writes requant_value(c_tile) per element, so an int
+    GEMM hands T straight to the next layer; with RQ = 0 the requant
+    arguments are unused and C is the TyAcc sum.
+    """
+    for mi, ni in allo.grid(M // Tm, N // Tn, name="tile_mn"):
+        a_tile: "TyIn[Tm, K]"
+        b_tile: "TyIn[K, Tn]"
+        c_tile: "TyAcc[Tm, Tn]"
+        for ki0, i0, k0 in allo.grid(K // Tk, Tm, Tk, name="load_a"):
+            a_tile[i0, ki0 * Tk + k0] = A[mi * Tm + i0, ki0 * Tk + k0]
+        for ki1, k1, j1 in allo.grid(K // Tk, Tk, Tn, name="load_b"):
+            b_tile[ki1 * Tk + k1, j1] = B[ki1 * Tk + k1, ni * Tn + j1]
+        for k2 in allo.grid(K, name="tile_mac"):
+            for i2, j2 in allo.grid(Tm, Tn, name="tile_pe"):
+                a: "TyAcc" = a_tile[i2, k2]
+                b: "TyAcc" = b_tile[k2, j2]
+                if k2 == 0:
+                    c_tile[i2, j2] = a * b
+                else:
+                    c_tile[i2, j2] += a * b
+        for i3, j3 in allo.grid(Tm, Tn, name="store_c"):
+            n3: int32 = ni * Tn + j3
+            if RQ == 1:
+                acc3: int32 = c_tile[i3, j3]
+                C[mi * Tm + i3, n3] = requant_value(acc3, mult[n3], shift[n3], zero_point, q_min, q_max)
+            else:
+                C[mi * Tm + i3, n3] = c_tile[i3, j3]
+
+
+def mm_transpose_tiled[
+    TyIn: (int4, int8, float32, bfloat16),
+    TyAcc: (int32, float32),
+    TyOut: (int4, int8, int32, float32),
+    M: int16,
+    K: int16,
+    N: int16,
+    Tm: int16,
+    Tk: int16,
+    Tn: int16,
+    RQ: int16
+](
+    A: "TyIn[M, K]",
+    B: "TyIn[N, K]",
+    mult: "int32[N]",
+    shift: "int32[N]",
+    zero_point: int32,
+    q_min: int32,
+    q_max: int32,
+    C: "TyOut[M, N]"
+):
+    """
+    Tiled matrix multiplication where B is transposed (nn.Linear weight
+    layout). Computes C = A @ B^T; the transpose happens in the b_tile load.
+    The store_c epilogue is mm_tiled's.
+    """
+    for mi, ni in allo.grid(M // Tm, N // Tn, name="tile_mn"):
+        a_tile: "TyIn[Tm, K]"
+        b_tile: "TyIn[K, Tn]"
+        c_tile: "TyAcc[Tm, Tn]"
+        for ki0, i0, k0 in allo.grid(K // Tk, Tm, Tk, name="load_a"):
+            a_tile[i0, ki0 * Tk + k0] = A[mi * Tm + i0, ki0 * Tk + k0]
+        for ki1, j1, k1 in allo.grid(K // Tk, Tn, Tk, name="load_b"):
+            b_tile[ki1 * Tk + k1, j1] = B[ni * Tn + j1, ki1 * Tk + k1]
+        for k2 in allo.grid(K, name="tile_mac"):
+            for i2, j2 in allo.grid(Tm, Tn, name="tile_pe"):
+                a: "TyAcc" = a_tile[i2, k2]
+                b: "TyAcc" = b_tile[k2, j2]
+                if k2 == 0:
+                    c_tile[i2, j2] = a * b
+                else:
+                    c_tile[i2, j2] += a * b
+        for i3, j3 in allo.grid(Tm, Tn, name="store_c"):
+            n3: int32 = ni * Tn + j3
+            if RQ == 1:
+                acc3: int32 = c_tile[i3, j3]
+                C[mi * Tm + i3, n3] = requant_value(acc3, mult[n3], shift[n3], zero_point, q_min, q_max)
+            else:
+                C[mi * Tm + i3, n3] = c_tile[i3, j3]
@@ -0,0 +1,124 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[0]))
+from matrix_multiplies import mm_tiled, mm_transpose_tiled
+from common_kernels.requant import make_requant_params, quant_range, requant_np, no_requant_args
+
+
+def pick_tile(dim: int, max_tile: int):
+    """Largest divisor of dim that is <= max_tile."""
+    for t in range(min(dim, max_tile), 0, -1):
+        if dim % t == 0:
+            return t
+    return 1
+
+
+def customize_mm_tiled(
+    TyIn: allo.ir.types,
+    TyAcc: allo.ir.types,
+    M: int,
+    K: int,
+    N: int,
+    Tm: int = 8,
+    Tk: int = 64,
+    Tn: int = 8,
+    transpose: bool = False,  # B is [N, K] (mm_transpose_tiled)
+    requant: bool = False     # store_c requantizes to TyIn (RQ = 1)
+):
+    """
+    Pre-scheduled mm_tiled / mm_transpose_tiled.
+
+    tile_mac is pipelined at II=1 with tile_pe fully unrolled, so each cycle
+    issues Tm * Tn MACs: a_tile is split by row, b_tile by column and c_tile
+    completely to give every MAC its own operands. The tile_mn body is a
+    dataflow region (load_a / load_b -> tile_mac -> store_c), so the strips
+    and c_tile become ping-pong buffers: the next output tile loads while
+    this one computes, and c_tile is carried by tile_mac alone. The strips
+    are K deep, 2 * (Tm + Tn) * K elements with ping-pong.
+
+    requant=True makes C TyIn, written through the requant epilogue; the
+    module then takes (A, B, mult, shift, zero_point, q_min, q_max, C). The
+    requant arguments are passed either way (no_requant_args for RQ = 0).
+    """
+    for name, dim, t in [("M", M, Tm), ("K", K, Tk), ("N", N, Tn)]:
+        if dim % t != 0:
+            raise ValueError(f"tile {t} does not divide {name}={dim} (see pick_tile)")
+    if requant and TyAcc != int32:
+        raise ValueError("the requant epilogue needs int32 accumulators")
+
+    kernel = mm_transpose_tiled if transpose else mm_tiled
+    TyOut = TyIn if requant else TyAcc
+    s = allo.customize(kernel, instantiate=[TyIn, TyAcc, TyOut, M, K, N, Tm, Tk, Tn, int(requant)])
+
+    s.partition(s.a_tile, partition.Complete, dim=1)
+    s.partition(s.b_tile, partition.Complete, dim=2)
+    s.partition(s.c_tile, partition.Complete, dim=0)
+
+    loops = s.get_loops()["tile_mn"]
+    s.pipeline(loops["k0"])
+    s.pipeline(loops["k1"] if not transpose else loops["j1"])
+    s.pipeline(loops["k2"])
+    s.pipeline(loops["j3"])
+    s.dataflow(loops["ni"])
+    return s
+
+
+def schedule_mm_tiled(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    M: int,
+    K: int,
+    N: int,
+    Tm: int = 8,
+    Tk: int = 64,
+    Tn: int = 8,
+    transpose: bool = False,
+    requant: bool = False,
+    out_scale: float = 1.0 / 256,   # int32 -> A_T scale of the requant epilogue (llvm mode)
+    mode: str = "csyn"
+):
+    """Build customize_mm_tiled for one projection shape (int accumulators for int inputs)."""
+    Acc_T = float32 if A_T in (float32, bfloat16) else int32
+    s = customize_mm_tiled(A_T, Acc_T, M, K, N, Tm, Tk, Tn, transpose, requant)
+
+    dtype_str = {int4: "int4", int8: "int8", float32: "float32", bfloat16: "bfloat16"}[A_T]
+    rq_str = "_requant" if requant else ""
+    project_name = f"mm_tiled{rq_str}_{M}x{K}x{N}_T{Tm}_{Tk}_{Tn}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            A = np.random.randint(-8, 8, (M, K)).astype(N_T)
+            B = np.random.randint(-8, 8, (N, K) if transpose else (K, N)).astype(N_T)
+            ref = A.astype(np.int64) @ (B.T if transpose else B).astype(np.int64)
+            if requant:
+                mult, shift = make_requant_params(np.full(N, out_scale))
+                q_min, q_max = quant_range(4 if A_T == int4 else 8)
+                C = np.zeros((M, N), dtype=N_T)
+                s_llvm(A, B, mult, shift, 0, q_min, q_max, C)
+                ref = requant_np(ref, mult, shift, 0, q_min, q_max)
+            else:
+                C = np.zeros((M, N), dtype=np.float32 if Acc_T == float32 else np.int32)
+                s_llvm(A, B, *no_requant_args(N), C)
+            print(f"max |diff| vs numpy: {np.abs(C - ref).max()}")
+            return C, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    # Vision FC1 (768 -> 3072) over 1024 tokens, 8x8 MACs per cycle
+    schedule_mm_tiled(np.int8, int8, 1024, 768, 3072, Tm=8, Tk=64, Tn=8, mode="csyn")
+
+    # Same GEMM handing int8 to the next layer through the requant epilogue
+    # schedule_mm_tiled(np.int8, int8, 1024, 768, 3072, Tm=8, Tk=64, Tn=8, requant=True, mode="csyn")
+
+    # Backbone q_proj in nn.Linear layout
+    # schedule_mm_tiled(np.int8, int8, 241, 960, 960, Tm=pick_tile(241, 8), Tk=64, Tn=8,
+    #                   transpose=True, mode="csyn")
@@ -1,5 +1,5 @@
 import allo
-from allo.ir.types import float32, int8, int32, Stream
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4, Stream
 from allo import dsl
 import allo.backend.hls as hls
 import allo.dataflow as df
@@ -12,6 +12,8 @@ import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from common_kernels.kernels import add_bias
+from common_kernels.activations import pwl_activation
+from common_kernels.requant import requant_value
 
 
 # D in attention is 1/4 in of the MLP
@@ -144,3 +146,436 @@ def mlp_dataflow[
             # Convert to int8
             out[i, j] = scaled
 
+
+def mlp_fc1[
+    T: (bfloat16, float32, int4, int8),
+    D: int16,  # feature dimension
+    L: int16,  # number of tokens (batch)
+](
+    X: "T[L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    FC1_out: "int32[L, 4 * D]"   # Pre-activation, X @ W_1 + B_1
+):
+    """FC1 + bias stage of mlp_dataflow_pwl (the fc1 loops of mlp_dataflow)."""
+    # FC1: X (L x D) * W_1 (D x 4D) -> (L x 4D)
+    # Use int32 accumulators to prevent overflow
+    FC1_acc: int32[L, 4 * D] = 0
+    for i, j in allo.grid(L, 4 * D, name="fc1_tile"):
+        for k in allo.reduction(D, name="fc1_reduce"):
+            a_i: int32 = X[i, k]
+            b_i: int32 = W_1[k, j]
+            FC1_acc[i, j] += a_i * b_i
+
+    # Add bias B_1 (length 4D) - keep as int32
+    for i, j in allo.grid(L, 4 * D, name="fc1_bias_add"):
+        tmp_acc: int32 = FC1_acc[i, j]
+        bias_val: int32 = B_1[j]
+        FC1_out[i, j] = tmp_acc + bias_val
+
+
+def mlp_fc2_ln[
+    T: (bfloat16, float32, int4, int8),
+    D: int16,  # feature dimension
+    L: int16,  # number of tokens (batch)
+](
+    FC1_act: "int32[L, 4 * D]",  # Post-activation
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",  # LayerNorm scale
+    beta: "T[D]",   # LayerNorm bias
+    out: "T[L, D]"  # Output is int8 after LayerNorm
+):
+    """FC2 + bias + LayerNorm stage of mlp_dataflow_pwl (the fc2 / LayerNorm loops of mlp_dataflow)."""
+    # FC2: (L x 4D) * (4D x D) -> (L x D)
+    FC2_acc: int32[L, D] = 0
+    for i, j in allo.grid(L, D, name="fc2_tile"):
+        for k in allo.reduction(4 * D, name="fc2_reduce"):
+            a_i: int32 = FC1_act[i, k]
+            b_i: int32 = W_2[k, j]
+            FC2_acc[i, j] += a_i * b_i
+
+    # Add bias B_2 to get FC2 output (int32)
+    FC2_out: int32[L, D] = 0
+    for i, j in allo.grid(L, D, name="fc2_bias_add"):
+        tmp_acc2: int32 = FC2_acc[i, j]
+        bias_val2: int32 = B_2[j]
+        FC2_out[i, j] = tmp_acc2 + bias_val2
+    
+    # LayerNorm: Normalize int32 output to int8 range
+    # Step 1: Compute mean and variance for each token (across D dimension)
+    for i in allo.grid(L, name="ln_normalize"):
+        # Accumulate sum and sum of squares
+        total: float32 = 0.0
+        total_sq: float32 = 0.0
+        for j in allo.reduction(D, name="ln_stats_reduce"):
+            val: float32 = FC2_out[i, j]
+            total += val
+            total_sq += val * val
+        
+        # Compute mean and inverse std
+        mean: float32 = total / D
+        mean_sq: float32 = total_sq / D
+        variance: float32 = mean_sq - (mean * mean)
+        inv_std: float32 = 1.0 / allo.sqrt(variance + 1e-8)
+        
+        # Step 2: Normalize and scale each element
+        for j in allo.grid(D, name="ln_scale"):
+            x_val: float32 = FC2_out[i, j]
+            gamma_val: float32 = gamma[j]
+            beta_val: float32 = beta[j]
+            
+            # Normalize: (x - mean) / std
+            normalized: float32 = (x_val - mean) * inv_std
+            # Scale and shift: gamma * normalized + beta
+            scaled: float32 = normalized * gamma_val + beta_val
+            # Convert to int8
+            out[i, j] = scaled
+
+
+def mlp_dataflow_pwl[
+    T: (bfloat16, float32, int4, int8),
+    D: int16,  # feature dimension
+    L: int16,  # number of tokens (batch)
+    S: int16,  # GELU PWL segments (activations.make_pwl_table)
+](
+    X: "T[L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",  # LayerNorm scale
+    beta: "T[D]",   # LayerNorm bias
+    gelu_slope: "int32[S + 2]",
+    gelu_icept: "int32[S + 2]",
+    gelu_x_lo: int32,
+    gelu_shift: int32,
+    out: "T[L, D]"  # Output is int8 after LayerNorm
+) :
+    """
+    mlp_dataflow with GELU evaluated by the piecewise-linear table from
+    common_kernels.activations (make_pwl_table("gelu", S, ...)) instead of
+    the float cube + tanh. FC1 and FC2 + LayerNorm run as the mlp_fc1 /
+    mlp_fc2_ln sub-kernels (the loops of mlp_dataflow), and the table is
+    applied by pwl_activation.
+    """
+    FC1_out: int32[L, 4 * D] = 0
+    mlp_fc1[T, D, L, "fc1"](X, W_1, B_1, FC1_out)
+
+    # GELU activation (piecewise-linear table) - integer only
+    FC1_act: int32[L, 4 * D] = 0
+    pwl_activation[L, 4 * D, S, "gelu"](FC1_out, gelu_slope, gelu_icept, gelu_x_lo, gelu_shift, FC1_act)
+
+    mlp_fc2_ln[T, D, L, "fc2_ln"](FC1_act, W_2, B_2, gamma, beta, out)
+
+
+def mlp_fused_ln[
+    T: (bfloat16, float32, int4, int8),
+    D: int16,  # feature dimension
+    L: int16,  # number of tokens (batch)
+](
+    X: "T[L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",
+    beta: "T[D]",
+    out: "T[L, D]"
+):
+    """
+    mlp_dataflow with LayerNorm statistics fused into the FC2 epilogue.
+
+    FC2 is computed one row at a time into fc2_row[D]; each finished output
+    (+ B_2) is added to the row's sum / sum of squares immediately, and the
+    row is normalised from fc2_row. FC2_acc / FC2_out ([L, D] int32) and the
+    separate stats pass over them are gone. Numerics match mlp_dataflow.
+    """
+    # FC1 + bias + GELU (as in mlp_dataflow)
+    FC1_act: int32[L, 4 * D] = 0
+    for i, j in allo.grid(L, 4 * D, name="fc1_tile"):
+        acc: int32 = B_1[j]
+        for k in allo.reduction(D, name="fc1_reduce"):
+            a_i: int32 = X[i, k]
+            b_i: int32 = W_1[k, j]
+            acc += a_i * b_i
+        x_float: float32 = acc
+        x3 = x_float * x_float * x_float
+        inner = 0.7978845608028654 * (x_float + 0.044715 * x3)
+        gelu_out = 0.5 * x_float * (1.0 + allo.tanh(inner))
+        FC1_act[i, j] = gelu_out
+
+    # FC2 + bias with running LayerNorm statistics, then normalise the row
+    for i2 in allo.grid(L, name="fc2_ln_row"):
+        fc2_row: "int32[D]"
+        total: float32 = 0.0
+        total_sq: float32 = 0.0
+        for j2 in allo.grid(D, name="fc2_col"):
+            acc2: int32 = 0
+            for k2 in allo.reduction(4 * D, name="fc2_reduce"):
+                a_i2: int32 = FC1_act[i2, k2]
+                b_i2: int32 = W_2[k2, j2]
+                acc2 += a_i2 * b_i2
+            bias_val2: int32 = B_2[j2]
+            fc2_val: int32 = acc2 + bias_val2
+            fc2_row[j2] = fc2_val
+            val: float32 = fc2_val
+            total += val
+            total_sq += val * val
+
+        mean: float32 = total / D
+        mean_sq: float32 = total_sq / D
+        variance: float32 = mean_sq - (mean * mean)
+        inv_std: float32 = 1.0 / allo.sqrt(variance + 1e-8)
+
+        for j3 in allo.grid(D, name="ln_scale"):
+            x_val: float32 = fc2_row[j3]
+            gamma_val: float32 = gamma[j3]
+            beta_val: float32 = beta[j3]
+            normalized: float32 = (x_val - mean) * inv_std
+            scaled: float32 = normalized * gamma_val + beta_val
+            out[i2, j3] = scaled
+
+def mlp_systolic[
+    T: (int4, int8),
+    D: int16,   # feature dimension
+    L: int16,   # number of tokens (batch)
+    Mt: int16,  # systolic array rows (token tile)
+    Nt: int16,  # systolic array columns (output feature tile)
+](
+    X: "T[L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",
+    beta: "T[D]",
+    out: "T[L, D]"
+):
+    """
+    mlp_dataflow with FC1/FC2 mapped onto an Mt x Nt systolic array.
+
+    Tokens are processed Mt rows at a time. For each row block:
+    - FC1 is walked in Nt-column tiles: a K x Nt weight tile is copied into
+      a local buffer and streamed with the block's activations through
+      systolic_tile (output-stationary, int32 accumulators); bias + GELU are
+      fused into the tile store into fc1_act[Mt, 4D]
+    - fc1_act is the A operand of the FC2 tiles directly, bias is fused into
+      their store into fc2_row[Mt, D]
+    - LayerNorm runs on fc2_row and the block is written out
+
+    Only one row block of the [L, 4D] / [L, D] intermediates is ever on
+    chip, and each of the four per-block stages writes a single buffer, so
+    consecutive row blocks can overlap stage by stage. Numerics match
+    mlp_dataflow.
+    """
+    for mi in allo.grid(L // Mt, name="row_block"):
+        fc1_a: "T[Mt, D]"
+        for ii, k in allo.grid(Mt, D, name="fc1_load_a"):
+            fc1_a[ii, k] = X[mi * Mt + ii, k]
+
+        # FC1: [Mt, D] x [D, 4D], bias + GELU on the way out
+        fc1_act: "int32[Mt, 4 * D]"
+        for ni in allo.grid(4 * D // Nt, name="fc1_outer"):
+            fc1_w: "T[D, Nt]"
+            fc1_c: "int32[Mt, Nt]" = 0
+            for k1, jj in allo.grid(D, Nt, name="fc1_load_w"):
+                fc1_w[k1, jj] = W_1[k1, ni * Nt + jj]
+            systolic_tile[T, T, int32, D, Mt, Nt, "fc1_array"](fc1_a, fc1_w, fc1_c)
+            for ii2, jj2 in allo.grid(Mt, Nt, name="fc1_store"):
+                bias_val: int32 = B_1[ni * Nt + jj2]
+                x_float: float32 = fc1_c[ii2, jj2] + bias_val
+                x3 = x_float * x_float * x_float
+                inner = 0.7978845608028654 * (x_float + 0.044715 * x3)
+                gelu_out = 0.5 * x_float * (1.0 + allo.tanh(inner))
+                fc1_act[ii2, ni * Nt + jj2] = gelu_out
+
+        # FC2: [Mt, 4D] x [4D, D], bias on the way out
+        fc2_row: "int32[Mt, D]"
+        for ni2 in allo.grid(D // Nt, name="fc2_outer"):
+            fc2_w: "T[4 * D, Nt]"
+            fc2_c: "int32[Mt, Nt]" = 0
+            for k3, jj3 in allo.grid(4 * D, Nt, name="fc2_load_w"):
+                fc2_w[k3, jj3] = W_2[k3, ni2 * Nt + jj3]
+            systolic_tile[int32, T, int32, 4 * D, Mt, Nt, "fc2_array"](fc1_act, fc2_w, fc2_c)
+            for ii4, jj4 in allo.grid(Mt, Nt, name="fc2_store"):
+                bias_val2: int32 = B_2[ni2 * Nt + jj4]
+                fc2_row[ii4, ni2 * Nt + jj4] = fc2_c[ii4, jj4] + bias_val2
+
+        # LayerNorm (same as mlp_dataflow)
+        for i_ln in allo.grid(Mt, name="ln_normalize"):
+            total: float32 = 0.0
+            total_sq: float32 = 0.0
+            for j_s in allo.reduction(D, name="ln_stats_reduce"):
+                val: float32 = fc2_row[i_ln, j_s]
+                total += val
+                total_sq += val * val
+            mean: float32 = total / D
+            mean_sq: float32 = total_sq / D
+            variance: float32 = mean_sq - (mean * mean)
+            inv_std: float32 = 1.0 / allo.sqrt(variance + 1e-8)
+            for j_n in allo.grid(D, name="ln_scale"):
+                x_val: float32 = fc2_row[i_ln, j_n]
+                gamma_val: float32 = gamma[j_n]
+                beta_val: float32 = beta[j_n]
+                normalized: float32 = (x_val - mean) * inv_std
+                scaled: float32 = normalized * gamma_val + beta_val
+                out[mi * Mt + i_ln, j_n] = scaled
+
+
+def mlp_hidden_tiled[
+    T: (int4, int8),
+    D: int16,       # feature dimension
+    L: int16,       # number of tokens (batch)
+    L_tile: int16,  # tokens per row tile
+    H_tile: int16,  # hidden (4D) columns per tile
+](
+    X: "T[L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",
+    beta: "T[D]",
+    out: "T[L, D]"
+):
+    """
+    mlp_dataflow without the [L, 4D] intermediates.
+
+    For each L_tile-row block the hidden dimension is walked H_tile columns at
+    a time: FC1 tile -> bias -> GELU -> partial FC2 accumulated into
+    fc2_acc[L_tile, D]. Only one [L_tile, H_tile] slice of the expansion is
+    ever on-chip. Integer accumulation is exact, so results match mlp_dataflow.
+    """
+    for lt in allo.grid(L // L_tile, name="row_tile"):
+        x_tile: "T[L_tile, D]"
+        for i0, d0 in allo.grid(L_tile, D, name="load_x"):
+            x_tile[i0, d0] = X[lt * L_tile + i0, d0]
+
+        fc2_acc: "int32[L_tile, D]" = 0
+        for ht in allo.grid(4 * D // H_tile, name="hidden_tile"):
+            # FC1 slice + bias + GELU
+            h_act: "int32[L_tile, H_tile]"
+            for i1, j1 in allo.grid(L_tile, H_tile, name="fc1_slice"):
+                acc: int32 = B_1[ht * H_tile + j1]
+                for k1 in allo.reduction(D, name="fc1_reduce"):
+                    a_i: int32 = x_tile[i1, k1]
+                    b_i: int32 = W_1[k1, ht * H_tile + j1]
+                    acc += a_i * b_i
+                x_float: float32 = acc
+                x3 = x_float * x_float * x_float
+                inner = 0.7978845608028654 * (x_float + 0.044715 * x3)
+                gelu_out = 0.5 * x_float * (1.0 + allo.tanh(inner))
+                h_act[i1, j1] = gelu_out
+
+            # Partial FC2 over this slice of the hidden dimension
+            for i2, n2 in allo.grid(L_tile, D, name="fc2_partial"):
+                part: int32 = 0
+                for k2 in allo.reduction(H_tile, name="fc2_reduce"):
+                    w_i: int32 = W_2[ht * H_tile + k2, n2]
+                    part += h_act[i2, k2] * w_i
+                fc2_acc[i2, n2] += part
+
+        # Bias B_2 + LayerNorm (same numerics as mlp_dataflow)
+        for i3 in allo.grid(L_tile, name="ln_normalize"):
+            total: float32 = 0.0
+            total_sq: float32 = 0.0
+            for j_s in allo.reduction(D, name="ln_stats_reduce"):
+                bias_s: int32 = B_2[j_s]
+                fc2_val: int32 = fc2_acc[i3, j_s] + bias_s
+                val: float32 = fc2_val
+                total += val
+                total_sq += val * val
+            mean: float32 = total / D
+            mean_sq: float32 = total_sq / D
+            variance: float32 = mean_sq - (mean * mean)
+            inv_std: float32 = 1.0 / allo.sqrt(variance + 1e-8)
+            for j_n in allo.grid(D, name="ln_scale"):
+                bias_n: int32 = B_2[j_n]
+                fc2_n: int32 = fc2_acc[i3, j_n] + bias_n
+                x_val: float32 = fc2_n
+                gamma_val: float32 = gamma[j_n]
+                beta_val: float32 = beta[j_n]
+                normalized: float32 = (x_val - mean) * inv_std
+                scaled: float32 = normalized * gamma_val + beta_val
+                out[lt * L_tile + i3, j_n] = scaled
+
+
+def mlp_swiglu[
+    T: (int4, int8),
+    TyOut: (int4, int8, int32),
+    D: int16,       # model width
+    H: int16,       # intermediate width (gate_proj / up_proj outputs)
+    L: int16,       # number of tokens
+    H_tile: int16,  # intermediate columns per tile
+    RQ: int16,      # 1: requant epilogue in store_out, 0: store the int32 sum
+](
+    X: "T[L, D]",
+    W_gate: "T[D, H]",
+    W_up: "T[D, H]",
+    W_down: "T[H, D]",
+    act_scale: float32,   # requant of SiLU(gate) * up back into the int32 domain
+    mult: "int32[D]",     # Per-channel output requant (RQ = 1), from
+    shift: "int32[D]",    # common_kernels.requant.make_requant_params
+    zero_point: int32,
+    q_min: int32,
+    q_max: int32,
+    out: "TyOut[L, D]"
+):
+    """
+    Gated (SwiGLU) MLP: out = (SiLU(X W_gate) * (X W_up)) W_down.
+
+    Used by the SmolLM2 backbone (960 -> 2560) and the action expert
+    (720 -> 2048), which have no biases. Gate and up share one reduction over
+    the buffered X row, so every X load feeds both weight matrices. The gated
+    activation is produced H_tile columns at a time and immediately folded
+    into the down_proj accumulator; neither [L, H] expansion is stored.
+
+    With RQ = 1 each row leaves through requant_value, so out is T and the
+    next layer reads int8 / int4; with RQ = 0 out is the int32 down_proj sum.
+    """
+    for i in allo.grid(L, name="swiglu_row"):
+        x_row: "T[D]"
+        for d0 in allo.grid(D, name="load_x"):
+            x_row[d0] = X[i, d0]
+
+        down_acc: "int32[D]" = 0
+        for ht in allo.grid(H // H_tile, name="hidden_tile"):
+            h_act: "int32[H_tile]"
+            for j in allo.grid(H_tile, name="gate_up"):
+                g_acc: int32 = 0
+                u_acc: int32 = 0
+                for k in allo.reduction(D, name="gate_up_reduce"):
+                    x_k: int32 = x_row[k]
+                    w_g: int32 = W_gate[k, ht * H_tile + j]
+                    w_u: int32 = W_up[k, ht * H_tile + j]
+                    g_acc += x_k * w_g
+                    u_acc += x_k * w_u
+                g: float32 = g_acc
+                u: float32 = u_acc
+                silu: float32 = g / (1.0 + allo.exp(-g))
+                h_act[j] = silu * u * act_scale
+
+            for n in allo.grid(D, name="down_partial"):
+                part: int32 = 0
+                for k2 in allo.reduction(H_tile, name="down_reduce"):
+                    w_d: int32 = W_down[ht * H_tile + k2, n]
+                    part += h_act[k2] * w_d
+                down_acc[n] += part
+
+        for n2 in allo.grid(D, name="store_out"):
+            if RQ == 1:
+                out[i, n2] = requant_value(down_acc[n2], mult[n2], shift[n2], zero_point, q_min, q_max)
+            else:
+                out[i, n2] = down_acc[n2]
+
+
+def mlp_swiglu_np(X, W_gate, W_up, W_down, act_scale):
+    """Numpy reference for mlp_swiglu (float32 activation, int32 GEMMs)."""
+    X32 = X.astype(np.int32)
+    g = (X32 @ W_gate.astype(np.int32)).astype(np.float32)
+    u = (X32 @ W_up.astype(np.int32)).astype(np.float32)
+    with np.errstate(over="ignore"):
+        silu = g / (np.float32(1.0) + np.exp(-g))
+    h_act = (silu * u * np.float32(act_scale)).astype(np.int32)
+    return h_act @ W_down.astype(np.int32)
@@ -2,12 +2,278 @@ import allo
 from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
 from allo.customize import Partition as partition
 import numpy as np
-from mlp import mlp_dataflow
+from mlp import mlp_dataflow, mlp_dataflow_pwl, mlp_fc1, mlp_fc2_ln, mlp_fused_ln, mlp_systolic, mlp_hidden_tiled, mlp_swiglu, mlp_swiglu_np
+from common_kernels.requant import make_requant_params, quant_range, requant_np
+from common_kernels.activations import pwl_activation
+from allo.library.systolic import systolic_tile
 from datetime import datetime
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 from attention.config import VLMAttentionConfig as VAC
+from attention.config import VLMBackboneConfig as VBC
+from attention.config import CrossAttentionConfig as CAC
+
+
+def _schedule_systolic_array(TyA, TyB, K: int, Mt: int, Nt: int, unfold: bool):
+    """Schedule one systolic_tile instance: PE grid + A/B operand FIFOs."""
+    s_tile = allo.customize(systolic_tile, instantiate=[TyA, TyB, int32, K, Mt, Nt])
+    s_tile.partition(s_tile.C, partition.Complete, dim=0)
+    s_tile.partition(s_tile.A, partition.Complete, dim=1)
+    s_tile.partition(s_tile.B, partition.Complete, dim=2)
+    if unfold:
+        # One PE per (row, col); A flows right along a row, B flows down a column
+        pe = s_tile.unfold("PE", [0, 1])
+        s_tile.to(s_tile.A_fifo, pe, axis=1, depth=Mt + 1)
+        s_tile.to(s_tile.B_fifo, pe, axis=0, depth=Nt + 1)
+    return s_tile
+
+
+def customize_mlp_fc1(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    P: int = 4,
+    dataflow: bool = True
+):
+    """Customize mlp.mlp_fc1 (FC1 + bias of mlp_dataflow_pwl), scheduled as in schedule_mlp."""
+    s = allo.customize(mlp_fc1, instantiate=[A_T, D, L])
+    loops = s.get_loops()
+    print(loops)
+
+    # ===== FC1 Matmul Scheduling =====
+    outer_loop = loops["fc1_tile"]
+    
+    # i = L, j = 4D, k = D
+    # If unroll factor is small enough, unroll k; else spill to j
+    if P < D:
+        # Unroll k: partition on k dimension (X dim=2, W_1 dim=1)
+        s.partition(s.X, partition.Cyclic, dim=2, factor=P)
+        s.partition(s.W_1, partition.Cyclic, dim=1, factor=P)
+        s.unroll(outer_loop["k"], factor=P)
+    else:
+        # Unroll j: partition both k and j dimensions
+        s.partition(s.X, partition.Cyclic, dim=2, factor=min(P, D))
+        s.partition(s.W_1, partition.Cyclic, dim=1, factor=min(P, D))
+        s.partition(s.W_1, partition.Cyclic, dim=2, factor=P//D)
+        s.partition(s.FC1_acc, partition.Cyclic, dim=2, factor=P//D)
+        s.unroll(outer_loop["j"], factor=P//D)
+    
+    # Pipeline the reduction loop
+    s.pipeline(outer_loop["k"])
+    s.pipeline(loops["fc1_bias_add"]["j"])
+
+    if dataflow:
+        # Apply dataflow to outer i loop like "i_out" in self_attention
+        s.dataflow(outer_loop["i"])
+    return s
+
+
+def customize_mlp_fc2_ln(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    P: int = 4,
+    dataflow: bool = True
+):
+    """Customize mlp.mlp_fc2_ln (FC2 + bias + LayerNorm of mlp_dataflow_pwl), scheduled as in schedule_mlp."""
+    s = allo.customize(mlp_fc2_ln, instantiate=[A_T, D, L])
+    loops = s.get_loops()
+    print(loops)
+
+    # ===== FC2 Matmul Scheduling =====
+    outer_loop = loops["fc2_tile"]
+    
+    # i = L, j = D, k = 4D
+    # If unroll factor is small enough, unroll k; else spill to j
+    if 4*P < 4*D:
+        # Unroll k: partition on k dimension (FC1_act dim=2, W_2 dim=1)
+        s.partition(s.FC1_act, partition.Cyclic, dim=2, factor=4*P)
+        s.partition(s.W_2, partition.Cyclic, dim=1, factor=4*P)
+        s.unroll(outer_loop["k"], factor=4*P)
+    else:
+        # Unroll j: partition both k and j dimensions
+        s.partition(s.FC1_act, partition.Cyclic, dim=2, factor=min(4*P, 4*D))
+        s.partition(s.W_2, partition.Cyclic, dim=1, factor=min(4*P, 4*D))
+        s.partition(s.W_2, partition.Cyclic, dim=2, factor=(4*P)//(4*D))
+        s.partition(s.FC2_acc, partition.Cyclic, dim=2, factor=(4*P)//(4*D))
+        s.unroll(outer_loop["j"], factor=(4*P)//(4*D))
+
+    # Pipeline the reduction loop
+    s.pipeline(outer_loop["k"])
+    s.pipeline(loops["fc2_bias_add"]["j"])
+
+    # ===== LayerNorm Scheduling =====
+    if "ln_reduce" in loops:
+        ln_sum_loop = loops["ln_sum"]
+        s.pipeline(ln_sum_loop["j"])
+    
+    if "ln_stats" in loops:
+        ln_stats_loop = loops["ln_stats"]
+        s.pipeline(ln_stats_loop)
+    
+    if "ln_scale" in loops:
+        ln_norm_loop = loops["ln_norm"]
+        s.pipeline(ln_norm_loop["j"])
+
+    if dataflow:
+        s.dataflow(outer_loop["i"])
+
+        # Add dataflow for LayerNorm loops
+        if "ln_sum" in loops:
+            ln_sum_loop = loops["ln_sum"]
+            s.dataflow(ln_sum_loop)
+        
+        if "ln_norm" in loops:
+            ln_norm_loop = loops["ln_norm"]
+            s.dataflow(ln_norm_loop)
+    return s
+
+
+def customize_mlp_dataflow_pwl(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    S: int = 16,
+    P: int = 4,
+    dataflow: bool = True
+):
+    """
+    Customize mlp.mlp_dataflow_pwl: the FC1 and FC2 + LayerNorm stages get
+    mlp_dataflow's schedule through customize_mlp_fc1 / customize_mlp_fc2_ln,
+    and the pwl_activation table lookup is pipelined between them.
+    """
+    s = allo.customize(mlp_dataflow_pwl, instantiate=[A_T, D, L, S])
+    s_act = allo.customize(pwl_activation, instantiate=[L, 4 * D, S])
+    s_act.pipeline(s_act.get_loops()["pwl"]["j"])
+    s.compose(s_act, id="gelu")
+    s.compose(customize_mlp_fc1(A_T, D, L, P, dataflow), id="fc1")
+    s.compose(customize_mlp_fc2_ln(A_T, D, L, P, dataflow), id="fc2_ln")
+    return s
+
+
+def customize_mlp_fused_ln(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    P: int = 4
+):
+    """
+    Customize mlp.mlp_fused_ln: FC1 as in mlp_dataflow, FC2 per row with the
+    LayerNorm sums accumulated in the column loop's epilogue. Both
+    reductions are unrolled by P with matching cyclic partitions.
+    """
+    s = allo.customize(mlp_fused_ln, instantiate=[A_T, D, L])
+    loops = s.get_loops()
+
+    s.partition(s.X, partition.Cyclic, dim=2, factor=P)
+    s.partition(s.W_1, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["fc1_tile"]["k"], factor=P)
+    s.pipeline(loops["fc1_tile"]["k"])
+
+    s.partition(s.FC1_act, partition.Cyclic, dim=2, factor=4 * P)
+    s.partition(s.W_2, partition.Cyclic, dim=1, factor=4 * P)
+    s.unroll(loops["fc2_ln_row"]["k2"], factor=4 * P)
+    s.pipeline(loops["fc2_ln_row"]["k2"])
+    s.pipeline(loops["fc2_ln_row"]["j3"])
+
+    # Row i's normalisation overlaps row i+1's FC2 through a ping-pong fc2_row
+    s.dataflow(loops["fc2_ln_row"]["i2"])
+    return s
+
+
+def customize_mlp_systolic(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    array_rows: int = 16,
+    array_cols: int = 16,
+    unfold: bool = True
+):
+    """
+    Customize mlp.mlp_systolic on an array_rows x array_cols systolic array.
+
+    The row_block body is the dataflow region: A load, FC1, FC2 and
+    LayerNorm each write one buffer (fc1_a, fc1_act, fc2_row, out), so block
+    mi + 1's FC1 runs while block mi is in FC2 / LayerNorm, and the W_1 tile
+    loads overlap the FC2 array and vice versa. The tile loops stay
+    sequential: fc1_c / fc2_c are zeroed and then accumulated by
+    systolic_tile, which a dataflow region over them would split across two
+    writers. fc1_act is the FC2 array's A operand, so it gets the same
+    banking as fc1_a. unfold=False keeps the PE grid as a loop nest (needed
+    for the llvm simulator).
+    """
+    if L % array_rows != 0 or D % array_cols != 0:
+        raise ValueError(f"L={L}, D={D} must be divisible by the {array_rows}x{array_cols} array")
+
+    s = allo.customize(mlp_systolic, instantiate=[A_T, D, L, array_rows, array_cols])
+    s_fc1 = _schedule_systolic_array(A_T, A_T, D, array_rows, array_cols, unfold)
+    s_fc2 = _schedule_systolic_array(int32, A_T, 4 * D, array_rows, array_cols, unfold)
+    s.compose(s_fc1, id="fc1_array")
+    s.compose(s_fc2, id="fc2_array")
+
+    # Match the array's operand banking on the local tiles
+    s.partition(s.fc1_a, partition.Complete, dim=1)
+    s.partition(s.fc1_w, partition.Complete, dim=2)
+    s.partition(s.fc1_c, partition.Complete, dim=0)
+    s.partition(s.fc1_act, partition.Complete, dim=1)
+    s.partition(s.fc2_w, partition.Complete, dim=2)
+    s.partition(s.fc2_c, partition.Complete, dim=0)
+
+    loops = s.get_loops("mlp_systolic")["row_block"]
+    for var in ["k", "jj", "jj2", "jj3", "jj4", "j_s", "j_n"]:
+        s.pipeline(loops[var])
+
+    s.dataflow(loops["mi"])
+    return s
+
+
+def customize_mlp_hidden_tiled(
+    A_T: allo.ir.types,
+    D: int,
+    L: int,
+    l_tile: int = 16,
+    h_tile: int = 256,
+    P: int = 4
+):
+    """
+    Customize mlp.mlp_hidden_tiled.
+
+    On-chip state is x_tile[l_tile, D], h_act[l_tile, h_tile] and
+    fc2_acc[l_tile, D] instead of three int32[L, 4D] buffers. Both reductions
+    are unrolled by P with matching cyclic partitions, as in mlp_dataflow.
+    """
+    if L % l_tile != 0 or (4 * D) % h_tile != 0:
+        raise ValueError(f"l_tile={l_tile} must divide L={L} and h_tile={h_tile} must divide 4D={4 * D}")
+
+    s = allo.customize(mlp_hidden_tiled, instantiate=[A_T, D, L, l_tile, h_tile])
+    loops = s.get_loops()
+
+    s.partition(s.x_tile, partition.Cyclic, dim=2, factor=P)
+    s.partition(s.W_1, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["row_tile"]["k1"], factor=P)
+    s.pipeline(loops["row_tile"]["k1"])
+
+    s.partition(s.h_act, partition.Cyclic, dim=2, factor=P)
+    s.partition(s.W_2, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["row_tile"]["k2"], factor=P)
+    s.pipeline(loops["row_tile"]["k2"])
+
+    s.pipeline(loops["row_tile"]["d0"])
+    s.pipeline(loops["row_tile"]["j_s"])
+    s.pipeline(loops["row_tile"]["j_n"])
+
+    # FC1 slice -> partial FC2 overlap through a ping-pong h_act
+    s.dataflow(loops["row_tile"]["ht"])
+    return s
+
+
+def _build_variant(s, mode: str, project: str):
+    """llvm builds the CPU simulator; any other mode runs Vitis HLS."""
+    if mode == "llvm":
+        return s.build(project=project)
+    return s.build(target="vitis_hls", mode=mode, project=project)()
+
 
 def schedule_mlp(
     N_T: np.dtype,
@@ -16,11 +282,45 @@ def schedule_mlp(
     mode: str = "csyn",
     enable_dataflow: bool = True,
     project: str = None,
-    should_return=False
+    should_return=False,
+    variant: str = "dataflow",  # "dataflow", "fused_ln", "systolic" or "hidden_tiled"
+    array_rows: int = 16,       # Systolic array rows (variant="systolic")
+    array_cols: int = 16,       # Systolic array columns (variant="systolic")
+    l_tile: int = 16,           # Token rows per tile (variant="hidden_tiled")
+    h_tile: int = 256,          # Hidden columns per tile (variant="hidden_tiled")
+    activation: str = "float",  # GELU: "float" (cube + tanh) or "pwl" (variant="dataflow")
+    pwl_segments: int = 16,     # PWL table segments (activation="pwl")
 ):
     dataflow = enable_dataflow
     L = 1024
     D = 3072
+    if variant == "systolic":
+        # The llvm simulator needs the PE grid as a loop nest
+        s = customize_mlp_systolic(A_T, D, L, array_rows, array_cols, unfold=(mode != "llvm"))
+        proj_name = project if project is not None else f"mlp_systolic_{array_rows}x{array_cols}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+        _build_variant(s, mode, proj_name)
+        return s if should_return else None
+    if variant == "fused_ln":
+        s = customize_mlp_fused_ln(A_T, D, L, P)
+        proj_name = project if project is not None else f"mlp_fused_ln_P_{P}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+        _build_variant(s, mode, proj_name)
+        return s if should_return else None
+    if variant == "hidden_tiled":
+        s = customize_mlp_hidden_tiled(A_T, D, L, l_tile, h_tile, P)
+        proj_name = project if project is not None else f"mlp_hidden_tiled_L{l_tile}_H{h_tile}_P_{P}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+        _build_variant(s, mode, proj_name)
+        return s if should_return else None
+    if variant != "dataflow":
+        raise ValueError(f"Unknown MLP variant: {variant}")
+
+    if activation == "pwl":
+        s = customize_mlp_dataflow_pwl(A_T, D, L, pwl_segments, P, dataflow)
+        proj_name = project if project is not None else f"mlp_dataflow_pwl_S{pwl_segments}_P_{P}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+        _build_variant(s, mode, proj_name)
+        return s if should_return else None
+    if activation != "float":
+        raise ValueError(f"Unknown activation: {activation}")
+
     s = allo.customize(mlp_dataflow, instantiate=[
         A_T,   # Kernel data type
         D,     # Feature Dimension
@@ -132,5 +432,84 @@ def schedule_mlp(
         project=proj_name,
     )()
 
+
+def schedule_mlp_swiglu(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    D: int = VBC.HIDDEN_DIM,
+    H: int = VBC.INTERMEDIATE_DIM,
+    L: int = VBC.NUM_TOKENS,
+    H_tile: int = 128,
+    P: int = 4,               # Reduction unroll factor
+    act_scale: float = 1.0 / 256,
+    mode: str = "csyn",
+    requant: bool = False,    # Emit A_T through the per-channel requant epilogue
+    out_scale: float = 1.0 / 1024,
+):
+    """
+    Gated MLP (mlp.mlp_swiglu). Defaults are the SmolLM2 backbone; pass
+    D=CAC.ACTION_HIDDEN_SIZE, H=CAC.INTERMEDIATE_DIM, L=CAC.LENGTH_OF_ACTION_CHUNK
+    for the action expert.
+
+    requant=True instantiates the store_out requant epilogue (RQ = 1), so the
+    output is A_T instead of int32 (out_scale is the int32 -> A_T scale used
+    in llvm mode).
+    """
+    if H % H_tile != 0:
+        raise ValueError(f"H_tile={H_tile} must divide H={H}")
+
+    Out_T = A_T if requant else int32
+    s = allo.customize(mlp_swiglu, instantiate=[A_T, Out_T, D, H, L, H_tile, int(requant)])
+    loops = s.get_loops()["swiglu_row"]
+
+    # Gate and up read the same x_row bank, so one partition feeds both
+    s.partition(s.x_row, partition.Cyclic, dim=1, factor=P)
+    s.partition(s.W_gate, partition.Cyclic, dim=1, factor=P)
+    s.partition(s.W_up, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["k"], factor=P)
+    s.pipeline(loops["k"])
+
+    s.partition(s.h_act, partition.Cyclic, dim=1, factor=P)
+    s.partition(s.W_down, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["k2"], factor=P)
+    s.pipeline(loops["k2"])
+
+    s.pipeline(loops["d0"])
+    s.pipeline(loops["n2"])
+    s.dataflow(loops["ht"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    rq_str = "_requant" if requant else ""
+    project_name = f"mlp_swiglu{rq_str}_D{D}_H{H}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            X = np.random.randint(-8, 8, (L, D)).astype(N_T)
+            W_gate = np.random.randint(-4, 4, (D, H)).astype(N_T)
+            W_up = np.random.randint(-4, 4, (D, H)).astype(N_T)
+            W_down = np.random.randint(-4, 4, (H, D)).astype(N_T)
+            mult, shift = make_requant_params(np.full(D, out_scale))
+            q_min, q_max = quant_range(4 if A_T == int4 else 8)
+            out = np.zeros((L, D), dtype=N_T if requant else np.int32)
+            s_llvm(X, W_gate, W_up, W_down, act_scale, mult, shift, 0, q_min, q_max, out)
+            ref = mlp_swiglu_np(X, W_gate, W_up, W_down, act_scale)
+            if requant:
+                ref = requant_np(ref, mult, shift, 0, q_min, q_max)
+            print(f"max |diff| vs numpy: {np.abs(out.astype(np.int64) - ref).max()}")
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
 if __name__ == "__main__":
     schedule_mlp(np.int8, int8, P=4, mode="csyn", enable_dataflow=True)
+    # schedule_mlp(np.int8, int8, P=4, mode="csyn", activation="pwl", pwl_segments=16)
+    # schedule_mlp(np.int8, int8, P=4, mode="csyn", variant="fused_ln")
+    # schedule_mlp(np.int8, int8, mode="csyn", variant="systolic", array_rows=16, array_cols=16)
+    # schedule_mlp(np.int8, int8, P=4, mode="csyn", variant="hidden_tiled", l_tile=16, h_tile=256)
+    # schedule_mlp_swiglu(np.int8, int8, mode="csyn")
+    # schedule_mlp_swiglu(np.int8, int8, mode="csyn", requant=True)
+    # schedule_mlp_swiglu(np.int8, int8, D=CAC.ACTION_HIDDEN_SIZE, H=CAC.INTERMEDIATE_DIM,
+    #                     L=CAC.LENGTH_OF_ACTION_CHUNK, mode="csyn")
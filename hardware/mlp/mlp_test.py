@@ -1,8 +1,11 @@
 """
 Test for MLP - INT8 MLP Kernel Verification with HLS Emulation
 
-Compares Allo mlp_dataflow against PyTorch reference.
-Supports Vitis HLS emulation modes: sw_emu, hw_emu, and hw.
+Compares Allo mlp_dataflow (or mlp_fused_ln / mlp_systolic / mlp_hidden_tiled,
+selected with --variant; --activation pwl uses the table GELU) against PyTorch
+reference.
+Supports Vitis HLS emulation modes: sw_emu, hw_emu, and hw, plus csyn and the
+llvm CPU simulator.
 """
 
 import allo
@@ -15,6 +18,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 from mlp import mlp_dataflow
+from common_kernels.activations import make_pwl_table
+from mlp_scheduler import customize_mlp_fused_ln, customize_mlp_systolic, customize_mlp_hidden_tiled, customize_mlp_dataflow_pwl
 
 
 def pytorch_int8_mlp(
@@ -83,9 +88,12 @@ def pytorch_int8_mlp(
     return FC2_ln.numpy(), intermediates
 
 
-def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=None, L_override=None, D_override=None, project_name=None):
-    """Test MLP with Vitis HLS (sw_emu, hw_emu, hw, or csyn)."""
+def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=None, L_override=None, D_override=None, project_name=None,
+                 variant="dataflow", array_rows=4, array_cols=4, l_tile=4, h_tile=64,
+                 activation="float", pwl_segments=16):
+    """Test MLP with Vitis HLS (sw_emu, hw_emu, hw, or csyn) or llvm."""
     mode_names = {
+        "llvm": "LLVM Simulation",
         "sw_emu": "Software Emulation",
         "hw_emu": "Hardware Emulation", 
         "hw": "Hardware Synthesis",
@@ -93,7 +101,7 @@ def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=No
     }
     
     print("\n" + "=" * 80)
-    print(f"MLP Test: Allo ({mode_names[mode]}) vs PyTorch | dtype={allo_dtype}")
+    print(f"MLP Test: Allo {variant} ({mode_names[mode]}) vs PyTorch | dtype={allo_dtype}")
     print("=" * 80)
     
     # Dimension selection based on reduced flag or overrides
@@ -122,6 +130,7 @@ def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=No
     
     # Time estimates
     time_estimates = {
+        "llvm": "~1 minute",
         "sw_emu": "~1 minute",
         "hw_emu": "~5-15 minutes (includes HLS synthesis)",
         "hw": "~2-6 hours (includes P&R and bitstream generation)",
@@ -134,9 +143,26 @@ def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=No
     pytorch_out, intermediates = pytorch_int8_mlp(X, W_1, B_1, W_2, B_2, gamma, beta)
     print(f"  Output range: [{pytorch_out.min()}, {pytorch_out.max()}]")
     print(f"  Building HLS project in '{mode}' mode...")
-    s = allo.customize(mlp_dataflow, instantiate=[allo_dtype, D, L])
-    # Apply schedule overrides if provided
-    if schedule_spec is not None:
+    if variant == "systolic":
+        # The llvm simulator runs the PE grid as a plain loop nest
+        print(f"  Systolic array: {array_rows}x{array_cols}")
+        s = customize_mlp_systolic(allo_dtype, D, L, array_rows, array_cols, unfold=(mode != "llvm"))
+    elif variant == "fused_ln":
+        s = customize_mlp_fused_ln(allo_dtype, D, L)
+    elif variant == "hidden_tiled":
+        print(f"  Hidden tiling: l_tile={l_tile}, h_tile={h_tile}")
+        s = customize_mlp_hidden_tiled(allo_dtype, D, L, l_tile, h_tile)
+    elif activation == "pwl":
+        print(f"  PWL GELU: {pwl_segments} segments")
+        s = customize_mlp_dataflow_pwl(allo_dtype, D, L, pwl_segments)
+    else:
+        s = allo.customize(mlp_dataflow, instantiate=[allo_dtype, D, L])
+    # GELU table arguments (mlp_dataflow_pwl only); FC1 outputs are raw integers
+    pwl_args = ()
+    if variant == "dataflow" and activation == "pwl":
+        pwl_args = make_pwl_table("gelu", pwl_segments)
+    # Apply schedule overrides if provided (mlp_dataflow's loop names only)
+    if schedule_spec is not None and variant == "dataflow" and activation == "float":
         kind = schedule_spec[0]
         if kind == "dataflow":
             enable_df = schedule_spec[1]
@@ -158,9 +184,14 @@ def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=No
     print(f"  Schedule info: {s}")
     
     try:
-        proj = project_name if project_name is not None else f"mlp_test_{mode}_L{L}_D{D}.prj"
+        proj = project_name if project_name is not None else f"mlp_test_{variant}_{mode}_L{L}_D{D}.prj"
         
-        if mode == "csyn":
+        if mode == "llvm":
+            mod = s.build()
+            allo_out = np.zeros((L, D), dtype=np.int8)
+            mod(X, W_1, B_1, W_2, B_2, gamma, beta, *pwl_args, allo_out)
+            print(f"  Output range: [{allo_out.min()}, {allo_out.max()}]")
+        elif mode == "csyn":
             mod = s.build(
                 target="vitis_hls",
                 mode="csyn",
@@ -183,7 +214,7 @@ def test_mlp_hls(allo_dtype=int8, mode="sw_emu", reduced=False, schedule_spec=No
             print(f"  Input X range: [{X.min()}, {X.max()}]")
             print(f"  Gamma range: [{gamma.min()}, {gamma.max()}]")
             print(f"  Beta range: [{beta.min()}, {beta.max()}]")
-            mod(X, W_1, B_1, W_2, B_2, gamma, beta, allo_out)
+            mod(X, W_1, B_1, W_2, B_2, gamma, beta, *pwl_args, allo_out)
             print(f"  Output range: [{allo_out.min()}, {allo_out.max()}]")
         
         # Compare
@@ -218,13 +249,20 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", default="sw_emu", help="Run mode: sw_emu, hw_emu, hw, csyn")
+    parser.add_argument("--mode", default="sw_emu", help="Run mode: sw_emu, hw_emu, hw, csyn, llvm")
     parser.add_argument("--reduced", action="store_true", help="Use reduced tensor sizes")
     parser.add_argument("--schedule", default=None, help="Schedule spec: dataflow or parallel")
     parser.add_argument("--parallel-factor", type=int, default=None, help="Parallel unroll factor")
     parser.add_argument("--L", type=int, default=None, help="Override L (tokens)")
     parser.add_argument("--D", type=int, default=None, help="Override D (features)")
     parser.add_argument("--project", type=str, default=None, help="HLS project name (folder)")
+    parser.add_argument("--variant", default="dataflow", help="MLP kernel: dataflow, fused_ln, systolic or hidden_tiled")
+    parser.add_argument("--array-rows", type=int, default=4, help="Systolic array rows (--variant systolic)")
+    parser.add_argument("--array-cols", type=int, default=4, help="Systolic array columns (--variant systolic)")
+    parser.add_argument("--activation", default="float", help="GELU: float or pwl (--variant dataflow)")
+    parser.add_argument("--pwl-segments", type=int, default=16, help="PWL GELU segments (--activation pwl)")
+    parser.add_argument("--l-tile", type=int, default=4, help="Token rows per tile (--variant hidden_tiled)")
+    parser.add_argument("--h-tile", type=int, default=64, help="Hidden columns per tile (--variant hidden_tiled)")
     args = parser.parse_args()
 
     # ============ CONFIGURATION ============
@@ -252,7 +290,10 @@ def main():
         # Run test, allow csyn mode for synthesis-only runs
         success = test_mlp_hls(allo_dtype=DTYPE, mode=TEST_TYPE, reduced=REDUCED_SIZE,
                                schedule_spec=schedule_spec, L_override=args.L, D_override=args.D,
-                               project_name=args.project)
+                               project_name=args.project, variant=args.variant,
+                               array_rows=args.array_rows, array_cols=args.array_cols,
+                               l_tile=args.l_tile, h_tile=args.h_tile,
+                               activation=args.activation, pwl_segments=args.pwl_segments)
         
         if success:
             print("\n✓ TEST PASSED")
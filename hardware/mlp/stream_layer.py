@@ -0,0 +1,226 @@
+"""
+Stream-connected encoder layer: QKV -> SDPA -> O-proj -> MLP as df.kernels.
+
+The monolithic kernels (mlp.mlp_dataflow, sdpa.self_attention_and_mlp)
+pass intermediates through full [L, D] arrays, and s.dataflow(loop) can at
+best ping-pong those arrays between iterations. Here every stage is its own
+df.kernel in one df.region, and stages are connected by FIFOs that carry one
+row at a time:
+
+    qkv_proj --k_pipe/v_pipe--> sdpa --attn_pipe--> o_proj --h_pipe--> mlp
+        \\--------q_pipe-------/                    /
+         \\---------------res_pipe-----------------/
+
+- qkv_proj streams all K / V rows first (every query needs every key), then
+  Q rows, each followed by its residual row of X for o_proj
+- sdpa keeps K / V on chip, the only full-tensor buffers left, and emits an
+  attention row per query row
+- o_proj adds the residual and hands the row to mlp, which writes out
+
+Once K / V are loaded, sdpa, o_proj and mlp overlap at row granularity.
+Intermediates are int32 as in self_attention_and_mlp: Q15 softmax weights,
+(P @ V) >> 15, float GELU truncated to int32.
+
+make_stream_layer closes the region over its sizes and FIFO depths, and
+build_stream_layer builds it. Row-sized depths (the defaults) let a stage run
+one row ahead of its consumer.
+"""
+
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4, Stream
+import allo.dataflow as df
+import numpy as np
+
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from attention.config import VLMAttentionConfig as VAC
+
+
+def make_stream_layer(
+    A_T=int8,
+    seq_len: int = VAC.NUM_TOKENS,
+    hidden: int = VAC.HIDDEN_DIM,
+    heads: int = VAC.NUM_HEADS,
+    ffn: int = 4 * VAC.HIDDEN_DIM,
+    qkv_depth: int = None,     # FIFO depths in elements, default one row
+    res_depth: int = None,
+    attn_depth: int = None,
+    h_depth: int = None,
+):
+    """
+    Return a stream_layer region for these sizes / FIFO depths. Each call
+    defines a fresh region, so differently sized layers can be built side by
+    side.
+    """
+    Ty = A_T
+    L, D, H, F = seq_len, hidden, heads, ffn
+    D_h = D // H
+    INV_SCALE = 1.0 / float(np.sqrt(D_h))
+    QKV_DEPTH = qkv_depth or D
+    RES_DEPTH = res_depth or D
+    ATTN_DEPTH = attn_depth or D
+    H_DEPTH = h_depth or D
+
+    @df.region()
+    def stream_layer():
+        q_pipe: Stream[int32, QKV_DEPTH]
+        k_pipe: Stream[int32, QKV_DEPTH]
+        v_pipe: Stream[int32, QKV_DEPTH]
+        res_pipe: Stream[int32, RES_DEPTH]
+        attn_pipe: Stream[int32, ATTN_DEPTH]
+        h_pipe: Stream[int32, H_DEPTH]
+
+        @df.kernel(mapping=[1])
+        def qkv_proj(X: Ty[L, D], W_q: Ty[D, D], W_k: Ty[D, D], W_v: Ty[D, D]):
+            # Pass 1: K / V rows
+            for i0 in allo.grid(L, name="kv_row"):
+                for j0 in allo.grid(D, name="kv_col"):
+                    acc_k: int32 = 0
+                    acc_v: int32 = 0
+                    for k0 in allo.reduction(D, name="kv_k"):
+                        x0: int32 = X[i0, k0]
+                        wk0: int32 = W_k[k0, j0]
+                        wv0: int32 = W_v[k0, j0]
+                        acc_k += x0 * wk0
+                        acc_v += x0 * wv0
+                    k_pipe.put(acc_k)
+                    v_pipe.put(acc_v)
+
+            # Pass 2: Q rows, each followed by its residual row
+            for i1 in allo.grid(L, name="q_row"):
+                for j1 in allo.grid(D, name="q_col"):
+                    acc_q: int32 = 0
+                    for k1 in allo.reduction(D, name="q_k"):
+                        x1: int32 = X[i1, k1]
+                        wq1: int32 = W_q[k1, j1]
+                        acc_q += x1 * wq1
+                    q_pipe.put(acc_q)
+                for j2 in allo.grid(D, name="res_col"):
+                    x2: int32 = X[i1, j2]
+                    res_pipe.put(x2)
+
+        @df.kernel(mapping=[1])
+        def sdpa():
+            K_buf: int32[L, D]
+            V_buf: int32[L, D]
+            for i2, d2 in allo.grid(L, D, name="kv_load"):
+                K_buf[i2, d2] = k_pipe.get()
+                V_buf[i2, d2] = v_pipe.get()
+
+            for i3 in allo.grid(L, name="attn_row"):
+                q_row: int32[D]
+                for d3 in allo.grid(D, name="q_load"):
+                    q_row[d3] = q_pipe.get()
+                for h in allo.grid(H, name="attn_head"):
+                    scores: float32[L]
+                    max_val: float32 = -1.0 / 0.0
+                    for j4 in allo.grid(L, name="score_j"):
+                        s_acc: int32 = 0
+                        for k4 in allo.reduction(D_h, name="score_k"):
+                            s_acc += q_row[h * D_h + k4] * K_buf[j4, h * D_h + k4]
+                        s_f: float32 = s_acc
+                        s_f = s_f * INV_SCALE
+                        if s_f > max_val:
+                            max_val = s_f
+                        scores[j4] = s_f
+                    sum_exp: float32 = 0.0
+                    for j5 in allo.grid(L, name="exp_j"):
+                        e: float32 = allo.exp(scores[j5] - max_val)
+                        scores[j5] = e
+                        sum_exp += e
+                    probs: int32[L]
+                    for j6 in allo.grid(L, name="norm_j"):
+                        q15: float32 = scores[j6] / sum_exp * 32768.0
+                        if q15 > 32767.0:
+                            q15 = 32767.0
+                        probs[j6] = q15
+                    for d7 in allo.grid(D_h, name="pv_d"):
+                        p_acc: int32 = 0
+                        for j7 in allo.reduction(L, name="pv_j"):
+                            p_acc += probs[j7] * V_buf[j7, h * D_h + d7]
+                        attn_pipe.put(p_acc >> 15)
+
+        @df.kernel(mapping=[1])
+        def o_proj(W_o: Ty[D, D]):
+            for i8 in allo.grid(L, name="o_row"):
+                a_row: int32[D]
+                r_row: int32[D]
+                for d8 in allo.grid(D, name="attn_load"):
+                    a_row[d8] = attn_pipe.get()
+                for d9 in allo.grid(D, name="res_load"):
+                    r_row[d9] = res_pipe.get()
+                for j10 in allo.grid(D, name="o_col"):
+                    o_acc: int32 = 0
+                    for k10 in allo.reduction(D, name="o_k"):
+                        wo: int32 = W_o[k10, j10]
+                        o_acc += a_row[k10] * wo
+                    h_pipe.put(o_acc + r_row[j10])
+
+        @df.kernel(mapping=[1])
+        def mlp(W_1: Ty[D, F], W_2: Ty[F, D], out: int32[L, D]):
+            for i11 in allo.grid(L, name="mlp_row"):
+                h_row: int32[D]
+                for d11 in allo.grid(D, name="h_load"):
+                    h_row[d11] = h_pipe.get()
+                f_row: int32[F]
+                for j12 in allo.grid(F, name="fc1_col"):
+                    f_acc: int32 = 0
+                    for k12 in allo.reduction(D, name="fc1_k"):
+                        w1: int32 = W_1[k12, j12]
+                        f_acc += h_row[k12] * w1
+                    x_f: float32 = f_acc
+                    x3: float32 = x_f * x_f * x_f
+                    inner: float32 = 0.7978845608028654 * (x_f + 0.044715 * x3)
+                    f_row[j12] = 0.5 * x_f * (1.0 + allo.tanh(inner))
+                for j13 in allo.grid(D, name="fc2_col"):
+                    m_acc: int32 = 0
+                    for k13 in allo.reduction(F, name="fc2_k"):
+                        w2: int32 = W_2[k13, j13]
+                        m_acc += f_row[k13] * w2
+                    out[i11, j13] = m_acc + h_row[j13]
+
+    return stream_layer
+
+
+def build_stream_layer(
+    A_T=int8,
+    seq_len: int = VAC.NUM_TOKENS,
+    hidden: int = VAC.HIDDEN_DIM,
+    heads: int = VAC.NUM_HEADS,
+    ffn: int = 4 * VAC.HIDDEN_DIM,
+    qkv_depth: int = None,
+    res_depth: int = None,
+    attn_depth: int = None,
+    h_depth: int = None,
+    target: str = "simulator",
+    **build_kwargs
+):
+    """
+    Build make_stream_layer's region. The module takes
+    (X, W_q, W_k, W_v, W_o, W_1, W_2, out), the kernel arguments in order.
+    """
+    region = make_stream_layer(A_T, seq_len, hidden, heads, ffn,
+                               qkv_depth, res_depth, attn_depth, h_depth)
+    return df.build(region, target=target, **build_kwargs)
+
+
+def stream_layer_np(X, W_q, W_k, W_v, W_o, W_1, W_2, heads):
+    """Numpy reference for stream_layer (same integer steps, float32 softmax / GELU)."""
+    X32 = X.astype(np.int64)
+    Q, K, V = (X32 @ W.astype(np.int64) for W in (W_q, W_k, W_v))
+    seq_len, hidden = X.shape
+    d_h = hidden // heads
+    attn = np.zeros((seq_len, hidden), dtype=np.int64)
+    for h in range(heads):
+        cols = slice(h * d_h, (h + 1) * d_h)
+        s = (Q[:, cols] @ K[:, cols].T).astype(np.float32) * np.float32(1.0 / np.sqrt(d_h))
+        e = np.exp(s - s.max(axis=-1, keepdims=True))
+        p = np.minimum(e / e.sum(axis=-1, keepdims=True) * np.float32(32768.0), 32767.0)
+        attn[:, cols] = (np.trunc(p).astype(np.int64) @ V[:, cols]) >> 15
+    h_res = attn @ W_o.astype(np.int64) + X32
+    f = (h_res @ W_1.astype(np.int64)).astype(np.float32)
+    gelu = np.float32(0.5) * f * (np.float32(1.0) + np.tanh(np.float32(0.7978845608028654) * (f + np.float32(0.044715) * f ** 3)))
+    return np.trunc(gelu).astype(np.int64) @ W_2.astype(np.int64) + h_res
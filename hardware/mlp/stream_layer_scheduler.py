@@ -0,0 +1,59 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+import numpy as np
+from stream_layer import build_stream_layer, stream_layer_np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from attention.config import VLMAttentionConfig as VAC
+
+
+def schedule_stream_layer(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    L: int = VAC.NUM_TOKENS,
+    D: int = VAC.HIDDEN_DIM,
+    H: int = VAC.NUM_HEADS,
+    F: int = 4 * VAC.HIDDEN_DIM,
+    qkv_depth: int = None,    # FIFO depths in elements, None = one row (D)
+    res_depth: int = None,
+    attn_depth: int = None,
+    h_depth: int = None,
+    mode: str = "csyn",
+):
+    """
+    Stream-connected QKV -> SDPA -> O-proj -> MLP layer (stream_layer).
+    llvm runs the region on the dataflow simulator against stream_layer_np;
+    csyn emits one HLS dataflow function with a FIFO per stream.
+
+    Depths below one row still finish (each stage reads a row before it
+    needs more), they only serialise the producer and consumer.
+    """
+    dtype_str = "int4" if A_T == int4 else "int8"
+    depth_str = "_".join(str(d or D) for d in (qkv_depth, res_depth, attn_depth, h_depth))
+    project_name = f"stream_layer_L{L}_D{D}_fifo_{depth_str}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    depths = dict(qkv_depth=qkv_depth, res_depth=res_depth, attn_depth=attn_depth, h_depth=h_depth)
+    match mode:
+        case "llvm":
+            sim = build_stream_layer(A_T, L, D, H, F, **depths, target="simulator")
+            X = np.random.randint(-4, 4, (L, D)).astype(N_T)
+            W_q, W_k, W_v, W_o = (np.random.randint(-2, 2, (D, D)).astype(N_T) for _ in range(4))
+            W_1 = np.random.randint(-2, 2, (D, F)).astype(N_T)
+            W_2 = np.random.randint(-2, 2, (F, D)).astype(N_T)
+            out = np.zeros((L, D), dtype=np.int32)
+            sim(X, W_q, W_k, W_v, W_o, W_1, W_2, out)
+            ref = stream_layer_np(X, W_q, W_k, W_v, W_o, W_1, W_2, H)
+            print(f"max |diff| vs numpy: {np.abs(out.astype(np.int64) - ref).max()}")
+            return out, sim
+        case "csyn":
+            s_csyn = build_stream_layer(A_T, L, D, H, F, **depths, target="vitis_hls",
+                                        mode="csyn", project=project_name)
+            s_csyn()
+            return s_csyn, s_csyn
+
+
+if __name__ == "__main__":
+    schedule_stream_layer(np.int8, int8, mode="csyn")
+    # schedule_stream_layer(np.int8, int8, L=16, D=64, H=2, F=128, mode="llvm")
+    # schedule_stream_layer(np.int8, int8, qkv_depth=2 * VAC.HIDDEN_DIM, attn_depth=VAC.SINGLE_HEAD_DIM, mode="csyn")
@@ -0,0 +1,39 @@
+"""Pytest for the piecewise-linear activation tables (common_kernels.activations)."""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import allo
+from common_kernels.activations import (
+    pwl_activation,
+    pwl_np,
+    pwl_error,
+    make_pwl_table,
+)
+
+
+@pytest.mark.parametrize("name", ["gelu", "silu", "tanh"])
+@pytest.mark.parametrize("S", [16, 64])
+def test_pwl_activation_bit_exact(name, S):
+    L, D = 8, 64
+    slope, icept, x_lo, seg_shift = make_pwl_table(name, S, s_in=1.0 / 256, s_out=1.0 / 256)
+    np.random.seed(0)
+    x = np.random.randint(-4096, 4096, (L, D)).astype(np.int32)
+
+    s = allo.customize(pwl_activation, instantiate=[L, D, S])
+    out = np.zeros((L, D), dtype=np.int32)
+    s.build()(x, slope, icept, x_lo, seg_shift, out)
+
+    np.testing.assert_array_equal(out, pwl_np(x, slope, icept, x_lo, seg_shift))
+
+
+@pytest.mark.parametrize("name", ["gelu", "silu", "tanh"])
+def test_pwl_error_shrinks_with_segments(name):
+    """More segments never hurt, and 64 segments reach a few output LSBs."""
+    errors = [pwl_error(name, S)[0] for S in (8, 16, 32, 64)]
+    assert all(b <= a * 1.05 for a, b in zip(errors, errors[1:])), errors
+    assert errors[-1] < 4.0 / 256
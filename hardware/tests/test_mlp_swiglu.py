@@ -0,0 +1,78 @@
+"""Pytest for the gated (SwiGLU) MLP kernel against NumPy and PyTorch."""
+
+import pytest
+import torch
+import torch.nn.functional as F
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import allo
+from allo.ir.types import int8, int32
+from mlp.mlp import mlp_swiglu, mlp_swiglu_np
+from common_kernels.requant import make_requant_params, no_requant_args, quant_range, requant_np
+
+
+@pytest.mark.parametrize("L, D, H, H_tile", [
+    (4, 32, 64, 16),
+    (8, 48, 128, 32),
+])
+def test_mlp_swiglu_vs_numpy(L, D, H, H_tile):
+    np.random.seed(0)
+    X = np.random.randint(-8, 8, (L, D)).astype(np.int8)
+    W_gate = np.random.randint(-4, 4, (D, H)).astype(np.int8)
+    W_up = np.random.randint(-4, 4, (D, H)).astype(np.int8)
+    W_down = np.random.randint(-4, 4, (H, D)).astype(np.int8)
+    act_scale = 1.0 / 64
+
+    expected = mlp_swiglu_np(X, W_gate, W_up, W_down, act_scale)
+
+    s = allo.customize(mlp_swiglu, instantiate=[int8, int32, D, H, L, H_tile, 0])
+    mod = s.build()
+    out = np.zeros((L, D), dtype=np.int32)
+    mod(X, W_gate, W_up, W_down, act_scale, *no_requant_args(D), out)
+
+    # A float32 rounding difference can move one truncated activation by 1,
+    # which shifts an output by at most |W_down| per flipped activation.
+    diff = np.abs(out.astype(np.int64) - expected)
+    assert diff.max() <= 4 * 4, f"SwiGLU mismatch (max diff {diff.max()})"
+
+
+def test_mlp_swiglu_requant_epilogue():
+    """RQ = 1: store_out requantizes each row to int8."""
+    L, D, H, H_tile = 4, 32, 64, 16
+    np.random.seed(2)
+    X = np.random.randint(-8, 8, (L, D)).astype(np.int8)
+    W_gate = np.random.randint(-4, 4, (D, H)).astype(np.int8)
+    W_up = np.random.randint(-4, 4, (D, H)).astype(np.int8)
+    W_down = np.random.randint(-4, 4, (H, D)).astype(np.int8)
+    act_scale = 1.0 / 64
+    mult, shift = make_requant_params(np.random.uniform(1 / 128, 1 / 32, D))
+    q_min, q_max = quant_range(8)
+
+    s = allo.customize(mlp_swiglu, instantiate=[int8, int8, D, H, L, H_tile, 1])
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(X, W_gate, W_up, W_down, act_scale, mult, shift, 0, q_min, q_max, out)
+
+    # The int32 sum is within 16 of the reference (see above), <= 1 LSB after requant
+    expected = requant_np(mlp_swiglu_np(X, W_gate, W_up, W_down, act_scale), mult, shift, 0, q_min, q_max)
+    diff = np.abs(out.astype(np.int64) - expected)
+    assert diff.max() <= 1, f"SwiGLU requant mismatch (max diff {diff.max()})"
+
+
+def test_mlp_swiglu_np_matches_torch():
+    """The NumPy reference is SiLU(x W_gate) * (x W_up) @ W_down."""
+    np.random.seed(1)
+    X = np.random.randint(-8, 8, (4, 32)).astype(np.int8)
+    W_gate = np.random.randint(-4, 4, (32, 64)).astype(np.int8)
+    W_up = np.random.randint(-4, 4, (32, 64)).astype(np.int8)
+    W_down = np.random.randint(-4, 4, (64, 32)).astype(np.int8)
+
+    X_t = torch.from_numpy(X.astype(np.float64))
+    h = F.silu(X_t @ torch.from_numpy(W_gate.astype(np.float64))) * (X_t @ torch.from_numpy(W_up.astype(np.float64)))
+    expected = torch.trunc(h / 64).to(torch.int64) @ torch.from_numpy(W_down.astype(np.int64))
+
+    out = mlp_swiglu_np(X, W_gate, W_up, W_down, 1.0 / 64)
+    assert np.abs(out - expected.numpy()).max() <= 4 * 4
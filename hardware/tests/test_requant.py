@@ -0,0 +1,44 @@
+"""Pytest for per-channel requantization (common_kernels.requant)."""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import allo
+from allo.ir.types import int4, int8
+from common_kernels.requant import (
+    requantize,
+    requant_np,
+    make_requant_params,
+    quant_range,
+)
+
+
+def test_requant_np_matches_float_rounding():
+    np.random.seed(0)
+    acc = np.random.randint(-(1 << 20), 1 << 20, (16, 64)).astype(np.int32)
+    scales = np.random.uniform(1e-5, 1e-3, 64)
+    mult, shift = make_requant_params(scales)
+
+    x = acc * scales
+    expected = np.clip(np.sign(x) * np.floor(np.abs(x) + 0.5) + 3, -128, 127)
+    np.testing.assert_array_equal(requant_np(acc, mult, shift, 3), expected)
+
+
+@pytest.mark.parametrize("A_T, bits", [(int8, 8), (int4, 4)])
+def test_requantize_bit_exact(A_T, bits):
+    L, N = 8, 32
+    np.random.seed(1)
+    acc = np.random.randint(-(1 << 16), 1 << 16, (L, N)).astype(np.int32)
+    mult, shift = make_requant_params(np.random.uniform(1e-4, 1e-2, N))
+    q_min, q_max = quant_range(bits)
+
+    s = allo.customize(requantize, instantiate=[A_T, L, N])
+    out = np.zeros((L, N), dtype=np.int8)
+    s.build()(acc, mult, shift, -1, q_min, q_max, out)
+
+    np.testing.assert_array_equal(out, requant_np(acc, mult, shift, -1, q_min, q_max))
+
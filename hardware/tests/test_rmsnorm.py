@@ -0,0 +1,83 @@
+"""Pytest for the RMSNorm kernels (standalone and GEMM-epilogue forms)."""
+
+import pytest
+import torch
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import allo
+from allo.ir.types import int4, int8
+from common_kernels.rmsnorm import (
+    rmsnorm,
+    gemm_rmsnorm_epilogue,
+    rmsnorm_np,
+    fold_rmsnorm_params,
+)
+
+
+@pytest.mark.parametrize("L, D", [(4, 64), (8, 960)])
+def test_rmsnorm_vs_numpy(L, D):
+    np.random.seed(0)
+    x = np.random.randint(-20000, 20000, (L, D)).astype(np.int32)
+    gamma_q, eps_q = fold_rmsnorm_params(np.random.rand(D) + 0.5, s_in=1e-3, s_out=0.05)
+
+    s = allo.customize(rmsnorm, instantiate=[int8, L, D])
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(x, gamma_q, eps_q, -128, 127, out)
+
+    # float32 op order can move a value across a rounding boundary
+    diff = np.abs(out.astype(np.int32) - rmsnorm_np(x, gamma_q, eps_q))
+    assert diff.max() <= 1
+
+
+def test_rmsnorm_int4_range():
+    """T = int4 saturates to [q_min, q_max] = [-8, 7]."""
+    L, D = 4, 64
+    np.random.seed(3)
+    x = np.random.randint(-20000, 20000, (L, D)).astype(np.int32)
+    gamma_q, eps_q = fold_rmsnorm_params(np.random.rand(D) + 0.5, s_in=1e-3, s_out=0.25)
+
+    s = allo.customize(rmsnorm, instantiate=[int4, L, D])
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(x, gamma_q, eps_q, -8, 7, out)
+
+    ref = rmsnorm_np(x, gamma_q, eps_q, -8, 7)
+    assert ref.min() == -8 and ref.max() == 7
+    assert np.abs(out.astype(np.int32) - ref).max() <= 1
+
+
+def test_rmsnorm_np_matches_torch():
+    """rmsnorm_np dequantized equals torch RMSNorm within one output LSB."""
+    np.random.seed(1)
+    D, s_in, s_out = 720, 1e-3, 0.05
+    x = np.random.randint(-20000, 20000, (8, D)).astype(np.int32)
+    gamma = np.random.rand(D) + 0.5
+    gamma_q, eps_q = fold_rmsnorm_params(gamma, s_in, s_out)
+
+    x_t = torch.from_numpy(x.astype(np.float64) * s_in)
+    ref = x_t * torch.rsqrt(x_t.pow(2).mean(-1, keepdim=True) + 1e-5) * torch.from_numpy(gamma)
+    ref_q = torch.clamp(torch.round(ref / s_out), -128, 127).numpy()
+
+    assert np.abs(rmsnorm_np(x, gamma_q, eps_q) - ref_q).max() <= 1
+
+
+def test_gemm_rmsnorm_epilogue():
+    L, K, D = 4, 32, 64
+    np.random.seed(2)
+    A = np.random.randint(-8, 8, (L, K)).astype(np.int8)
+    W = np.random.randint(-8, 8, (K, D)).astype(np.int8)
+    residual = np.random.randint(-500, 500, (L, D)).astype(np.int32)
+    gamma_q, eps_q = fold_rmsnorm_params(np.ones(D), s_in=1e-2, s_out=0.05)
+
+    s = allo.customize(gemm_rmsnorm_epilogue, instantiate=[int8, L, K, D])
+    res_out = np.zeros((L, D), dtype=np.int32)
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(A, W, residual, gamma_q, eps_q, res_out, out)
+
+    expected_res = A.astype(np.int32) @ W.astype(np.int32) + residual
+    np.testing.assert_array_equal(res_out, expected_res)
+    diff = np.abs(out.astype(np.int32) - rmsnorm_np(expected_res, gamma_q, eps_q))
+    assert diff.max() <= 1
@@ -0,0 +1,53 @@
+"""Pytest for the stream-connected QKV -> SDPA -> O-proj -> MLP dataflow region."""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import allo
+from allo.ir.types import int8
+from mlp.stream_layer import build_stream_layer, stream_layer_np
+
+
+def _inputs(L, D, F, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-4, 4, (L, D)).astype(np.int8)
+    W_q, W_k, W_v, W_o = (rng.integers(-2, 2, (D, D)).astype(np.int8) for _ in range(4))
+    W_1 = rng.integers(-2, 2, (D, F)).astype(np.int8)
+    W_2 = rng.integers(-2, 2, (F, D)).astype(np.int8)
+    return X, W_q, W_k, W_v, W_o, W_1, W_2
+
+
+@pytest.mark.parametrize("depths", [
+    dict(),                                                  # one row per FIFO
+    dict(qkv_depth=1, res_depth=1, attn_depth=1, h_depth=1),
+    dict(qkv_depth=64, res_depth=4, attn_depth=8, h_depth=2),
+])
+def test_stream_layer_vs_numpy(depths):
+    L, D, H, F = 8, 32, 2, 64
+    args = _inputs(L, D, F)
+
+    sim = build_stream_layer(int8, L, D, H, F, **depths)
+    out = np.zeros((L, D), dtype=np.int32)
+    sim(*args, out)
+
+    # float32 softmax / GELU can round a Q15 weight or a truncated GELU output
+    # differently; a flip moves outputs (|out| ~ 1e5 here) by a few |W| each.
+    expected = stream_layer_np(*args, H)
+    diff = np.abs(out.astype(np.int64) - expected)
+    assert diff.max() <= 64, f"stream layer mismatch (max diff {diff.max()})"
+
+
+def test_stream_layer_sizes_side_by_side():
+    """Two sizes built before either runs keep their own shapes and depths."""
+    sizes = [(8, 32, 2, 64, dict()), (4, 16, 4, 32, dict(qkv_depth=1, h_depth=1))]
+    sims = [build_stream_layer(int8, L, D, H, F, **depths) for L, D, H, F, depths in sizes]
+    for sim, (L, D, H, F, _) in zip(sims, sizes):
+        args = _inputs(L, D, F, seed=D)
+        out = np.zeros((L, D), dtype=np.int32)
+        sim(*args, out)
+        diff = np.abs(out.astype(np.int64) - stream_layer_np(*args, H))
+        assert diff.max() <= 64, f"L={L} D={D} mismatch (max diff {diff.max()})"
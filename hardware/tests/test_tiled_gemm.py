@@ -0,0 +1,109 @@
+"""Pytest for the tiled GEMM templates (matrix_multiplies.mm_tiled / mm_transpose_tiled)."""
+
+import pytest
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import allo
+from allo.ir.types import int8, int32, float32
+from matrix_multiplies import mm_tiled, mm_transpose_tiled
+from matrix_multiplies_scheduler import pick_tile, customize_mm_tiled
+from common_kernels.requant import make_requant_params, no_requant_args, quant_range, requant_np
+from test_mlp_kernels import LINEAR_LAYER_SHAPES
+
+
+@pytest.mark.parametrize("shape", LINEAR_LAYER_SHAPES)
+def test_mm_tiled_linear_layer_shapes(shape):
+    """C = A @ B for every model projection, tiles picked per shape."""
+    in_dim, out_dim = shape
+    M = 3
+    Tm, Tk, Tn = pick_tile(M, 4), pick_tile(in_dim, 64), pick_tile(out_dim, 16)
+
+    np.random.seed(0)
+    A = np.random.randint(-8, 8, (M, in_dim)).astype(np.int8)
+    B = np.random.randint(-8, 8, (in_dim, out_dim)).astype(np.int8)
+
+    s = allo.customize(mm_tiled, instantiate=[int8, int32, int32, M, in_dim, out_dim, Tm, Tk, Tn, 0])
+    C = np.zeros((M, out_dim), dtype=np.int32)
+    s.build()(A, B, *no_requant_args(out_dim), C)
+
+    np.testing.assert_array_equal(C, A.astype(np.int32) @ B.astype(np.int32))
+
+
+@pytest.mark.parametrize("shape, tiles", [
+    ((720, 960), (2, 48, 16)),
+    ((960, 320), (4, 64, 32)),
+])
+def test_mm_transpose_tiled(shape, tiles):
+    """C = A @ B^T with B in nn.Linear [out, in] layout."""
+    in_dim, out_dim = shape
+    Tm, Tk, Tn = tiles
+    M = 8
+
+    np.random.seed(1)
+    A = np.random.randint(-8, 8, (M, in_dim)).astype(np.int8)
+    B = np.random.randint(-8, 8, (out_dim, in_dim)).astype(np.int8)
+
+    s = allo.customize(mm_transpose_tiled, instantiate=[int8, int32, int32, M, in_dim, out_dim, Tm, Tk, Tn, 0])
+    C = np.zeros((M, out_dim), dtype=np.int32)
+    s.build()(A, B, *no_requant_args(out_dim), C)
+
+    np.testing.assert_array_equal(C, A.astype(np.int32) @ B.astype(np.int32).T)
+
+
+@pytest.mark.parametrize("M, K, N, tiles, transpose", [
+    (16, 768, 96, (8, 64, 8), False),
+    (6, 960, 320, (3, 48, 16), True),
+])
+def test_customize_mm_tiled_llvm(M, K, N, tiles, transpose):
+    """The scheduled GEMM (partitions, pipelines, per-tile dataflow) still computes A @ B."""
+    Tm, Tk, Tn = tiles
+
+    np.random.seed(2)
+    A = np.random.randint(-8, 8, (M, K)).astype(np.int8)
+    B = np.random.randint(-8, 8, (N, K) if transpose else (K, N)).astype(np.int8)
+
+    s = customize_mm_tiled(int8, int32, M, K, N, Tm, Tk, Tn, transpose=transpose)
+    C = np.zeros((M, N), dtype=np.int32)
+    s.build()(A, B, *no_requant_args(N), C)
+
+    ref = A.astype(np.int32) @ (B.T if transpose else B).astype(np.int32)
+    np.testing.assert_array_equal(C, ref)
+
+
+@pytest.mark.parametrize("transpose", [False, True])
+def test_customize_mm_tiled_requant(transpose):
+    """requant=True: store_c writes requant_value(c_tile), bit-exact vs requant_np."""
+    M, K, N = 8, 128, 32
+    Tm, Tk, Tn = 4, 64, 8
+
+    np.random.seed(3)
+    A = np.random.randint(-128, 128, (M, K)).astype(np.int8)
+    B = np.random.randint(-128, 128, (N, K) if transpose else (K, N)).astype(np.int8)
+    mult, shift = make_requant_params(np.random.uniform(1.0 / 8192, 1.0 / 2048, N))
+    q_min, q_max = quant_range(8)
+
+    s = customize_mm_tiled(int8, int32, M, K, N, Tm, Tk, Tn, transpose=transpose, requant=True)
+    C = np.zeros((M, N), dtype=np.int8)
+    s.build()(A, B, mult, shift, 2, q_min, q_max, C)
+
+    acc = A.astype(np.int32) @ (B.T if transpose else B).astype(np.int32)
+    np.testing.assert_array_equal(C, requant_np(acc, mult, shift, 2, q_min, q_max))
+
+
+def test_customize_mm_tiled_rejects_bad_tiles():
+    with pytest.raises(ValueError):
+        customize_mm_tiled(int8, int32, 6, 64, 16, 4, 64, 8)
+    with pytest.raises(ValueError):
+        customize_mm_tiled(int8, float32, 8, 64, 16, 4, 64, 8, requant=True)
+
+
+def test_pick_tile():
+    assert pick_tile(3072, 64) == 64
+    assert pick_tile(720, 64) == 60
+    assert pick_tile(241, 8) == 1
+    assert pick_tile(3, 4) == 3
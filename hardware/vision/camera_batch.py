@@ -0,0 +1,232 @@
+"""
+Camera-batched vision encoder kernels.
+
+smolVLA encodes NUM_CAMERAS (3) frames of V_PATCHES=1024 tokens with the same
+encoder weights. Running the single-frame kernels once per camera streams
+every weight byte from HBM NUM_CAMERAS times. Here the frames are a leading
+C axis and every layer walks row blocks (the same L_tile token rows of each
+frame): the block's activations stay on chip while the weights are streamed
+over it in tiles, and each tile is applied to all C * L_tile tokens. Every
+weight fetch serves C frames and each linear reads its input once, so
+weight traffic drops by C (1.9x operational intensity for 3 cameras,
+analysis/memory_model.py calc_vision_mem_batched).
+
+Attention mixes tokens within a frame only, so sdpa_camera_batched runs the
+existing per-frame SDPA engine once per (camera, head).
+
+Linear outputs are requantized per channel (common_kernels.requant) so Q/K/V
+stay in T between stages.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from attention.self_attention.sdpa import sdpa_streaming_8row
+from common_kernels.requant import requant_value
+
+
+def linear_camera_batched[
+    T: (int4, int8),
+    C: int16,       # Number of cameras (frames)
+    L: int16,       # Tokens per frame
+    K: int16,       # Input features
+    N: int16,       # Output features
+    L_tile: int16,  # Tokens per row block (per frame)
+    Tn: int16       # Output features per weight tile
+](
+    X: "T[C, L, K]",
+    W: "T[K, N]",
+    B: "T[N]",
+    mult: "int32[N]",      # common_kernels.requant.make_requant_params
+    shift: "int32[N]",
+    q_min: int32,
+    q_max: int32,
+    out: "T[C, L, N]"
+):
+    """
+    out = requant(X @ W + B) for all frames, one row block at a time.
+
+    The row block's x_tile [C, L_tile, K] is read from HBM once and the
+    [K, Tn] weight tiles are streamed over it, each applied to all
+    C * L_tile rows. X is read once per layer and W once per row block
+    (L / L_tile times).
+    """
+    for lt in allo.grid(L // L_tile, name="row_tile"):
+        x_tile: "T[C, L_tile, K]"
+        for c0, i0, k0 in allo.grid(C, L_tile, K, name="load_x"):
+            x_tile[c0, i0, k0] = X[c0, lt * L_tile + i0, k0]
+
+        for nt in allo.grid(N // Tn, name="w_tile"):
+            w_buf: "T[K, Tn]"
+            for k1, j1 in allo.grid(K, Tn, name="load_w"):
+                w_buf[k1, j1] = W[k1, nt * Tn + j1]
+
+            for c, i, j in allo.grid(C, L_tile, Tn, name="tile_out"):
+                n: int32 = nt * Tn + j
+                acc: int32 = B[n]
+                for k in allo.reduction(K, name="tile_k"):
+                    x_v: int32 = x_tile[c, i, k]
+                    w_v: int32 = w_buf[k, j]
+                    acc += x_v * w_v
+                out[c, lt * L_tile + i, n] = requant_value(acc, mult[n], shift[n], 0, q_min, q_max)
+
+
+def qkv_camera_batched[
+    T: (int4, int8),
+    C: int16,
+    L: int16,
+    D: int16,
+    L_tile: int16,
+    Tn: int16
+](
+    X: "T[C, L, D]",
+    W_q: "T[D, D]",
+    W_k: "T[D, D]",
+    W_v: "T[D, D]",
+    B_q: "T[D]",
+    B_k: "T[D]",
+    B_v: "T[D]",
+    mult_q: "int32[D]",    # Per-projection requant (make_requant_params)
+    shift_q: "int32[D]",
+    mult_k: "int32[D]",
+    shift_k: "int32[D]",
+    mult_v: "int32[D]",
+    shift_v: "int32[D]",
+    q_min: int32,
+    q_max: int32,
+    Q: "T[C, L, D]",
+    K: "T[C, L, D]",
+    V: "T[C, L, D]"
+):
+    """
+    Q/K/V projections for all frames, each weight tile fetched once per
+    row block. Q, K and V have their own output scales, so each takes its
+    own (mult, shift).
+    """
+    linear_camera_batched[T, C, L, D, D, L_tile, Tn, "q_proj"](X, W_q, B_q, mult_q, shift_q, q_min, q_max, Q)
+    linear_camera_batched[T, C, L, D, D, L_tile, Tn, "k_proj"](X, W_k, B_k, mult_k, shift_k, q_min, q_max, K)
+    linear_camera_batched[T, C, L, D, D, L_tile, Tn, "v_proj"](X, W_v, B_v, mult_v, shift_v, q_min, q_max, V)
+
+
+def sdpa_camera_batched[
+    T: (int4, int8),
+    C: int16,
+    H: int16,     # Heads
+    L: int16,
+    D: int16,     # H * D_h
+    D_h: int16,
+    P: int16      # Row parallelism (sdpa_streaming_8row)
+](
+    Q: "T[C, L, D]",
+    K: "T[C, L, D]",
+    V: "T[C, L, D]",
+    scale: "float32",
+    out: "T[C, L, D]"
+):
+    """Per-frame, per-head SDPA over the [C, L, D] projection layout."""
+    for c, h in allo.grid(C, H, name="frame_head"):
+        Q_head: "T[L, D_h]"
+        K_head: "T[L, D_h]"
+        V_head: "T[L, D_h]"
+        out_head: "T[L, D_h]"
+        for l_in, d_in in allo.grid(L, D_h, name="load_head"):
+            Q_head[l_in, d_in] = Q[c, l_in, h * D_h + d_in]
+            K_head[l_in, d_in] = K[c, l_in, h * D_h + d_in]
+            V_head[l_in, d_in] = V[c, l_in, h * D_h + d_in]
+
+        sdpa_streaming_8row[T, L, D_h, P, "engine"](Q_head, K_head, V_head, scale, out_head)
+
+        for l_out, d_out in allo.grid(L, D_h, name="store_head"):
+            out[c, l_out, h * D_h + d_out] = out_head[l_out, d_out]
+
+
+def mlp_camera_batched[
+    T: (int4, int8),
+    C: int16,
+    L: int16,
+    D: int16,
+    L_tile: int16,  # Tokens per row block (per frame)
+    H_tile: int16   # Hidden (4D) columns per tile
+](
+    X: "T[C, L, D]",
+    W_1: "T[D, 4 * D]",
+    B_1: "T[4 * D]",
+    W_2: "T[4 * D, D]",
+    B_2: "T[D]",
+    gamma: "T[D]",
+    beta: "T[D]",
+    out: "T[C, L, D]"
+):
+    """
+    mlp.mlp_hidden_tiled over all frames.
+
+    A row block is the same L_tile token rows of every frame. Its hidden
+    dimension is walked H_tile columns at a time: the W_1 column slice and
+    W_2 row slice are fetched once and applied to all C * L_tile tokens
+    (FC1 -> bias -> GELU -> partial FC2 into fc2_acc[C, L_tile, D]), so only
+    one [C, L_tile, H_tile] slice of the expansion is ever on-chip. Numerics
+    match mlp_dataflow, so each output frame equals a single-frame run.
+    """
+    for lt in allo.grid(L // L_tile, name="row_tile"):
+        x_tile: "T[C, L_tile, D]"
+        for c0, i0, d0 in allo.grid(C, L_tile, D, name="load_x"):
+            x_tile[c0, i0, d0] = X[c0, lt * L_tile + i0, d0]
+
+        fc2_acc: "int32[C, L_tile, D]" = 0
+        for ht in allo.grid(4 * D // H_tile, name="hidden_tile"):
+            w1_buf: "T[D, H_tile]"
+            for k0, j0 in allo.grid(D, H_tile, name="fc1_load_w"):
+                w1_buf[k0, j0] = W_1[k0, ht * H_tile + j0]
+            w2_buf: "T[H_tile, D]"
+            for k3, n3 in allo.grid(H_tile, D, name="fc2_load_w"):
+                w2_buf[k3, n3] = W_2[ht * H_tile + k3, n3]
+
+            # FC1 slice + bias + GELU for every frame
+            h_act: "int32[C, L_tile, H_tile]"
+            for c1, i1, j1 in allo.grid(C, L_tile, H_tile, name="fc1_slice"):
+                acc: int32 = B_1[ht * H_tile + j1]
+                for k1 in allo.reduction(D, name="fc1_reduce"):
+                    a_i: int32 = x_tile[c1, i1, k1]
+                    b_i: int32 = w1_buf[k1, j1]
+                    acc += a_i * b_i
+                x_float: float32 = acc
+                x3 = x_float * x_float * x_float
+                inner = 0.7978845608028654 * (x_float + 0.044715 * x3)
+                gelu_out = 0.5 * x_float * (1.0 + allo.tanh(inner))
+                h_act[c1, i1, j1] = gelu_out
+
+            # Partial FC2 over this slice of the hidden dimension
+            for c2, i2, n2 in allo.grid(C, L_tile, D, name="fc2_partial"):
+                part: int32 = 0
+                for k2 in allo.reduction(H_tile, name="fc2_reduce"):
+                    w_i: int32 = w2_buf[k2, n2]
+                    part += h_act[c2, i2, k2] * w_i
+                fc2_acc[c2, i2, n2] += part
+
+        # Bias B_2 + LayerNorm per token (same as mlp_dataflow)
+        for c3, i3 in allo.grid(C, L_tile, name="ln_normalize"):
+            total: float32 = 0.0
+            total_sq: float32 = 0.0
+            for j_s in allo.reduction(D, name="ln_stats_reduce"):
+                bias_s: int32 = B_2[j_s]
+                fc2_val: int32 = fc2_acc[c3, i3, j_s] + bias_s
+                val: float32 = fc2_val
+                total += val
+                total_sq += val * val
+            mean: float32 = total / D
+            mean_sq: float32 = total_sq / D
+            variance: float32 = mean_sq - (mean * mean)
+            inv_std: float32 = 1.0 / allo.sqrt(variance + 1e-8)
+            for j_n in allo.grid(D, name="ln_scale"):
+                bias_n: int32 = B_2[j_n]
+                fc2_n: int32 = fc2_acc[c3, i3, j_n] + bias_n
+                x_val: float32 = fc2_n
+                gamma_val: float32 = gamma[j_n]
+                beta_val: float32 = beta[j_n]
+                normalized: float32 = (x_val - mean) * inv_std
+                scaled: float32 = normalized * gamma_val + beta_val
+                out[c3, lt * L_tile + i3, j_n] = scaled
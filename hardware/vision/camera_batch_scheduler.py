@@ -0,0 +1,155 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vision.camera_batch import (
+    linear_camera_batched,
+    qkv_camera_batched,
+    sdpa_camera_batched,
+    mlp_camera_batched,
+)
+from attention.self_attention.sdpa import sdpa_streaming_8row
+from attention.config import CrossAttentionConfig as CAC
+from attention.config import VLMAttentionConfig as VAC
+
+# Vision encoder shapes
+C = CAC.NUM_CAMERAS
+V_L = VAC.NUM_TOKENS
+V_D = VAC.HIDDEN_DIM
+
+
+def _schedule_linear(A_T, K: int, N: int, L_tile: int, Tn: int, P: int):
+    """x_tile / weight tile in P cyclic banks along K, K reduction unrolled by P."""
+    s_lin = allo.customize(linear_camera_batched, instantiate=[A_T, C, V_L, K, N, L_tile, Tn])
+    loops = s_lin.get_loops()["row_tile"]
+    s_lin.partition(s_lin.x_tile, partition.Cyclic, dim=3, factor=P)
+    s_lin.partition(s_lin.w_buf, partition.Cyclic, dim=1, factor=P)
+    s_lin.pipeline(loops["k0"])
+    s_lin.pipeline(loops["j1"])
+    s_lin.unroll(loops["k"], factor=P)
+    s_lin.pipeline(loops["k"])
+    return s_lin
+
+
+def schedule_qkv_camera_batched(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    l_tile: int = 256,  # Tokens per row block (per frame)
+    Tn: int = 64,       # Output columns per weight tile
+    P: int = 8,         # Reduction unroll factor
+    mode: str = "csyn"
+):
+    """
+    Q/K/V projections for all C frames (camera_batch.qkv_camera_batched).
+    Each of the three linears reads X once and its weights once per
+    l_tile row block, for C * l_tile tokens at a time.
+    """
+    if V_L % l_tile != 0 or V_D % Tn != 0:
+        raise ValueError(f"l_tile={l_tile} must divide L={V_L} and Tn={Tn} must divide D={V_D}")
+
+    s = allo.customize(qkv_camera_batched, instantiate=[A_T, C, V_L, V_D, l_tile, Tn])
+    for proj in ["q_proj", "k_proj", "v_proj"]:
+        s.compose(_schedule_linear(A_T, V_D, V_D, l_tile, Tn, P), id=proj)
+
+    project_name = f"qkv_camera_batched_{C}cam_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+def customize_sdpa_engine(A_T, L: int, D_h: int, P: int):
+    """Pipelined sdpa_streaming_8row, composed as the per-head "engine" of the vision kernels."""
+    s_eng = allo.customize(sdpa_streaming_8row, instantiate=[A_T, L, D_h, P])
+    outer_loop = s_eng.get_loops()["row_outer"]
+    s_eng.pipeline(outer_loop["j1"])
+    s_eng.pipeline(outer_loop["p2"])
+    s_eng.pipeline(outer_loop["j3"])
+    s_eng.pipeline(outer_loop["j4"])
+    s_eng.pipeline(outer_loop["d2"])
+    s_eng.partition(s_eng.acc_out, partition.Complete, dim=1)
+    s_eng.partition(s_eng.max_vals, partition.Complete, dim=1)
+    return s_eng
+
+
+def schedule_sdpa_camera_batched(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    P: int = 8,
+    mode: str = "csyn"
+):
+    """Per-frame, per-head SDPA for all C frames (camera_batch.sdpa_camera_batched)."""
+    H = VAC.NUM_HEADS
+    D_h = VAC.SINGLE_HEAD_DIM
+    s = allo.customize(sdpa_camera_batched, instantiate=[A_T, C, H, V_L, V_D, D_h, P])
+    s.compose(customize_sdpa_engine(A_T, V_L, D_h, P), id="engine")
+    loops = s.get_loops("sdpa_camera_batched")["frame_head"]
+    s.pipeline(loops["d_in"])
+    s.pipeline(loops["d_out"])
+
+    project_name = f"sdpa_camera_batched_{C}cam_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+def schedule_mlp_camera_batched(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    l_tile: int = 256,
+    h_tile: int = 256,
+    P: int = 8,
+    mode: str = "csyn"
+):
+    """
+    Token-block streamed FC1 / FC2 + LayerNorm for all C frames
+    (camera_batch.mlp_camera_batched).
+
+    On-chip state is x_tile / fc2_acc [C, l_tile, D], h_act [C, l_tile, h_tile]
+    and one W_1 / W_2 slice, instead of int32 [C, L, 4D] and [C, L, D]
+    buffers. Both reductions are unrolled by P with matching cyclic
+    partitions, as in mlp_scheduler.customize_mlp_hidden_tiled.
+    """
+    if V_L % l_tile != 0 or (4 * V_D) % h_tile != 0:
+        raise ValueError(f"l_tile={l_tile} must divide L={V_L} and h_tile={h_tile} must divide 4D={4 * V_D}")
+
+    s = allo.customize(mlp_camera_batched, instantiate=[A_T, C, V_L, V_D, l_tile, h_tile])
+    loops = s.get_loops()["row_tile"]
+
+    s.pipeline(loops["d0"])
+    s.pipeline(loops["j0"])
+    s.pipeline(loops["n3"])
+
+    s.partition(s.x_tile, partition.Cyclic, dim=3, factor=P)
+    s.partition(s.w1_buf, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["k1"], factor=P)
+    s.pipeline(loops["k1"])
+
+    s.partition(s.h_act, partition.Cyclic, dim=3, factor=P)
+    s.partition(s.w2_buf, partition.Cyclic, dim=1, factor=P)
+    s.unroll(loops["k2"], factor=P)
+    s.pipeline(loops["k2"])
+
+    s.pipeline(loops["j_s"])
+    s.pipeline(loops["j_n"])
+
+    project_name = f"mlp_camera_batched_{C}cam_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    print(f"\n=== Camera-batched vision encoder ({C} cameras) ===")
+    schedule_qkv_camera_batched(np.int8, int8, mode="csyn")
+    # schedule_sdpa_camera_batched(np.int8, int8, mode="csyn")
+    # schedule_mlp_camera_batched(np.int8, int8, mode="csyn")
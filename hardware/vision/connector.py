@@ -0,0 +1,95 @@
+"""
+SmolVLM connector: pixel shuffle + modality projection (12288 -> 960).
+
+The encoder emits a G x G grid (32 x 32 = 1024) of E=768 tokens per frame.
+Pixel shuffle with factor S=4 folds every S x S block of neighbouring tokens
+into one token of E * S * S = 12288 features, giving (G / S)^2 = 64 tokens
+(CrossAttentionConfig.VIS_TOKENS_PER_FRAME), which a bias-free Linear maps
+to the backbone width 960.
+
+The shuffle is only a permutation, so it is folded into the A-tile load of
+the tiled GEMM (matrix_multiplies.mm_tiled structure): shuffled element
+(t, f) is read from
+
+    X[((t // (G/S)) * S + f // (E*S)) * G + (t % (G/S)) * S + (f // E) % S,  f % E]
+
+and the [64, 12288] shuffled tensor never exists. Output is requantized per
+channel (common_kernels.requant) into the T[64, 960] backbone input.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common_kernels.requant import requant_value, requant_np
+
+# SmolVLM connector geometry
+CONN_GRID = 32        # Encoder patch grid side
+CONN_SCALE = 4        # Pixel-shuffle factor
+CONN_OUT = 960        # Backbone hidden dim
+
+
+def connector_pixel_shuffle[
+    T: (int4, int8),
+    G: int16,    # Encoder patch grid side (32)
+    E: int16,    # Encoder width (768)
+    S: int16,    # Pixel-shuffle factor (4)
+    N: int16,    # Projection output width (960)
+    Tm: int16,   # Output tokens per tile
+    Tk: int16,   # Burst length of the strip loads
+    Tn: int16    # Output features per tile
+](
+    X: "T[G * G, E]",                   # Encoder output, row-major patch grid
+    W: "T[E * S * S, N]",               # modality_projection weight (transposed)
+    mult: "int32[N]",                   # Per-channel requant (make_requant_params)
+    shift: "int32[N]",
+    q_min: int32,
+    q_max: int32,
+    out: "T[(G // S) * (G // S), N]"
+):
+    for mi, ni in allo.grid((G // S) * (G // S) // Tm, N // Tn, name="tile_mn"):
+        a_tile: "T[Tm, E * S * S]"
+        b_tile: "T[E * S * S, Tn]"
+        c_tile: "int32[Tm, Tn]"
+        # Pixel shuffle as an index remap on the A load
+        for ki0, i0, k0 in allo.grid(E * S * S // Tk, Tm, Tk, name="load_a"):
+            t: int32 = mi * Tm + i0
+            f: int32 = ki0 * Tk + k0
+            src_r: int32 = (t // (G // S)) * S + f // (E * S)
+            src_c: int32 = (t % (G // S)) * S + (f // E) % S
+            a_tile[i0, f] = X[src_r * G + src_c, f % E]
+        for ki1, k1, j1 in allo.grid(E * S * S // Tk, Tk, Tn, name="load_b"):
+            b_tile[ki1 * Tk + k1, j1] = W[ki1 * Tk + k1, ni * Tn + j1]
+        for k2 in allo.grid(E * S * S, name="tile_mac"):
+            for i2, j2 in allo.grid(Tm, Tn, name="tile_pe"):
+                a: int32 = a_tile[i2, k2]
+                b: int32 = b_tile[k2, j2]
+                if k2 == 0:
+                    c_tile[i2, j2] = a * b
+                else:
+                    c_tile[i2, j2] += a * b
+        for i3, j3 in allo.grid(Tm, Tn, name="store_c"):
+            n: int32 = ni * Tn + j3
+            out[mi * Tm + i3, n] = requant_value(c_tile[i3, j3], mult[n], shift[n], 0, q_min, q_max)
+
+
+def pixel_shuffle_np(x, scale_factor: int = CONN_SCALE):
+    """Idefics3 / SmolVLM pixel_shuffle on one frame: [L, E] -> [L / s^2, E * s^2]."""
+    seq, embed_dim = x.shape
+    height = width = int(seq ** 0.5)
+    s = scale_factor
+    x = x.reshape(height, width, embed_dim)
+    x = x.reshape(height, width // s, embed_dim * s)
+    x = x.transpose(1, 0, 2)
+    x = x.reshape(width // s, height // s, embed_dim * s * s)
+    x = x.transpose(1, 0, 2)
+    return x.reshape(seq // (s * s), embed_dim * s * s)
+
+
+def connector_np(X, W, mult, shift, scale_factor: int = CONN_SCALE, q_min=-128, q_max=127):
+    """Numpy reference for connector_pixel_shuffle."""
+    acc = pixel_shuffle_np(X.astype(np.int64), scale_factor) @ W.astype(np.int64)
+    return requant_np(acc, mult, shift, 0, q_min, q_max)
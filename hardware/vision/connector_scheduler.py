@@ -0,0 +1,70 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vision.connector import connector_pixel_shuffle, connector_np, CONN_GRID, CONN_SCALE, CONN_OUT
+from common_kernels.requant import make_requant_params, quant_range
+from attention.config import VLMAttentionConfig as VAC
+
+
+def schedule_connector(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    G: int = CONN_GRID,
+    E: int = VAC.HIDDEN_DIM,
+    S: int = CONN_SCALE,
+    N: int = CONN_OUT,
+    Tm: int = 8,
+    Tk: int = 64,
+    Tn: int = 8,
+    mode: str = "csyn"
+):
+    """
+    Pixel shuffle + 12288 -> 960 projection (connector.connector_pixel_shuffle).
+
+    Same schedule as matrix_multiplies_scheduler.customize_mm_tiled: Tm x Tn
+    MACs per cycle, the tile_mn body as a dataflow region so the remapped A
+    strip, the W strip and c_tile ping-pong between output tiles. Tk should
+    divide E so each A burst reads one contiguous run of a source token.
+    """
+    s = allo.customize(connector_pixel_shuffle, instantiate=[A_T, G, E, S, N, Tm, Tk, Tn])
+    s.partition(s.a_tile, partition.Complete, dim=1)
+    s.partition(s.b_tile, partition.Complete, dim=2)
+    s.partition(s.c_tile, partition.Complete, dim=0)
+
+    loops = s.get_loops()["tile_mn"]
+    s.pipeline(loops["k0"])
+    s.pipeline(loops["j1"])
+    s.pipeline(loops["k2"])
+    s.pipeline(loops["j3"])
+    s.dataflow(loops["ni"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"connector_{E * S * S}x{N}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            X = np.random.randint(-8, 8, (G * G, E)).astype(N_T)
+            W = np.random.randint(-8, 8, (E * S * S, N)).astype(N_T)
+            mult, shift = make_requant_params(np.full(N, 1.0 / 256))
+            q_min, q_max = quant_range(4 if A_T == int4 else 8)
+            out = np.zeros(((G // S) ** 2, N), dtype=N_T)
+            s_llvm(X, W, mult, shift, q_min, q_max, out)
+            ref = connector_np(X, W, mult, shift, S, q_min, q_max)
+            print(f"match numpy: {np.array_equal(out, ref)}")
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    print("\n=== Connector [1024, 768] -> [64, 960] int8 ===")
+    schedule_connector(np.int8, int8, mode="csyn")
+
+    # schedule_connector(np.int8, int8, G=8, E=16, S=4, N=32, Tm=4, Tk=16, Tn=8, mode="llvm")
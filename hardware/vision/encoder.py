@@ -0,0 +1,261 @@
+"""
+Weight-streamed SigLIP vision encoder: all NL layers in one kernel.
+
+sdpa.self_attention_and_mlp, self_attention.self_attention and
+mlp.mlp_dataflow each run one layer, so the host relaunches the kernel and
+moves the [1024, 768] activation through HBM twelve times. vision_encoder
+loops over layers itself:
+
+- The residual stream lives in an on-chip ping-pong buffer act[2, L, D].
+  Layer ly reads act[ly % 2] and writes act[1 - ly % 2], so X is loaded
+  once and out is written once per inference.
+- Weights are stacked per layer (W_qkv[NL, ...], W_o[NL, ...], ...) and
+  indexed by ly. Every projection is weight-stationary: a [K, Tn] tile is
+  fetched from HBM once and applied to all L tokens, so each layer's
+  weights are streamed exactly once
+  (analysis/memory_model.py calc_vision_mem).
+
+Per layer (pre-norm, as in SigLIP):
+
+    h   = x + requant(attn(LN1(x)) @ W_o + b_o)
+    x'  = h + requant(GELU(requant(LN2(h) @ W_1 + b_1)) @ W_2 + b_2)
+
+Q/K/V, the attention output and the MLP hidden layer are T. Each
+projection is requantized (common_kernels.requant.requant_value) with a
+per-layer, per-tensor (mult, shift) in rq_mult / rq_shift (slots RQ_QKV,
+RQ_O, RQ_FC1, RQ_FC2). Attention runs the sdpa_streaming_8row engine once
+per head. GELU runs in float on y * act_scale and maps back to the same
+scale. The residual stream stays int32.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from attention.self_attention.sdpa import sdpa_streaming_8row
+from common_kernels.requant import requant_value, requant_np
+
+# rq_mult / rq_shift slots
+RQ_QKV = 0
+RQ_O = 1
+RQ_FC1 = 2
+RQ_FC2 = 3
+RQ_SLOTS = 4
+
+
+def vision_encoder[
+    T: (int4, int8),
+    NL: int16,    # Encoder layers (12)
+    L: int16,     # Tokens (1024)
+    D: int16,     # Hidden size (768)
+    H: int16,     # Heads (12)
+    D_h: int16,   # D // H
+    F: int16,     # MLP intermediate size (3072)
+    Tn: int16,    # Output features per weight tile
+    P: int16      # SDPA row parallelism
+](
+    X: "T[L, D]",
+    W_qkv: "T[NL, D, 3 * D]",   # [in, out], columns Q | K | V
+    b_qkv: "int32[NL, 3 * D]",
+    W_o: "T[NL, D, D]",
+    b_o: "int32[NL, D]",
+    W_1: "T[NL, D, F]",
+    b_1: "int32[NL, F]",
+    W_2: "T[NL, F, D]",
+    b_2: "int32[NL, D]",
+    ln1_g: "float32[NL, D]",
+    ln1_b: "float32[NL, D]",
+    ln2_g: "float32[NL, D]",
+    ln2_b: "float32[NL, D]",
+    rq_mult: "int32[NL, 4]",    # per-layer requant, RQ_* slots
+    rq_shift: "int32[NL, 4]",
+    scale: float32,             # sqrt(D_h)
+    act_scale: float32,         # real value of one FC1 output LSB
+    q_min: int32,
+    q_max: int32,
+    out: "int32[L, D]"
+):
+    # Resident activations
+    act: "int32[2, L, D]"
+    x_ln: "T[L, D]"
+    qkv: "T[L, 3 * D]"
+    attn: "T[L, D]"
+    hid: "T[L, F]"
+
+    for i0, d0 in allo.grid(L, D, name="load_x"):
+        act[0, i0, d0] = X[i0, d0]
+
+    for ly in allo.grid(NL, name="layer"):
+        src: int32 = ly % 2
+        dst: int32 = 1 - src
+
+        # ===== LN1: act[src] -> x_ln =====
+        for i1 in allo.grid(L, name="ln1_row"):
+            sum1: float32 = 0.0
+            sq1: float32 = 0.0
+            for j1 in allo.reduction(D, name="ln1_stats"):
+                v1: float32 = act[src, i1, j1]
+                sum1 += v1
+                sq1 += v1 * v1
+            mean1: float32 = sum1 / D
+            inv1: float32 = 1.0 / allo.sqrt(sq1 / D - mean1 * mean1 + 1e-8)
+            for j2 in allo.grid(D, name="ln1_out"):
+                a1: float32 = act[src, i1, j2]
+                y1: float32 = (a1 - mean1) * inv1 * ln1_g[ly, j2] + ln1_b[ly, j2]
+                if y1 > q_max:
+                    y1 = q_max
+                if y1 < q_min:
+                    y1 = q_min
+                x_ln[i1, j2] = y1
+
+        # ===== QKV projection, one W_qkv[ly] tile at a time =====
+        for nt0 in allo.grid(3 * D // Tn, name="qkv_tile"):
+            w0_buf: "T[D, Tn]"
+            for k0, j0 in allo.grid(D, Tn, name="qkv_load_w"):
+                w0_buf[k0, j0] = W_qkv[ly, k0, nt0 * Tn + j0]
+            for i2, j3 in allo.grid(L, Tn, name="qkv_row"):
+                n0: int32 = nt0 * Tn + j3
+                acc0: int32 = b_qkv[ly, n0]
+                for k1 in allo.reduction(D, name="qkv_k"):
+                    xa0: int32 = x_ln[i2, k1]
+                    wa0: int32 = w0_buf[k1, j3]
+                    acc0 += xa0 * wa0
+                yq0: int32 = requant_value(acc0, rq_mult[ly, 0], rq_shift[ly, 0], 0, q_min, q_max)
+                qkv[i2, n0] = yq0
+
+        # ===== Attention: one sdpa_streaming_8row pass per head =====
+        for h in allo.grid(H, name="head"):
+            Q_head: "T[L, D_h]"
+            K_head: "T[L, D_h]"
+            V_head: "T[L, D_h]"
+            out_head: "T[L, D_h]"
+            for ih0, dh0 in allo.grid(L, D_h, name="load_head"):
+                Q_head[ih0, dh0] = qkv[ih0, h * D_h + dh0]
+                K_head[ih0, dh0] = qkv[ih0, D + h * D_h + dh0]
+                V_head[ih0, dh0] = qkv[ih0, 2 * D + h * D_h + dh0]
+
+            sdpa_streaming_8row[T, L, D_h, P, "engine"](Q_head, K_head, V_head, scale, out_head)
+
+            for ih1, dh1 in allo.grid(L, D_h, name="store_head"):
+                attn[ih1, h * D_h + dh1] = out_head[ih1, dh1]
+
+        # ===== Output projection + residual: act[dst] = act[src] + o =====
+        for nt1 in allo.grid(D // Tn, name="o_tile"):
+            w1_buf: "T[D, Tn]"
+            for k3, j8 in allo.grid(D, Tn, name="o_load_w"):
+                w1_buf[k3, j8] = W_o[ly, k3, nt1 * Tn + j8]
+            for i3, j9 in allo.grid(L, Tn, name="o_row"):
+                n1: int32 = nt1 * Tn + j9
+                acc1: int32 = b_o[ly, n1]
+                for k4 in allo.reduction(D, name="o_k"):
+                    xa1: int32 = attn[i3, k4]
+                    wa1: int32 = w1_buf[k4, j9]
+                    acc1 += xa1 * wa1
+                yq1: int32 = requant_value(acc1, rq_mult[ly, 1], rq_shift[ly, 1], 0, q_min, q_max)
+                act[dst, i3, n1] = act[src, i3, n1] + yq1
+
+        # ===== LN2: act[dst] -> x_ln =====
+        for i4 in allo.grid(L, name="ln2_row"):
+            sum2: float32 = 0.0
+            sq2: float32 = 0.0
+            for j10 in allo.reduction(D, name="ln2_stats"):
+                v2: float32 = act[dst, i4, j10]
+                sum2 += v2
+                sq2 += v2 * v2
+            mean2: float32 = sum2 / D
+            inv2: float32 = 1.0 / allo.sqrt(sq2 / D - mean2 * mean2 + 1e-8)
+            for j11 in allo.grid(D, name="ln2_out"):
+                a2: float32 = act[dst, i4, j11]
+                y2: float32 = (a2 - mean2) * inv2 * ln2_g[ly, j11] + ln2_b[ly, j11]
+                if y2 > q_max:
+                    y2 = q_max
+                if y2 < q_min:
+                    y2 = q_min
+                x_ln[i4, j11] = y2
+
+        # ===== FC1 + GELU, one W_1[ly] tile at a time =====
+        for nt2 in allo.grid(F // Tn, name="fc1_tile"):
+            w2_buf: "T[D, Tn]"
+            for k5, j12 in allo.grid(D, Tn, name="fc1_load_w"):
+                w2_buf[k5, j12] = W_1[ly, k5, nt2 * Tn + j12]
+            for i5, j13 in allo.grid(L, Tn, name="fc1_row"):
+                n2: int32 = nt2 * Tn + j13
+                acc2: int32 = b_1[ly, n2]
+                for k6 in allo.reduction(D, name="fc1_k"):
+                    xa2: int32 = x_ln[i5, k6]
+                    wa2: int32 = w2_buf[k6, j13]
+                    acc2 += xa2 * wa2
+                yq2: int32 = requant_value(acc2, rq_mult[ly, 2], rq_shift[ly, 2], 0, q_min, q_max)
+                xg: float32 = yq2
+                xg = xg * act_scale
+                x3: float32 = xg * xg * xg
+                inner: float32 = 0.7978845608028654 * (xg + 0.044715 * x3)
+                gelu: float32 = 0.5 * xg * (1.0 + allo.tanh(inner))
+                gq: float32 = gelu / act_scale
+                if gq > q_max:
+                    gq = q_max
+                if gq < q_min:
+                    gq = q_min
+                hid[i5, n2] = gq
+
+        # ===== FC2 + residual: act[dst] += fc2 =====
+        for nt3 in allo.grid(D // Tn, name="fc2_tile"):
+            w3_buf: "T[F, Tn]"
+            for k7, j14 in allo.grid(F, Tn, name="fc2_load_w"):
+                w3_buf[k7, j14] = W_2[ly, k7, nt3 * Tn + j14]
+            for i6, j15 in allo.grid(L, Tn, name="fc2_row"):
+                n3: int32 = nt3 * Tn + j15
+                acc3: int32 = b_2[ly, n3]
+                for k8 in allo.reduction(F, name="fc2_k"):
+                    xa3: int32 = hid[i6, k8]
+                    wa3: int32 = w3_buf[k8, j15]
+                    acc3 += xa3 * wa3
+                yq3: int32 = requant_value(acc3, rq_mult[ly, 3], rq_shift[ly, 3], 0, q_min, q_max)
+                act[dst, i6, n3] = act[dst, i6, n3] + yq3
+
+    fin: int32 = NL % 2
+    for i7, d2 in allo.grid(L, D, name="store_out"):
+        out[i7, d2] = act[fin, i7, d2]
+
+
+def _layer_norm_np(x, gamma, beta, q_min, q_max):
+    x = x.astype(np.float32)
+    mean = x.mean(axis=-1, keepdims=True)
+    var = (x * x).mean(axis=-1, keepdims=True) - mean * mean
+    y = (x - mean) / np.sqrt(var + np.float32(1e-8)) * gamma + beta
+    return np.trunc(np.clip(y, q_min, q_max)).astype(np.int64)
+
+
+def vision_encoder_np(X, W_qkv, b_qkv, W_o, b_o, W_1, b_1, W_2, b_2,
+                      ln1_g, ln1_b, ln2_g, ln2_b, rq_mult, rq_shift,
+                      H, scale, act_scale, q_min=-128, q_max=127):
+    """Numpy reference for vision_encoder (float32 LayerNorm / softmax / GELU)."""
+    NL = W_qkv.shape[0]
+    L, D = X.shape
+    D_h = D // H
+    x = X.astype(np.int64)
+    for ly in range(NL):
+        def rq(acc, slot):
+            return requant_np(acc, rq_mult[ly, slot], rq_shift[ly, slot], 0, q_min, q_max)
+
+        x_ln = _layer_norm_np(x, ln1_g[ly], ln1_b[ly], q_min, q_max)
+        qkv = rq(x_ln @ W_qkv[ly].astype(np.int64) + b_qkv[ly], RQ_QKV)
+        Q, K, V = qkv[:, :D], qkv[:, D:2 * D], qkv[:, 2 * D:]
+        attn = np.zeros((L, D), dtype=np.int64)
+        for h in range(H):
+            cols = slice(h * D_h, (h + 1) * D_h)
+            s = (Q[:, cols] @ K[:, cols].T).astype(np.float32) / np.float32(scale)
+            e = np.exp(s - s.max(axis=-1, keepdims=True))
+            p = np.minimum(e / e.sum(axis=-1, keepdims=True) * np.float32(32768.0), 32767.0)
+            attn[:, cols] = (np.trunc(p).astype(np.int64) @ V[:, cols]) >> 15
+        x = x + rq(attn @ W_o[ly].astype(np.int64) + b_o[ly], RQ_O)
+
+        x_ln = _layer_norm_np(x, ln2_g[ly], ln2_b[ly], q_min, q_max)
+        f = rq(x_ln @ W_1[ly].astype(np.int64) + b_1[ly], RQ_FC1).astype(np.float32) * np.float32(act_scale)
+        gelu = np.float32(0.5) * f * (np.float32(1.0) + np.tanh(np.float32(0.7978845608028654) * (f + np.float32(0.044715) * f ** 3)))
+        hid = np.trunc(np.clip(gelu / np.float32(act_scale), q_min, q_max)).astype(np.int64)
+        x = x + rq(hid @ W_2[ly].astype(np.int64) + b_2[ly], RQ_FC2)
+    return x
@@ -0,0 +1,89 @@
+"""
+SigLIP patch embedding: Conv2d(3, 768, kernel=16, stride=16) + position
+embedding, as a streaming im2col GEMM.
+
+A 512x512x3 frame is 32x32 patches of 16x16x3 = 768 pixels. The image is
+streamed one strip of PS rows at a time into a [C_in, PS, W] line buffer;
+each patch's im2col row is read straight out of that strip by index
+(c, ky, pc * PS + kx), so no [L, C_in * PS * PS] copy is ever formed. The
+conv weight is used in its PyTorch layout, W.reshape(D, C_in * PS * PS),
+and held on chip Td output channels at a time: each w_buf tile is read from
+HBM once and reused by all NP * NP patches, and the image is streamed once
+per tile (D / Td times).
+
+Bias and position embedding are host-folded into the int32 accumulator
+scale and added before the per-channel requant (common_kernels.requant), so
+the output is the T[L, D] token tensor the encoder attention takes as X.
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int64, int32, int16, int8, int4
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from common_kernels.requant import requant_value, requant_np
+
+# SigLIP vision tower geometry
+V_IMG = 512
+V_PATCH = 16
+V_CH = 3
+
+
+def patch_embed[
+    T: (int4, int8),
+    C_in: int16,   # Image channels (3)
+    NP: int16,     # Patches per side (32)
+    PS: int16,     # Patch size (16)
+    D: int16,      # Embedding dim (768)
+    Td: int16      # Output channels per weight tile
+](
+    img: "T[C_in, NP * PS, NP * PS]",
+    W: "T[D, C_in * PS * PS]",          # Conv weight, [D, C, ky, kx] flattened
+    bias: "int32[D]",                   # Conv bias in accumulator scale
+    pos: "int32[NP * NP, D]",           # Position embedding in accumulator scale
+    mult: "int32[D]",                   # Per-channel requant (make_requant_params)
+    shift: "int32[D]",
+    q_min: int32,
+    q_max: int32,
+    out: "T[NP * NP, D]"                # Token tensor, row-major patch order
+):
+    for dt in allo.grid(D // Td, name="d_tile"):
+        w_buf: "T[Td, C_in * PS * PS]"
+        for d0, k0 in allo.grid(Td, C_in * PS * PS, name="load_w"):
+            w_buf[d0, k0] = W[dt * Td + d0, k0]
+
+        for pr in allo.grid(NP, name="patch_row"):
+            # Line buffer: the PS image rows covering patch row pr
+            strip: "T[C_in, PS, NP * PS]"
+            for c0, y0, x0 in allo.grid(C_in, PS, NP * PS, name="load_strip"):
+                strip[c0, y0, x0] = img[c0, pr * PS + y0, x0]
+
+            for pc, d in allo.grid(NP, Td, name="patch_col"):
+                tok: int32 = pr * NP + pc
+                n: int32 = dt * Td + d
+                acc: int32 = bias[n] + pos[tok, n]
+                for c in allo.reduction(C_in, name="emb_c"):
+                    for ky in allo.reduction(PS, name="emb_ky"):
+                        for kx in allo.reduction(PS, name="emb_kx"):
+                            px: int32 = strip[c, ky, pc * PS + kx]
+                            w: int32 = w_buf[d, c * PS * PS + ky * PS + kx]
+                            acc += px * w
+
+                out[tok, n] = requant_value(acc, mult[n], shift[n], 0, q_min, q_max)
+
+
+def im2col_np(img, PS: int):
+    """[C, H, W] image -> [L, C * PS * PS] patch rows (row-major patch order)."""
+    C, H, W = img.shape
+    NP_h, NP_w = H // PS, W // PS
+    p = img.reshape(C, NP_h, PS, NP_w, PS).transpose(1, 3, 0, 2, 4)
+    return p.reshape(NP_h * NP_w, C * PS * PS)
+
+
+def patch_embed_np(img, W, bias, pos, mult, shift, q_min=-128, q_max=127):
+    """Numpy reference for patch_embed (W already [D, C * PS * PS])."""
+    PS = int(round(np.sqrt(W.shape[1] // img.shape[0])))
+    acc = im2col_np(img.astype(np.int64), PS) @ W.astype(np.int64).T + bias + pos
+    return requant_np(acc, mult, shift, 0, q_min, q_max)
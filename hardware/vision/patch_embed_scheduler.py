@@ -0,0 +1,74 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vision.patch_embed import patch_embed, patch_embed_np, V_IMG, V_PATCH, V_CH
+from common_kernels.requant import make_requant_params, quant_range
+from attention.config import VLMAttentionConfig as VAC
+
+
+def schedule_patch_embed(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    C_in: int = V_CH,
+    NP: int = V_IMG // V_PATCH,
+    PS: int = V_PATCH,
+    D: int = VAC.HIDDEN_DIM,
+    Td: int = 128,    # Output channels per on-chip weight tile
+    mode: str = "csyn"
+):
+    """
+    Streaming im2col patch embedding (patch_embed.patch_embed).
+
+    The kx loop is unrolled by PS with strip / w_buf cyclically partitioned
+    to match, so one 16-pixel patch row is consumed per cycle: C_in * PS
+    cycles per output, NP * NP * D * C_in * PS in total. The strip load
+    overlaps the previous strip's GEMM under dataflow. w_buf holds
+    Td * C_in * PS * PS weights (96 KB for Td = 128) and the image is
+    streamed D / Td times.
+    """
+    if D % Td != 0:
+        raise ValueError(f"Td={Td} must divide D={D}")
+
+    s = allo.customize(patch_embed, instantiate=[A_T, C_in, NP, PS, D, Td])
+    loops = s.get_loops()["d_tile"]
+    s.partition(s.strip, partition.Cyclic, dim=3, factor=PS)
+    s.partition(s.w_buf, partition.Cyclic, dim=2, factor=PS)
+    s.pipeline(loops["k0"])
+    s.pipeline(loops["x0"])
+    s.unroll(loops["kx"])
+    s.pipeline(loops["ky"])
+    s.dataflow(loops["pr"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"patch_embed_{NP * PS}px_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            L = NP * NP
+            img = np.random.randint(-8, 8, (C_in, NP * PS, NP * PS)).astype(N_T)
+            W = np.random.randint(-8, 8, (D, C_in * PS * PS)).astype(N_T)
+            bias = np.random.randint(-64, 64, (D,)).astype(np.int32)
+            pos = np.random.randint(-64, 64, (L, D)).astype(np.int32)
+            mult, shift = make_requant_params(np.full(D, 1.0 / 64))
+            q_min, q_max = quant_range(4 if A_T == int4 else 8)
+            out = np.zeros((L, D), dtype=N_T)
+            s_llvm(img, W, bias, pos, mult, shift, q_min, q_max, out)
+            ref = patch_embed_np(img, W, bias, pos, mult, shift, q_min, q_max)
+            print(f"match numpy: {np.array_equal(out, ref)}")
+            return out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    print("\n=== Patch embedding 512x512x3 -> [1024, 768] int8 ===")
+    schedule_patch_embed(np.int8, int8, mode="csyn")
+
+    # schedule_patch_embed(np.int8, int8, NP=4, PS=4, D=32, Td=16, mode="llvm")
@@ -0,0 +1,122 @@
+"""
+Test for the camera-batched vision kernels (llvm mode)
+
+Batching frames must not change any frame's result: the linear layer is
+checked bit-exactly against numpy + requant_np, SDPA per frame against
+sdpa_np (1 LSB plus Q15 weight truncation, see test_sdpa_gqa.py), and the
+MLP per frame against a single-frame mlp_dataflow run.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from vision.camera_batch import (
+    linear_camera_batched,
+    qkv_camera_batched,
+    sdpa_camera_batched,
+    mlp_camera_batched,
+)
+from attention.self_attention.sdpa import sdpa_np
+from common_kernels.requant import make_requant_params, requant_np, quant_range
+from mlp.mlp import mlp_dataflow
+
+
+@pytest.mark.parametrize("C, L, K, N, L_tile, Tn", [
+    (3, 16, 32, 64, 4, 16),
+    (2, 8, 64, 32, 8, 32),
+    (2, 8, 32, 32, 2, 8),
+])
+def test_linear_camera_batched(C, L, K, N, L_tile, Tn):
+    np.random.seed(0)
+    X = np.random.randint(-8, 8, (C, L, K)).astype(np.int8)
+    W = np.random.randint(-8, 8, (K, N)).astype(np.int8)
+    B = np.random.randint(-8, 8, (N,)).astype(np.int8)
+    mult, shift = make_requant_params(np.full(N, 1.0 / 64))
+    q_min, q_max = quant_range(8)
+
+    s = allo.customize(linear_camera_batched, instantiate=[int8, C, L, K, N, L_tile, Tn])
+    out = np.zeros((C, L, N), dtype=np.int8)
+    s.build()(X, W, B, mult, shift, q_min, q_max, out)
+
+    acc = X.astype(np.int32) @ W.astype(np.int32) + B.astype(np.int32)
+    np.testing.assert_array_equal(out, requant_np(acc, mult, shift, 0, q_min, q_max))
+
+
+def test_qkv_camera_batched_per_projection_scales():
+    """Q, K and V are each requantized with their own (mult, shift)."""
+    C, L, D, L_tile, Tn = 2, 8, 32, 4, 16
+    np.random.seed(4)
+    X = np.random.randint(-8, 8, (C, L, D)).astype(np.int8)
+    Ws = [np.random.randint(-8, 8, (D, D)).astype(np.int8) for _ in range(3)]
+    Bs = [np.random.randint(-8, 8, (D,)).astype(np.int8) for _ in range(3)]
+    mult_q, shift_q = make_requant_params(np.full(D, 1.0 / 16))
+    mult_k, shift_k = make_requant_params(np.full(D, 1.0 / 64))
+    mult_v, shift_v = make_requant_params(np.full(D, 1.0 / 256))
+    q_min, q_max = quant_range(8)
+
+    s = allo.customize(qkv_camera_batched, instantiate=[int8, C, L, D, L_tile, Tn])
+    Q, K, V = [np.zeros((C, L, D), dtype=np.int8) for _ in range(3)]
+    s.build()(X, *Ws, *Bs, mult_q, shift_q, mult_k, shift_k, mult_v, shift_v, q_min, q_max, Q, K, V)
+
+    for name, W, B, mult, shift, out in [
+        ("Q", Ws[0], Bs[0], mult_q, shift_q, Q),
+        ("K", Ws[1], Bs[1], mult_k, shift_k, K),
+        ("V", Ws[2], Bs[2], mult_v, shift_v, V),
+    ]:
+        acc = X.astype(np.int32) @ W.astype(np.int32) + B.astype(np.int32)
+        np.testing.assert_array_equal(out, requant_np(acc, mult, shift, 0, q_min, q_max), err_msg=name)
+
+
+def test_sdpa_camera_batched():
+    C, H, L, D_h, P = 3, 2, 32, 16, 8
+    D = H * D_h
+    scale = float(np.sqrt(D_h))
+    np.random.seed(1)
+    Q, K, V = [np.random.randint(-8, 8, (C, L, D)).astype(np.int8) for _ in range(3)]
+
+    s = allo.customize(sdpa_camera_batched, instantiate=[int8, C, H, L, D, D_h, P])
+    out = np.zeros((C, L, D), dtype=np.int8)
+    s.build()(Q, K, V, scale, out)
+
+    tol = 1.0 + L * 8 / 32768
+    for c in range(C):
+        for h in range(H):
+            cols = slice(h * D_h, (h + 1) * D_h)
+            expected = sdpa_np(Q[c][:, cols].astype(np.float64), K[c][:, cols].astype(np.float64),
+                               V[c][:, cols].astype(np.float64), d_h=scale * scale)
+            diff = np.abs(out[c][:, cols].astype(np.float64) - expected)
+            assert diff.max() <= tol, f"camera {c}, head {h} mismatch (max diff {diff.max():.3f})"
+
+
+@pytest.mark.parametrize("L_tile, H_tile", [(4, 32), (8, 128), (2, 64)])
+def test_mlp_camera_batched_matches_single_frame(L_tile, H_tile):
+    C, L, D = 3, 8, 32
+    np.random.seed(2)
+    X = np.random.randint(-8, 8, (C, L, D)).astype(np.int8)
+    W_1 = np.random.randint(-4, 4, (D, 4 * D)).astype(np.int8)
+    B_1 = np.random.randint(-2, 2, (4 * D,)).astype(np.int8)
+    W_2 = np.random.randint(-4, 4, (4 * D, D)).astype(np.int8)
+    B_2 = np.random.randint(-2, 2, (D,)).astype(np.int8)
+    gamma = np.random.randint(10, 31, (D,)).astype(np.int8)
+    beta = np.random.randint(-5, 6, (D,)).astype(np.int8)
+
+    s = allo.customize(mlp_camera_batched, instantiate=[int8, C, L, D, L_tile, H_tile])
+    out = np.zeros((C, L, D), dtype=np.int8)
+    s.build()(X, W_1, B_1, W_2, B_2, gamma, beta, out)
+
+    single = allo.customize(mlp_dataflow, instantiate=[int8, D, L]).build()
+    for c in range(C):
+        expected = np.zeros((L, D), dtype=np.int8)
+        single(np.ascontiguousarray(X[c]), W_1, B_1, W_2, B_2, gamma, beta, expected)
+        diff = np.abs(out[c].astype(np.int32) - expected.astype(np.int32))
+        assert diff.max() <= 1, f"camera {c} mismatch (max diff {diff.max()})"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,50 @@
+"""
+Test for connector_pixel_shuffle - pixel shuffle + projection (llvm mode)
+
+The shuffle is a pure index remap and the GEMM/requant are integer, so the
+output must equal connector_np exactly.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from vision.connector import connector_pixel_shuffle, connector_np, pixel_shuffle_np
+from common_kernels.requant import make_requant_params, quant_range
+
+
+@pytest.mark.parametrize("G, E, S, N, Tm, Tk, Tn", [
+    (8, 16, 4, 32, 4, 16, 8),
+    (8, 12, 2, 24, 8, 12, 12),
+])
+def test_connector_vs_numpy(G, E, S, N, Tm, Tk, Tn):
+    np.random.seed(6)
+    X = np.random.randint(-8, 8, (G * G, E)).astype(np.int8)
+    W = np.random.randint(-8, 8, (E * S * S, N)).astype(np.int8)
+    mult, shift = make_requant_params(np.full(N, 1.0 / 128))
+    q_min, q_max = quant_range(8)
+
+    s = allo.customize(connector_pixel_shuffle, instantiate=[int8, G, E, S, N, Tm, Tk, Tn])
+    out = np.zeros(((G // S) ** 2, N), dtype=np.int8)
+    s.build()(X, W, mult, shift, q_min, q_max, out)
+
+    np.testing.assert_array_equal(out, connector_np(X, W, mult, shift, S, q_min, q_max))
+
+
+def test_pixel_shuffle_groups_neighbours():
+    """Output token 0 holds the top-left S x S block, row by row."""
+    G, E, S = 8, 3, 2
+    X = np.arange(G * G * E).reshape(G * G, E)
+    Y = pixel_shuffle_np(X, S)
+    assert Y.shape == ((G // S) ** 2, E * S * S)
+    expected = np.concatenate([X[0], X[1], X[G], X[G + 1]])
+    np.testing.assert_array_equal(Y[0], expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
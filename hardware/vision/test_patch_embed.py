@@ -0,0 +1,58 @@
+"""
+Test for patch_embed - streaming im2col patch embedding (llvm mode)
+
+Integer GEMM + integer requant, so the output must match patch_embed_np
+exactly. im2col_np is checked against a direct strided-conv loop.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from vision.patch_embed import patch_embed, patch_embed_np, im2col_np
+from common_kernels.requant import make_requant_params, quant_range
+
+
+@pytest.mark.parametrize("C_in, NP, PS, D, Td", [
+    (3, 4, 4, 16, 16),
+    (3, 2, 8, 32, 8),
+])
+def test_patch_embed_vs_numpy(C_in, NP, PS, D, Td):
+    L = NP * NP
+    np.random.seed(4)
+    img = np.random.randint(-8, 8, (C_in, NP * PS, NP * PS)).astype(np.int8)
+    W = np.random.randint(-8, 8, (D, C_in * PS * PS)).astype(np.int8)
+    bias = np.random.randint(-64, 64, (D,)).astype(np.int32)
+    pos = np.random.randint(-64, 64, (L, D)).astype(np.int32)
+    mult, shift = make_requant_params(np.full(D, 1.0 / 32))
+    q_min, q_max = quant_range(8)
+
+    s = allo.customize(patch_embed, instantiate=[int8, C_in, NP, PS, D, Td])
+    out = np.zeros((L, D), dtype=np.int8)
+    s.build()(img, W, bias, pos, mult, shift, q_min, q_max, out)
+
+    np.testing.assert_array_equal(out, patch_embed_np(img, W, bias, pos, mult, shift, q_min, q_max))
+
+
+def test_im2col_matches_strided_conv():
+    C, NP, PS, D = 3, 3, 4, 5
+    np.random.seed(5)
+    img = np.random.randint(-8, 8, (C, NP * PS, NP * PS)).astype(np.int64)
+    W = np.random.randint(-8, 8, (D, C, PS, PS)).astype(np.int64)
+
+    conv = np.zeros((NP * NP, D), dtype=np.int64)
+    for pr in range(NP):
+        for pc in range(NP):
+            patch = img[:, pr * PS:(pr + 1) * PS, pc * PS:(pc + 1) * PS]
+            conv[pr * NP + pc] = np.tensordot(W, patch, axes=([1, 2, 3], [0, 1, 2]))
+
+    np.testing.assert_array_equal(im2col_np(img, PS) @ W.reshape(D, -1).T, conv)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,46 @@
+"""
+Test for token_prune_topk - norm-scored top-K vision token pruning (llvm mode)
+
+Kept indices and the compacted sequence must match token_prune_np exactly,
+including ties (higher score first, then lower index).
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from vision.token_pruning import token_prune_topk, token_prune_np, pruned_lengths
+
+
+@pytest.mark.parametrize("L, D, K", [
+    (64, 16, 16),
+    (128, 32, 64),
+    (128, 32, 128),
+])
+def test_token_prune_vs_numpy(L, D, K):
+    np.random.seed(5)
+    # Small value range so many scores tie
+    X = np.random.randint(-2, 2, (L, D)).astype(np.int8)
+
+    s = allo.customize(token_prune_topk, instantiate=[int8, L, D, K])
+    mod = s.build()
+    X_out = np.zeros((K, D), dtype=np.int8)
+    keep_idx = np.zeros((K,), dtype=np.int16)
+    mod(X, X_out, keep_idx)
+
+    X_ref, idx_ref = token_prune_np(X, K)
+    np.testing.assert_array_equal(keep_idx, idx_ref)
+    np.testing.assert_array_equal(X_out, X_ref)
+
+
+def test_pruned_lengths():
+    assert pruned_lengths(1024, [1.0, 0.5, 0.5, 300]) == [1024, 512, 256, 256]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,51 @@
+"""
+Test for vision_encoder - NL encoder layers with resident activations (llvm mode)
+
+LayerNorm, softmax and GELU run in float32 in both the kernel and the
+reference, but with different summation order, so a truncation can land one
+LSB apart. Errors are bounded per layer so they cannot compound: the kernel
+is run with the first n layers for n = 1..NL, and layer n's output is
+checked against vision_encoder_np applied to the kernel's own output of
+layer n - 1. Consecutive n cover both ping-pong parities.
+"""
+
+import allo
+import numpy as np
+import pytest
+from allo.ir.types import int8
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "submodules" / "allo"))
+from vision.encoder import vision_encoder, vision_encoder_np
+from vision.vision_encoder_scheduler import make_encoder_inputs
+from common_kernels.requant import quant_range
+
+
+@pytest.mark.parametrize("NL, L, D, H, F, Tn, P", [
+    (3, 16, 32, 2, 64, 8, 4),
+    (2, 32, 64, 4, 128, 16, 8),
+])
+def test_vision_encoder_per_layer_vs_numpy(NL, L, D, H, F, Tn, P):
+    D_h = D // H
+    X, *weights = make_encoder_inputs(np.int8, NL, L, D, F, seed=3)
+    q_min, q_max = quant_range(8)
+    scale, act_scale = float(np.sqrt(D_h)), 1.0 / 16
+
+    x_in = X
+    for n in range(1, NL + 1):
+        s = allo.customize(vision_encoder, instantiate=[int8, n, L, D, H, D_h, F, Tn, P])
+        out = np.zeros((L, D), dtype=np.int32)
+        s.build()(X, *[np.ascontiguousarray(w[:n]) for w in weights], scale, act_scale, q_min, q_max, out)
+
+        ref = vision_encoder_np(x_in, *[w[n - 1:n] for w in weights], H, scale, act_scale, q_min, q_max)
+        diff = np.abs(out.astype(np.int64) - ref)
+        print(f"layer {n - 1}, L={L}, D={D}: mean diff {diff.mean():.4f}, max diff {diff.max()}")
+        assert diff.max() <= 2, f"layer {n - 1}: max diff {diff.max()}"
+        assert diff.mean() <= 0.05, f"layer {n - 1}: mean diff {diff.mean():.4f}"
+        x_in = out
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
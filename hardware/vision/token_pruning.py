@@ -0,0 +1,118 @@
+"""
+Vision token pruning before encoder attention.
+
+Each encoder layer attends over all V_PATCHES=1024 tokens. Pruning keeps the
+K highest-scoring tokens and gathers them into a compacted [K, D] sequence
+(original token order preserved) for the following layers, so attention
+cost drops by (K / L)^2 and the linear layers by K / L.
+
+Scores are int32 per token. token_norm_scores gives the activation L1 norm;
+any other score (e.g. the mean attention a token receives, or the CLS row of
+the softmax) can be passed straight to token_topk_gather.
+
+K is a template parameter, so a per-layer keep schedule instantiates one
+gather kernel per distinct K (see pruned_lengths / macs_model.calc_vision_macs).
+"""
+
+import allo
+import numpy as np
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+
+
+def token_norm_scores[
+    T: (int4, int8),
+    L: int16,   # Number of tokens
+    D: int16    # Embedding length
+](
+    X: "T[L, D]",
+    scores: "int32[L]"
+):
+    """scores[i] = sum_d |X[i, d]| (activation L1 norm)."""
+    for i in allo.grid(L, name="score_row"):
+        acc: int32 = 0
+        for d in allo.reduction(D, name="score_d"):
+            x_val: int32 = X[i, d]
+            acc += x_val if x_val >= 0 else -x_val
+        scores[i] = acc
+
+
+def token_topk_gather[
+    T: (int4, int8),
+    L: int16,   # Number of tokens in
+    D: int16,   # Embedding length
+    K: int16    # Number of tokens kept
+](
+    X: "T[L, D]",
+    scores: "int32[L]",
+    X_out: "T[K, D]",
+    keep_idx: "int16[K]"   # Original index of each kept token
+):
+    """
+    Keep the K highest-scoring tokens, compacted in their original order.
+
+    rank[i] = #{j : scores[j] > scores[i] or (scores[j] == scores[i] and j < i)}
+    is a total order, so exactly K tokens have rank < K. Kept tokens are then
+    written in index order, which keeps the patch order the later layers and
+    position embeddings expect.
+    """
+    rank: "int16[L]"
+    for i in allo.grid(L, name="rank_i"):
+        s_i: int32 = scores[i]
+        r: int16 = 0
+        for j in allo.reduction(L, name="rank_j"):
+            s_j: int32 = scores[j]
+            if s_j > s_i or (s_j == s_i and j < i):
+                r += 1
+        rank[i] = r
+
+    count: int16 = 0
+    for i2 in allo.grid(L, name="gather_i"):
+        if rank[i2] < K:
+            keep_idx[count] = i2
+            for d2 in allo.grid(D, name="gather_d"):
+                X_out[count, d2] = X[i2, d2]
+            count += 1
+
+
+def token_prune_topk[
+    T: (int4, int8),
+    L: int16,
+    D: int16,
+    K: int16
+](
+    X: "T[L, D]",
+    X_out: "T[K, D]",
+    keep_idx: "int16[K]"
+):
+    """Norm-scored top-K pruning: token_norm_scores -> token_topk_gather."""
+    scores: "int32[L]"
+    token_norm_scores[T, L, D, "norm_scores"](X, scores)
+    token_topk_gather[T, L, D, K, "topk_gather"](X, scores, X_out, keep_idx)
+
+
+def token_prune_np(X, k, scores=None):
+    """
+    Numpy reference. Returns (X_out, keep_idx) with the same tie-breaking
+    as token_topk_gather (higher score first, then lower index).
+    """
+    if scores is None:
+        scores = np.abs(X.astype(np.int32)).sum(axis=-1)
+    order = np.lexsort((np.arange(len(scores)), -scores.astype(np.int64)))
+    keep_idx = np.sort(order[:k]).astype(np.int16)
+    return X[keep_idx], keep_idx
+
+
+def pruned_lengths(L: int, keep_schedule):
+    """
+    Tokens seen by each layer for a keep schedule.
+
+    keep_schedule[l] is either a token count (int) or a keep ratio (float)
+    applied to the tokens entering layer l. Counts never grow.
+    """
+    lengths = []
+    cur = L
+    for keep in keep_schedule:
+        nxt = int(round(cur * keep)) if isinstance(keep, float) else int(keep)
+        cur = max(1, min(cur, nxt))
+        lengths.append(cur)
+    return lengths
@@ -0,0 +1,75 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vision.token_pruning import (
+    token_norm_scores,
+    token_topk_gather,
+    token_prune_topk,
+    token_prune_np,
+)
+
+# Vision encoder shapes (analysis/macs_model.py)
+V_L = 1024
+V_D = 768
+
+
+def schedule_token_prune_topk(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    K: int = 512,       # Tokens kept
+    L: int = V_L,
+    D: int = V_D,
+    R: int = 16,        # rank_j unroll factor (parallel comparators)
+    mode: str = "csyn"
+):
+    """
+    Norm-scored top-K token pruning (token_pruning.token_prune_topk).
+
+    The L^2 rank comparisons dominate: rank_j is unrolled by R with scores
+    cyclically partitioned to match, so ranking takes ~L^2 / R cycles. That is
+    small next to one encoder layer's 2 * L^2 * D attention MACs.
+    """
+    s_score = allo.customize(token_norm_scores, instantiate=[A_T, L, D])
+    s_score.pipeline(s_score.get_loops()["score_row"]["d"])
+
+    s_gather = allo.customize(token_topk_gather, instantiate=[A_T, L, D, K])
+    gather_loops = s_gather.get_loops()
+    s_gather.unroll(gather_loops["rank_i"]["j"], factor=R)
+    s_gather.pipeline(gather_loops["rank_i"]["j"])
+    s_gather.partition(s_gather.scores, partition.Cyclic, dim=1, factor=R)
+    s_gather.pipeline(gather_loops["gather_i"]["d2"])
+
+    s = allo.customize(token_prune_topk, instantiate=[A_T, L, D, K])
+    s.compose(s_score, id="norm_scores")
+    s.compose(s_gather, id="topk_gather")
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"token_prune_top{K}_of_{L}_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            X = np.random.randint(-8, 8, (L, D)).astype(N_T)
+            X_out = np.zeros((K, D), dtype=N_T)
+            keep_idx = np.zeros((K,), dtype=np.int16)
+            s_llvm(X, X_out, keep_idx)
+            X_ref, idx_ref = token_prune_np(X, K)
+            print(f"keep_idx match: {np.array_equal(keep_idx, idx_ref)}, "
+                  f"X_out match: {np.array_equal(X_out, X_ref)}")
+            return X_out, s
+        case "csyn":
+            s_csyn = s.build(target="vitis_hls", mode="csyn", project=project_name)
+            s_csyn()
+            return s, s
+
+
+if __name__ == "__main__":
+    # Keep half of the 1024 patch tokens
+    print("\n=== Token pruning int8 (1024 -> 512) ===")
+    schedule_token_prune_topk(np.int8, int8, K=512, mode="csyn")
+
+    # schedule_token_prune_topk(np.int8, int8, K=32, L=128, D=64, mode="llvm")
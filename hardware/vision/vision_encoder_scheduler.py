@@ -0,0 +1,118 @@
+import allo
+from allo.ir.types import float32, bfloat16, int32, int16, int8, int4
+from allo.customize import Partition as partition
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from vision.encoder import vision_encoder, vision_encoder_np, RQ_SLOTS
+from vision.camera_batch_scheduler import customize_sdpa_engine
+from common_kernels.requant import make_requant_params, quant_range
+from attention.config import VLMAttentionConfig as VAC
+
+V_FFN = 4 * VAC.HIDDEN_DIM   # SigLIP MLP width (3072)
+
+
+def schedule_vision_encoder(
+    N_T: np.dtype,
+    A_T: allo.ir.types,
+    NL: int = VAC.NUM_LAYERS,
+    L: int = VAC.NUM_TOKENS,
+    D: int = VAC.HIDDEN_DIM,
+    H: int = VAC.NUM_HEADS,
+    F: int = V_FFN,
+    Tn: int = 16,
+    P: int = 4,
+    mode: str = "csyn"
+):
+    """
+    All NL encoder layers in one kernel (encoder.vision_encoder).
+
+    Each weight table gets its own HBM channel so the per-layer tile loads
+    of the four projections do not contend. The weight tiles are split by
+    column so the Tn output features of a tile read their weights in
+    parallel; the reduction loops are pipelined. Attention composes the
+    pipelined sdpa_streaming_8row engine of the camera-batched kernels.
+    """
+    D_h = D // H
+    s = allo.customize(vision_encoder, instantiate=[A_T, NL, L, D, H, D_h, F, Tn, P])
+    s.compose(customize_sdpa_engine(A_T, L, D_h, P), id="engine")
+
+    for buf in (s.w0_buf, s.w1_buf, s.w2_buf, s.w3_buf):
+        s.partition(buf, partition.Complete, dim=2)
+
+    loops = s.get_loops()
+    layer = loops["layer"]
+    for name in ("j0", "j8", "j12", "j14"):   # weight tile loads
+        s.pipeline(layer[name])
+    for name in ("j1", "j10", "j2", "j11"):   # LayerNorm
+        s.pipeline(layer[name])
+    for name in ("k1", "k4", "k6", "k8"):     # projections
+        s.pipeline(layer[name])
+    for name in ("dh0", "dh1"):               # per-head Q/K/V / output copies
+        s.pipeline(layer[name])
+    s.pipeline(loops["load_x"]["d0"])
+    s.pipeline(loops["store_out"]["d2"])
+
+    dtype_str = "int4" if A_T == int4 else "int8"
+    project_name = f"vision_encoder_{NL}l_{dtype_str}_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prj"
+    match mode:
+        case "llvm":
+            s_llvm = s.build(project=project_name)
+            args = make_encoder_inputs(N_T, NL, L, D, F)
+            q_min, q_max = quant_range(4 if A_T == int4 else 8)
+            scale, act_scale = float(np.sqrt(D_h)), 1.0 / 16
+            out = np.zeros((L, D), dtype=np.int32)
+            s_llvm(*args, scale, act_scale, q_min, q_max, out)
+            ref = vision_encoder_np(*args, H, scale, act_scale, q_min, q_max)
+            print(f"max |diff| vs numpy: {np.abs(out - ref).max()}")
+            return out, s
+        case "csyn":
+            hbm_mapping = {
+                "X": 0,
+                "W_qkv": 1,
+                "W_o": 2,
+                "W_1": 3,
+                "W_2": 4,
+                "out": 5,
+            }
+            s.build(
+                target="vitis_hls",
+                mode="csyn",
+                project=project_name,
+                configs={"hbm_mapping": hbm_mapping},
+            )()
+            return s, s
+
+
+def make_encoder_inputs(N_T: np.dtype, NL: int, L: int, D: int, F: int, seed: int = 0):
+    """Random X, weight tables, LayerNorm params and requant params for vision_encoder."""
+    rng = np.random.default_rng(seed)
+    X = rng.integers(-8, 8, (L, D)).astype(N_T)
+    W_qkv = rng.integers(-8, 8, (NL, D, 3 * D)).astype(N_T)
+    b_qkv = rng.integers(-64, 64, (NL, 3 * D)).astype(np.int32)
+    W_o = rng.integers(-8, 8, (NL, D, D)).astype(N_T)
+    b_o = rng.integers(-64, 64, (NL, D)).astype(np.int32)
+    W_1 = rng.integers(-8, 8, (NL, D, F)).astype(N_T)
+    b_1 = rng.integers(-64, 64, (NL, F)).astype(np.int32)
+    W_2 = rng.integers(-8, 8, (NL, F, D)).astype(N_T)
+    b_2 = rng.integers(-64, 64, (NL, D)).astype(np.int32)
+    ln1_g, ln2_g = rng.uniform(8, 24, (2, NL, D)).astype(np.float32)
+    ln1_b, ln2_b = rng.uniform(-4, 4, (2, NL, D)).astype(np.float32)
+    # Scales keep each projection inside the int8 range for these inputs
+    rq_mult = np.zeros((NL, RQ_SLOTS), dtype=np.int32)
+    rq_shift = np.zeros((NL, RQ_SLOTS), dtype=np.int32)
+    for ly in range(NL):
+        rq_mult[ly], rq_shift[ly] = make_requant_params(
+            [1.0 / (3 * np.sqrt(D)), 1.0 / (5 * np.sqrt(D)), 1.0 / (3 * np.sqrt(D)), 1.0 / (3 * np.sqrt(F))]
+        )
+    return (X, W_qkv, b_qkv, W_o, b_o, W_1, b_1, W_2, b_2,
+            ln1_g, ln1_b, ln2_g, ln2_b, rq_mult, rq_shift)
+
+
+if __name__ == "__main__":
+    print("\n=== SigLIP encoder, 12 layers, int8 ===")
+    schedule_vision_encoder(np.int8, int8, mode="csyn")
+
+    # schedule_vision_encoder(np.int8, int8, NL=2, L=16, D=32, H=2, F=64, Tn=8, P=4, mode="llvm")